@@ -2,6 +2,8 @@
 ASGI config for code_tutors project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is how the application is served, e.g. ``uvicorn code_tutors.asgi:application``:
+the live notification streams need an ASGI server to stay open.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -74,6 +74,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'code_tutors.wsgi.application'
+# The app is served by ASGI, which keeps the live notification streams open
+ASGI_APPLICATION = 'code_tutors.asgi.application'
 
 
 # Database
@@ -141,6 +143,12 @@ LOGIN_URL = '/'
 # URL where @login_prohibited redirects to
 REDIRECT_URL_WHEN_LOGGED_IN = 'dashboard'
 
+# Notifications are also sent through these backends by the run_outbox command.
+# Email goes to the console in development; point EMAIL_BACKEND at SMTP in production.
+NOTIFICATION_DELIVERY_BACKENDS = ['tutorials.delivery.EmailDeliveryBackend']
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'notifications@codetutors.example'
+
 # Convert Django ERROR messages to Bootstrap DANGER messages
 MESSAGE_TAGS = {
     messages.ERROR: 'danger',
@@ -25,6 +25,10 @@ urlpatterns = [
     path('', views.LogInView.as_view(), name=''),
     path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
     path('new_booking', views.NewBookingView.as_view(), name='new_booking'),
+    path('new_booking/slots', views.available_slots, name='available_slots'),
+    path('requests/tutees', views.tutee_lookup, name='tutee_lookup'),
+    path('requests/summary.json', views.request_summary_json, name='request_summary'),
+    path('calendar/<uuid:token>.ics', views.calendar_feed, name='calendar_feed'),
     path('edit_booking/<int:booking_id>', views.EditBookingView.as_view(), name='edit_booking'),
     path('log_out/', views.log_out, name='log_out'),
     path('password/', views.PasswordView.as_view(), name='password'),
@@ -32,13 +36,20 @@ urlpatterns = [
     path('tutee_sign_up/', views.TuteeSignUpView.as_view(), name='tutee_sign_up'),
     path('tutor_sign_up/', views.TutorSignUpView.as_view(), name='tutor_sign_up'),
     path('invoices/', views.invoices, name='invoices'),
+    path('invoices/export.<str:export_format>', views.export_invoices, name='export_invoices'),
+    path('invoices/reconcile/', views.reconcile_payments, name='reconcile_payments'),
     path('tutors/', views.tutors, name='tutors'),
+    path('reports/revenue/', views.revenue_report, name='revenue_report'),
     path('tutees/', views.tutees, name='tutees'),
     path('requests/', views.RequestsView.as_view(), name='requests'),
     path('new_booking_request', views.NewBookingRequestView.as_view(), name='new_booking_request'),
     path('change_cancel_booking_request', views.ChangeCancelBookingRequestView.as_view(), name='change_cancel_booking_request'),
     path('requests/<int:request_id>', views.RequestInfoView.as_view(), name='request_info'),
+    path('requests/<int:request_id>/approve', views.ApproveBookingRequestView.as_view(), name='approve_booking_request'),
+    path('requests/match', views.match_requests, name='match_requests'),
     path('inbox/', views.inbox, name='inbox'),
+    path('inbox/<str:tab>/page', views.inbox_page, name='inbox_page'),
+    path('notifications/stream', views.notification_stream, name='notification_stream'),
     path('send-inquiry/', views.send_inquiry, name='send_inquiry'),
     path('inquiries/respond/<int:inquiry_id>/', views.respond_to_inquiry, name='respond_to_inquiry'),
     path('delete-notification/', views.delete_notification, name='delete_notification')
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Booking, Tutor, Tutee, Request, Inquiry
+from .models import User, Booking, Tutor, Tutee, Request, Inquiry, Term, OutboxMessage
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -112,10 +112,10 @@ class RequestAdmin(admin.ModelAdmin):
     """Admin customization for Request model."""
 
     # Fields to display in the admin list view
-    list_display = ('tutee', 'request_type', 'status', 'created_at', 'is_late')
+    list_display = ('tutee', 'request_type', 'status', 'created_at', 'term', 'is_late')
 
     # Fields to filter by in the admin
-    list_filter = ('status', 'request_type', 'tutee')
+    list_filter = ('status', 'request_type', 'term', 'tutee')
 
     # Fields to search for in the admin
     search_fields = ('tutee__user__username', 'request_type')
@@ -133,9 +133,26 @@ class RequestAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(Term)
+class TermAdmin(admin.ModelAdmin):
+    """Admin customization for the term calendar; run recompute_lateness and rebuild_rollups after editing it."""
+
+    list_display = ('name', 'start_date', 'end_date', 'late_deadline')
+    ordering = ('-start_date',)
+
 @admin.register(Inquiry)
 class InquiryAdmin(admin.ModelAdmin):
     list_display = ('sender', 'recipient', 'status', 'created_at')
     list_filter = ('status', 'recipient')
     search_fields = ('sender__username', 'message')
-    ordering = ('-created_at',)
\ No newline at end of file
+    ordering = ('-created_at',)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Admin view of the notification outbox, to inspect deliveries that keep failing."""
+
+    list_display = ('user', 'message', 'created_at', 'attempts', 'next_attempt_at', 'delivered_at')
+    list_filter = ('delivered_at', 'attempts')
+    search_fields = ('user__username', 'message', 'last_error')
+    ordering = ('-created_at',)
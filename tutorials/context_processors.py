@@ -1,5 +1,11 @@
+from django.core.handlers.asgi import ASGIRequest
+
 def notifications(request):
     if request.user.is_authenticated:
-        unread_count = request.user.notifications.filter(is_read=False).count()
-        return {'unread_notifications_count': unread_count}
+        return {
+            # A counter kept on the user row, which the session already loaded
+            'unread_notifications_count': request.user.unread_notification_count,
+            # Only an ASGI server can hold the event streams open
+            'live_notifications': isinstance(request, ASGIRequest),
+        }
     return {}
\ No newline at end of file
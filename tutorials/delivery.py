@@ -0,0 +1,41 @@
+"""Pluggable backends that deliver queued notifications outside the app, e.g. by email."""
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.module_loading import import_string
+
+DEFAULT_DELIVERY_BACKENDS = ['tutorials.delivery.EmailDeliveryBackend']
+
+
+class EmailDeliveryBackend:
+    """
+    Email each notification to its user through Django's EMAIL_BACKEND.
+
+    The console and file backends suit development, SMTP suits production; one connection is
+    opened per batch and reused for every message in it. Users without an address are skipped.
+    """
+
+    subject = "Code Tutors notification"
+
+    def __init__(self):
+        self.connection = None
+
+    def open(self):
+        self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def send(self, outbox_message):
+        """Send one message, raising if the mail server refuses it."""
+        email = outbox_message.user.email
+        if email:
+            EmailMessage(self.subject, outbox_message.message, to=[email], connection=self.connection).send()
+
+
+def load_backends():
+    """Instantiate the backends named in the NOTIFICATION_DELIVERY_BACKENDS setting."""
+    paths = getattr(settings, 'NOTIFICATION_DELIVERY_BACKENDS', DEFAULT_DELIVERY_BACKENDS)
+    return [import_string(path)() for path in paths]
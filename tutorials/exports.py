@@ -0,0 +1,72 @@
+"""Streaming CSV and JSON Lines exports of the bookings, for finance."""
+import csv
+import json
+from .models import Booking
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+# Rows are read from the database this many at a time while an export streams
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = (
+    'id', 'date_time', 'duration_minutes', 'language',
+    'tutor_username', 'tutor_name', 'tutee_username', 'tutee_name',
+    'price', 'is_paid', 'is_completed',
+)
+
+
+def export_rows(status=None):
+    """
+    Yield one tuple per booking, in EXPORT_COLUMNS order, filtered like the invoices page.
+
+    Rows come straight from a joined values_list with a server-side iterator, so no model
+    instances are built and memory stays flat however many bookings there are.
+    """
+
+    bookings = Booking.objects.with_completion()
+    if status == "Paid":
+        bookings = bookings.filter(is_paid=True)
+    elif status == "Pending":
+        bookings = bookings.filter(is_paid=False)
+
+    rows = bookings.order_by('date_time', 'pk').values_list(
+        'pk', 'date_time', 'duration', 'language',
+        'tutor__user__username', 'tutor__user__first_name', 'tutor__user__last_name',
+        'tutee__user__username', 'tutee__user__first_name', 'tutee__user__last_name',
+        'price', 'is_paid', 'completed',
+    )
+    for (pk, date_time, duration, language, tutor_username, tutor_first, tutor_last,
+         tutee_username, tutee_first, tutee_last, price, is_paid, completed) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (
+            pk, date_time.isoformat(), int(duration.total_seconds() // 60), language,
+            tutor_username, f'{tutor_first} {tutor_last}', tutee_username, f'{tutee_first} {tutee_last}',
+            f'{price:.2f}', bool(is_paid), bool(completed),
+        )
+
+
+class _Echo:
+    """File-like object whose write() hands back the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    """Yield the header and then each row as a CSV line."""
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_jsonl(rows):
+    """Yield each row as a JSON object on its own line."""
+
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n'
+
+
+RENDERERS = {
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (render_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
@@ -4,6 +4,7 @@ from django.forms import ValidationError
 from django.contrib.auth import authenticate
 from django.core.validators import RegexValidator
 from .models import User, Tutor, Tutee, Request, Booking, Inquiry, NewBookingRequest, ChangeCancelBookingRequest
+from .scheduling import SERIES_MAX_SPAN, Slot, book_series, find_conflicts
 from django.conf import settings
 from datetime import datetime, timedelta
 from django.utils import timezone
@@ -226,6 +227,10 @@ class BookingForm(forms.ModelForm):
         else:
             now = now.replace(second=0, microsecond=0)
 
+        # The tutor and tutee options are labelled with the username
+        self.fields["tutor"].queryset = Tutor.objects.select_related("user")
+        self.fields["tutee"].queryset = Tutee.objects.select_related("user")
+
         # Set 'min' to the rounded current time
         self.fields["date_time"].widget.attrs["min"] = now.strftime("%Y-%m-%dT%H:%M")
         self.fields["date_time"].widget.attrs["step"] = "1800"  # 30 minutes = 1800 seconds
@@ -267,17 +272,20 @@ class BookingForm(forms.ModelForm):
         if price is None or price <= 0:
             self.add_error("price", "The price must be positive.")
 
-        # Check for overlapping bookings for the same tutor
-        overlapping_bookings = Booking.objects.filter(
-            tutor=tutor,
-            date_time__lt=end_time,  # Other bookings that start before this one ends
-            date_time__gte=date_time  # Other bookings that end after this one starts
-        ).exclude(pk=self.instance.pk)  # Exclude the current booking in case of updates
+        # Check for overlapping bookings of the same tutor or tutee
+        tutee = cleaned_data.get("tutee")
+        overlapping_bookings = find_conflicts(
+            Slot(date_time, duration, tutor, tutee),
+            exclude=self.instance.pk,  # Exclude the current booking in case of updates
+        )
 
-        if overlapping_bookings.exists():
-            for overlapping_booking in overlapping_bookings:
-                self.add_error("date_time", f"This date&time overlaps with another booking for {overlapping_booking}.")
-                self.add_error("duration", f"This duration overlaps with another booking for {overlapping_booking}.")
+        for overlapping_booking in overlapping_bookings:
+            if tutor and overlapping_booking.tutor_id == tutor.pk:
+                participant = "the tutor"
+            else:
+                participant = "the tutee"
+            self.add_error("date_time", f"This date&time overlaps with another booking of {participant} for {overlapping_booking}.")
+            self.add_error("duration", f"This duration overlaps with another booking of {participant} for {overlapping_booking}.")
 
         return cleaned_data
     
@@ -328,29 +336,90 @@ class NewBookingRequestForm(forms.ModelForm):
     def save(self, commit=True):
         """Save the new booking request and create the associated Request."""
         # Create the associated Request instance
-        request = Request.objects.create(
+        request = Request(
             tutee=self.instance.tutee,  # Use the appropriate tutee instance if available
             request_type="New Booking"
         )
+        # The term and lateness come from the cached term calendar, so they cost no query
+        request.assign_term()
+        request.save()
 
         # Save the NewBookingRequest instance and associate it with the Request
         instance = super().save(commit=False)
         instance.request = request
         if commit:
-            term_start_date = self.instance.request.get_term_start_date()
+            instance.save()
+        return instance
+
+class ApproveBookingRequestForm(forms.Form):
+    """Form enabling admins to approve a new booking request by scheduling its whole series."""
 
-            if term_start_date:
-                # Calculate the deadline for submitting requests (2 weeks before the term starts)
-                deadline = term_start_date - timedelta(weeks=2)
+    tutor = forms.ModelChoiceField(queryset=Tutor.objects.none(), widget=forms.Select(attrs={"class": "form-control"}))
+    first_date_time = forms.DateTimeField(
+        label="First session",
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local", "class": "form-control", "step": "1800"}),
+    )
+    until = forms.DateField(
+        required=False,
+        label="Last day",
+        help_text="Leave blank to book until the end of the term.",
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    price = forms.DecimalField(max_digits=8, decimal_places=2, widget=forms.NumberInput(attrs={"class": "form-control", "step": "0.01"}))
 
-                # Determine if the request is late
-                if self.instance.request.created_at.date() >= deadline:
-                    self.instance.request.is_late = True
-                else:
-                    self.instance.request.is_late = False
+    def __init__(self, new_booking_request=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.new_booking_request = new_booking_request
+        self.bookings = []
+        self.fields["tutor"].queryset = Tutor.objects.select_related("user")
 
-            instance.save()
-        return instance
+    def clean(self):
+        """Check the series can be booked as a whole."""
+        cleaned_data = super().clean()
+        tutor = cleaned_data.get("tutor")
+        first_date_time = cleaned_data.get("first_date_time")
+        until = cleaned_data.get("until")
+        price = cleaned_data.get("price")
+        language = self.new_booking_request.language
+
+        if first_date_time and first_date_time < timezone.now():
+            self.add_error("first_date_time", "The first session cannot be in the past.")
+        if first_date_time and until and until > timezone.localtime(first_date_time).date() + SERIES_MAX_SPAN:
+            self.add_error("until", f"A series cannot run for more than {SERIES_MAX_SPAN.days} days.")
+        if tutor and language not in tutor.get_languages_list():
+            self.add_error("tutor", f"This tutor cannot teach {language}. This tutor teaches {tutor.languages_specialised}.")
+        if price is not None and price <= 0:
+            self.add_error("price", "The price must be positive.")
+        return cleaned_data
+
+    def save(self):
+        """Create the series, reporting any clashing sessions as form errors."""
+        try:
+            self.bookings = book_series(
+                self.new_booking_request,
+                self.cleaned_data["tutor"],
+                self.cleaned_data["first_date_time"],
+                self.cleaned_data["price"],
+                until=self.cleaned_data["until"],
+            )
+        except ValidationError as error:
+            self.add_error(None, error)
+        return self.bookings
+
+class ReconcilePaymentsForm(forms.Form):
+    """Form enabling admins to upload a bank statement to reconcile against the unpaid bookings."""
+
+    statement = forms.FileField(
+        help_text="CSV with date, amount and description columns.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,text/csv"}),
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        label="Dry run",
+        help_text="Only report the matches, without marking anything as paid.",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
 
 class ChangeCancelBookingRequestForm(forms.ModelForm):
     """Form for creating or updating a change/cancel booking request."""
@@ -376,7 +445,7 @@ class ChangeCancelBookingRequestForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if tutee:
             # Filter bookings based on the tutee and bookings not completed
-            queryset = Booking.objects.filter(tutee=tutee, is_completed=False)
+            queryset = Booking.objects.for_listing().with_completion().filter(tutee=tutee, completed=False)
             self.fields['booking'].queryset = queryset
 
             # Check if queryset is empty and update empty_label accordingly
@@ -404,26 +473,18 @@ class ChangeCancelBookingRequestForm(forms.ModelForm):
     def save(self, commit=True):
         """Save the new booking request and create the associated Request."""
         # Create the associated Request instance
-        request = Request.objects.create(
+        request = Request(
             tutee=self.instance.tutee,  # Use the appropriate tutee instance if available
             request_type="Change/Cancel Booking"
         )
+        # The term and lateness come from the cached term calendar, so they cost no query
+        request.assign_term()
+        request.save()
 
         # Save the NewBookingRequest instance and associate it with the Request
         instance = super().save(commit=False)
         instance.request = request
         if commit:
-            term_start_date = self.instance.request.get_term_start_date()
-
-            if term_start_date:
-                # Calculate the deadline for submitting requests (2 weeks before the term starts)
-                deadline = term_start_date - timedelta(weeks=2)
-
-                # Determine if the request is late
-                if self.instance.request.created_at.date() >= deadline:
-                    self.instance.request.is_late = True
-                else:
-                    self.instance.request.is_late = False
             instance.save()
         return instance
         
@@ -0,0 +1,84 @@
+"""iCalendar (RFC 5545) rendering of booking feeds, produced line by line so they can be streamed."""
+from datetime import timezone
+from django.db.models import Q
+from .models import Booking
+
+# Bookings are read from the database this many rows at a time while the feed streams
+FEED_CHUNK_SIZE = 500
+# RFC 5545 lines are folded once they reach 75 octets
+LINE_LIMIT = 75
+
+
+def _escape(text):
+    """Escape a TEXT property value."""
+
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces, continuation lines starting with a space."""
+
+    encoded = line.encode()
+    if len(encoded) <= LINE_LIMIT:
+        return line + '\r\n'
+    pieces = []
+    limit = LINE_LIMIT
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        pieces.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = LINE_LIMIT - 1
+    return '\r\n '.join(pieces) + '\r\n'
+
+
+def _utc(moment):
+    return moment.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def feed_bookings(user):
+    """Return the bookings a user's feed lists: those they teach or attend."""
+
+    return (
+        Booking.objects
+        .filter(Q(tutor__user=user) | Q(tutee__user=user))
+        .select_related('tutor__user', 'tutee__user')
+        .only(
+            'date_time', 'duration', 'language',
+            'tutor__user__first_name', 'tutor__user__last_name',
+            'tutee__user__first_name', 'tutee__user__last_name',
+        )
+        .order_by('date_time', 'pk')
+    )
+
+
+def render_feed(feed, host):
+    """
+    Yield the feed of `feed.user` as iCalendar text, one event at a time.
+
+    Bookings are read with a server-side iterator so memory stays flat however many there are.
+    `feed.updated_at` stamps every event, as that is when the feed's content last changed.
+    """
+
+    stamp = _utc(feed.updated_at)
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Code Tutors//Bookings//EN\r\nCALSCALE:GREGORIAN\r\n'
+    yield _fold(f'X-WR-CALNAME:{_escape("Code Tutors - " + feed.user.full_name())}')
+    for booking in feed_bookings(feed.user).iterator(chunk_size=FEED_CHUNK_SIZE):
+        summary = _escape(
+            f'{booking.language} session: {booking.tutor.user.full_name()} with {booking.tutee.user.full_name()}'
+        )
+        yield (
+            'BEGIN:VEVENT\r\n'
+            f'UID:booking-{booking.pk}@{host}\r\n'
+            f'DTSTAMP:{stamp}\r\n'
+            f'DTSTART:{_utc(booking.date_time)}\r\n'
+            f'DTEND:{_utc(booking.date_time + booking.duration)}\r\n'
+            + _fold(f'SUMMARY:{summary}') +
+            'END:VEVENT\r\n'
+        )
+    yield 'END:VCALENDAR\r\n'
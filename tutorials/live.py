@@ -0,0 +1,139 @@
+"""Push unread counts and new notifications to the open browser tabs as server-sent events."""
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from asgiref.sync import sync_to_async
+from django.db.models import Max
+from .models import Notification, User
+
+# How often the poller looks for changes made by other processes, such as run_outbox
+LIVE_POLL_SECONDS = 2
+# An idle stream sends a comment this often, so proxies do not close it
+LIVE_KEEPALIVE_SECONDS = 15
+# How long browsers wait before reconnecting a dropped stream
+LIVE_RETRY_MS = 15000
+# Events waiting for a slow client; when its queue is full it misses events until it catches up
+LIVE_QUEUE_SIZE = 100
+# Most new notifications read per poll; the rest are picked up by the next one
+LIVE_POLL_BATCH = 500
+
+
+def format_event(event, data):
+    """Return one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _latest_notification_id():
+    return Notification.objects.aggregate(latest=Max('pk'))['latest'] or 0
+
+
+def _read_changes(user_ids, after_id):
+    """Read the notifications created since `after_id` and the unread counts of `user_ids`: two queries."""
+    notifications = list(
+        Notification.objects.filter(pk__gt=after_id).order_by('pk')
+        .values('pk', 'user_id', 'message', 'created_at')[:LIVE_POLL_BATCH]
+    )
+    counts = list(User.objects.filter(pk__in=user_ids).order_by().values_list('pk', 'unread_notification_count'))
+    return notifications, counts
+
+
+class NotificationBroker:
+    """
+    Process-wide pub/sub between notification writes and the open event streams.
+
+    Each stream subscribes a queue for its user; an idle stream is a coroutine waiting on it,
+    so one process holds thousands of them cheaply. A single poller task reads the new
+    notifications and the subscribed users' unread counts with two queries per round, however
+    many streams are open, which also picks up writes from other processes. Counter changes
+    made in this process call wake() once they commit, so their events go out at once.
+    """
+
+    def __init__(self):
+        self._reset(None)
+
+    def _reset(self, loop):
+        self.loop = loop
+        self.subscribers = defaultdict(set)
+        self.unread = {}
+        self.last_notification_id = None
+        self.poller = None
+        self.wakeup = asyncio.Event() if loop is not None else None
+
+    @asynccontextmanager
+    async def subscribe(self, user_id, unread_count):
+        """Yield a queue of (event, data) pairs for the user, for as long as the stream is open."""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # State belongs to one event loop; a new loop (a restarted server, a test) starts afresh
+            self._reset(loop)
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.subscribers[user_id].add(queue)
+        self.unread.setdefault(user_id, unread_count)
+        if self.poller is None or self.poller.done():
+            self.poller = loop.create_task(self._poll())
+        try:
+            yield queue
+        finally:
+            self.subscribers[user_id].discard(queue)
+            if not self.subscribers[user_id]:
+                del self.subscribers[user_id]
+                self.unread.pop(user_id, None)
+
+    def wake(self):
+        """Make the poller look now instead of at its next round. Safe to call from any thread."""
+        loop = self.loop
+        if loop is not None and self.subscribers and not loop.is_closed():
+            loop.call_soon_threadsafe(self.wakeup.set)
+
+    def publish(self, user_id, event, data):
+        """Queue an event for every open stream of the user."""
+        for queue in self.subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                pass
+
+    async def poll_once(self):
+        """Read what changed since the last round and publish it."""
+        if self.last_notification_id is None:
+            # Notifications from before the first stream opened are already on the page
+            self.last_notification_id = await sync_to_async(_latest_notification_id)()
+        notifications, counts = await sync_to_async(_read_changes)(list(self.subscribers), self.last_notification_id)
+        for notification in notifications:
+            self.last_notification_id = notification['pk']
+            self.publish(notification['user_id'], 'notification', {
+                'id': notification['pk'],
+                'message': notification['message'],
+                'created_at': notification['created_at'].isoformat(),
+            })
+        for user_id, count in counts:
+            if user_id in self.unread and self.unread[user_id] != count:
+                self.unread[user_id] = count
+                self.publish(user_id, 'unread', {'count': count})
+
+    async def _poll(self):
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), LIVE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if self.subscribers:
+                await self.poll_once()
+
+
+broker = NotificationBroker()
+
+
+async def event_stream(user_id, unread_count):
+    """Yield the user's events until the client goes away, starting with the current unread count."""
+    yield f"retry: {LIVE_RETRY_MS}\n" + format_event('unread', {'count': unread_count})
+    async with broker.subscribe(user_id, unread_count) as queue:
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+            else:
+                yield format_event(event, data)
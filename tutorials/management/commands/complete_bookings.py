@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+from tutorials.models import BOOKING_STATE_FIELDS, Booking, RevenueRollup, rollup_changes
+
+class Command(BaseCommand):
+    """Mark finished bookings as completed, meant to be run periodically (e.g. from cron)."""
+
+    BATCH_SIZE = 500
+    help = 'Marks bookings whose end time has passed as completed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=self.BATCH_SIZE,
+                            help='Number of bookings updated per transaction.')
+
+    def handle(self, *args, **options):
+        """Flag finished bookings in small batches so each write lock is held briefly."""
+
+        batch_size = options['batch_size']
+        cutoff = now()
+        total_completed = 0
+
+        while True:
+            with transaction.atomic():
+                due = list(
+                    Booking.objects.due_for_completion(at=cutoff)
+                    .order_by('pk')
+                    .values('pk', *BOOKING_STATE_FIELDS)[:batch_size]
+                )
+                if not due:
+                    break
+                total_completed += Booking.objects.filter(pk__in=[row['pk'] for row in due]).update(is_completed=True)
+                # The UPDATE skips the save signals, so move the bookings to the rollups' completed counts here
+                changes = rollup_changes(due, sign=-1)
+                rollup_changes([dict(row, is_completed=True) for row in due], changes=changes)
+                RevenueRollup.objects.apply(changes)
+
+        self.stdout.write(f"Marked {total_completed} bookings as completed.")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from tutorials.exports import EXPORT_FORMATS, RENDERERS, export_rows
+
+class Command(BaseCommand):
+    """Write every booking to stdout or a file as CSV or JSON Lines, e.g. for finance at the end of term."""
+
+    help = 'Exports the booking history as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help='Output format.')
+        parser.add_argument('--status', choices=['Paid', 'Pending'], help='Only export paid or pending bookings.')
+        parser.add_argument('--output', help='File to write to instead of stdout.')
+
+    def handle(self, *args, **options):
+        """Stream the rows to the output as they are read, so memory stays flat."""
+
+        render_rows, _ = RENDERERS[options['format']]
+        lines = render_rows(export_rows(options['status']))
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
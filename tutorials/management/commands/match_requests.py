@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from tutorials.matching import accept_proposals, pending_requests, propose_matches
+
+class Command(BaseCommand):
+    """Propose a tutor for every pending new booking request, and optionally accept the proposals."""
+
+    help = 'Matches the pending new booking requests to tutors, balancing their weekly load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accept', action='store_true', help='Assign the proposed tutors to the requests.')
+
+    def handle(self, *args, **options):
+        """Run the matcher over the whole queue and print how much of it could be placed."""
+
+        pending = pending_requests().count()
+        proposals = propose_matches()
+        self.stdout.write(f"{len(proposals)} of {pending} pending requests matched to {len({proposal.tutor_id for proposal in proposals})} tutors.")
+        if options['accept']:
+            self.stdout.write(f"Assigned tutors to {accept_proposals(proposals)} requests.")
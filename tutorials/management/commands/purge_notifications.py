@@ -0,0 +1,41 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from tutorials.models import NOTIFICATION_RETENTION_DAYS, Notification, OutboxMessage
+
+# Rows deleted per statement; each batch commits on its own so no write lock is held for long
+PURGE_BATCH_SIZE = 1000
+
+class Command(BaseCommand):
+    """Apply the notification retention policy, e.g. nightly."""
+
+    help = 'Deletes read notifications and delivered outbox messages older than the retention period, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=NOTIFICATION_RETENTION_DAYS,
+            help=f'Keep rows this many days (default {NOTIFICATION_RETENTION_DAYS}).'
+        )
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        """Delete the expired rows a batch at a time, oldest first, and report how many went."""
+
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--days cannot be negative and --batch-size must be positive.")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        notifications = self.purge(Notification.objects.filter(is_read=True, created_at__lt=cutoff), options['batch_size'])
+        messages = self.purge(OutboxMessage.objects.filter(delivered_at__lt=cutoff), options['batch_size'])
+        self.stdout.write(f"Deleted {notifications} read notifications and {messages} delivered outbox messages.")
+
+    def purge(self, expired, batch_size):
+        """Delete the rows of `expired` by primary key, one short statement per batch."""
+
+        deleted = 0
+        while True:
+            batch = list(expired.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return deleted
+            deleted += expired.model.objects.filter(pk__in=batch).delete()[0]
+            if len(batch) < batch_size:
+                return deleted
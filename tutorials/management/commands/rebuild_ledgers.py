@@ -0,0 +1,38 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from tutorials.models import Booking, Ledger
+
+class Command(BaseCommand):
+    """Recompute the invoice ledgers from the bookings, e.g. after bookings were changed with raw updates."""
+
+    help = 'Recomputes the paid and remaining totals of every existing invoice ledger'
+
+    def handle(self, *args, **options):
+        """Sum the bookings per tutor and per tutee user with two grouped queries, then write the ledgers in bulk."""
+
+        # A user who tutors themselves is counted once, as the ledgers' for_user and adjust do
+        passes = [
+            ('tutor__user', Booking.objects.all()),
+            ('tutee__user', Booking.objects.exclude(tutee__user=F('tutor__user'))),
+        ]
+
+        totals = defaultdict(lambda: {'paid': Decimal('0'), 'remaining': Decimal('0')})
+        with transaction.atomic():
+            ledgers = list(Ledger.objects.select_for_update())
+            for field, bookings in passes:
+                for row in bookings.invoice_totals_by(field):
+                    totals[row[field]]['paid'] += row['paid']
+                    totals[row[field]]['remaining'] += row['remaining']
+
+            changed = []
+            for ledger in ledgers:
+                user_totals = totals[ledger.user_id]
+                if (ledger.paid, ledger.remaining) != (user_totals['paid'], user_totals['remaining']):
+                    ledger.paid, ledger.remaining = user_totals['paid'], user_totals['remaining']
+                    changed.append(ledger)
+            Ledger.objects.bulk_update(changed, ['paid', 'remaining'], batch_size=500)
+
+        self.stdout.write(f"Rebuilt {len(ledgers)} ledgers, {len(changed)} had drifted.")
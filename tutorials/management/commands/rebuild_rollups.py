@@ -0,0 +1,49 @@
+from datetime import datetime, time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from tutorials.models import ROLLUP_TOTALS, Booking, RevenueRollup, Term, term_calendar
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+class Command(BaseCommand):
+    """Rebuild the revenue rollups from the bookings, to backfill them, repair drift from raw updates or follow edited terms."""
+
+    help = 'Recomputes the revenue and hours rollups per term, tutor and language'
+
+    def handle(self, *args, **options):
+        """Total each term's bookings per tutor and language with one grouped query, from the previous term's end to its own, and rewrite the table."""
+
+        term_calendar.clear()
+        terms = list(Term.objects.order_by('start_date'))
+        with transaction.atomic():
+            rollups = []
+            window_start = None
+            for term in terms:
+                # A booking counts towards the term running on its day, or the next one to start
+                window_end = _start_of(term.end_date + timedelta(days=1))
+                bookings = Booking.objects.filter(date_time__lt=window_end)
+                if window_start is not None:
+                    bookings = bookings.filter(date_time__gte=window_start)
+                rows = bookings.order_by().values('tutor', 'language').annotate(
+                    revenue=Sum('price'),
+                    duration=Sum('duration'),
+                    bookings=Count('pk'),
+                    paid_bookings=Count('pk', filter=Q(is_paid=True)),
+                    unpaid_bookings=Count('pk', filter=Q(is_paid=False)),
+                    completed_bookings=Count('pk', filter=Q(is_completed=True)),
+                )
+                rollups.extend(
+                    RevenueRollup(
+                        term=term, tutor_id=row['tutor'], language=row['language'],
+                        **{field: row[field] or ROLLUP_TOTALS[field] for field in ROLLUP_TOTALS},
+                    )
+                    for row in rows
+                )
+                window_start = window_end
+            RevenueRollup.objects.all().delete()
+            RevenueRollup.objects.bulk_create(rollups, batch_size=500)
+
+        self.stdout.write(f"Rebuilt {len(rollups)} rollups.")
@@ -0,0 +1,43 @@
+from datetime import datetime, time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from tutorials.models import Request, Term, term_calendar
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+class Command(BaseCommand):
+    """Re-derive every request's term and lateness from the term calendar, e.g. after the terms were edited."""
+
+    help = 'Recomputes the term and is_late flag of every request from the term calendar'
+
+    def handle(self, *args, **options):
+        """Update the requests of each term with one set-based UPDATE, from the previous term's end to its own."""
+
+        term_calendar.clear()
+        terms = list(Term.objects.order_by('start_date'))
+        with transaction.atomic():
+            window_start = None
+            for term in terms:
+                # A request counts towards the term running when it was made, or the next one to start
+                window_end = _start_of(term.end_date + timedelta(days=1))
+                requests = Request.objects.filter(created_at__lt=window_end)
+                if window_start is not None:
+                    requests = requests.filter(created_at__gte=window_start)
+                requests.update(term=term, is_late=Case(
+                    When(created_at__gte=_start_of(term.late_deadline), then=Value(True)),
+                    default=Value(False),
+                ))
+                window_start = window_end
+
+            after_last_term = Request.objects.all()
+            if window_start is not None:
+                after_last_term = after_last_term.filter(created_at__gte=window_start)
+            after_last_term.update(term=None, is_late=False)
+
+        self.stdout.write(
+            f"Recomputed {Request.objects.count()} requests against {len(terms)} terms, "
+            f"{Request.objects.filter(is_late=True).count()} are late."
+        )
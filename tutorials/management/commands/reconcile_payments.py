@@ -0,0 +1,35 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from tutorials.reconciliation import MATCH_WINDOW_DAYS, reconcile
+
+class Command(BaseCommand):
+    """Mark the bookings paid by a bank statement as paid, reporting the lines that could not be matched safely."""
+
+    help = 'Reconciles a bank statement CSV (date, amount, description) against the unpaid bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Path to the bank statement CSV.')
+        parser.add_argument('--dry-run', action='store_true', help='Report the matches without marking anything as paid.')
+        parser.add_argument('--window-days', type=int, default=MATCH_WINDOW_DAYS,
+                            help='How many days a payment may be from the session it pays for.')
+
+    def handle(self, *args, **options):
+        """Stream the statement through the matcher and print a summary."""
+
+        try:
+            with open(options['statement'], newline='', encoding='utf-8-sig') as statement:
+                report = reconcile(statement, apply=not options['dry_run'], window_days=options['window_days'])
+        except OSError as error:
+            raise CommandError(f"Cannot read {options['statement']}: {error}")
+        except (csv.Error, UnicodeDecodeError) as error:
+            raise CommandError(f"{options['statement']} is not a valid UTF-8 CSV file: {error}")
+
+        for line_number, reason in report.invalid:
+            self.stdout.write(f"Line {line_number}: invalid, {reason}.")
+        for line_number, booking_ids in report.ambiguous:
+            self.stdout.write(f"Line {line_number}: ambiguous, matches bookings {', '.join(map(str, booking_ids))}.")
+        action = "would be marked" if options['dry_run'] else "marked"
+        self.stdout.write(
+            f"{len(report.matched)} lines matched, {len(report.ambiguous)} ambiguous, "
+            f"{report.unmatched_count} unmatched; {report.updated if not options['dry_run'] else len(report.matched)} bookings {action} as paid."
+        )
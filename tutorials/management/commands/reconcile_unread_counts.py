@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from tutorials.models import Notification, User
+
+class Command(BaseCommand):
+    """Repair the users' unread notification counters, e.g. after notifications were changed with raw updates."""
+
+    help = 'Recounts every user\'s unread notifications and fixes the counters that have drifted'
+
+    def handle(self, *args, **options):
+        """Rewrite every counter that differs from the actual count, with one set-based UPDATE."""
+
+        unread = (
+            Notification.objects.filter(user=OuterRef('pk'), is_read=False)
+            .order_by().values('user').annotate(count=Count('pk')).values('count')
+        )
+        actual = Coalesce(Subquery(unread), 0)
+        repaired = User.objects.exclude(unread_notification_count=actual).update(unread_notification_count=actual)
+        self.stdout.write(f"Repaired the unread notification count of {repaired} users.")
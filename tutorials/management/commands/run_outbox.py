@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from tutorials.outbox import OUTBOX_BATCH_SIZE, drain
+
+class Command(BaseCommand):
+    """Deliver the queued notifications: create them in the app and send them through the delivery backends."""
+
+    help = 'Drains the notification outbox in batches, retrying failed deliveries with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE, help='Messages claimed per batch.')
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Keep running, draining the outbox again this many seconds after it empties.'
+        )
+
+    def handle(self, *args, **options):
+        """Drain the outbox once, or forever with --interval, reporting each drain that did anything."""
+
+        while True:
+            report = drain(batch_size=options['batch_size'])
+            if options['interval'] is None or any(report):
+                self.stdout.write(
+                    f"Materialised {report.materialised} notifications, "
+                    f"delivered {report.delivered} messages, {report.failed} failed."
+                )
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,165 @@
+"""Batch matching of pending new booking requests to tutors, balancing the tutors' weekly load."""
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Case, Sum, When
+from django.utils import timezone
+from .models import Booking, NewBookingRequest, Tutor
+
+# Teaching time a tutor can take on per week, counting booked sessions and accepted requests
+MAX_WEEKLY_LOAD = timedelta(hours=20)
+# Average number of sessions a week for each request frequency
+SESSIONS_PER_WEEK = {
+    'One-time': 1,
+    'Weekly': 1,
+    'Bi-weekly': 0.5,
+    'Monthly': 0.25,
+}
+# Accepted proposals are written this many per UPDATE, keeping the CASE under SQLite's variable limit
+ACCEPT_BATCH_SIZE = 2000
+
+Proposal = namedtuple('Proposal', ['new_booking_request_id', 'tutor_id', 'weekly_load'])
+Proposal.__doc__ = """A tutor proposed for a new booking request, with the tutor's weekly load once they take it."""
+
+
+def weekly_load(duration, frequency):
+    """Return how much teaching time a week a request of this duration and frequency adds."""
+
+    return duration * SESSIONS_PER_WEEK[frequency]
+
+
+def pending_requests():
+    """Return the new booking requests still waiting for a tutor."""
+
+    return NewBookingRequest.objects.filter(request__status="Pending", assigned_tutor__isnull=True)
+
+
+def current_loads(start=None):
+    """
+    Return each tutor's weekly load as a defaultdict of timedeltas, from two aggregate queries.
+
+    The load is the time booked over the week from `start` (default now), plus the weekly
+    load of the requests already accepted for the tutor but not yet scheduled.
+    """
+
+    start = start or timezone.now()
+    loads = defaultdict(timedelta)
+    booked = (
+        Booking.objects.filter(date_time__gte=start, date_time__lt=start + timedelta(weeks=1))
+        .order_by().values_list('tutor_id').annotate(Sum('duration'))
+    )
+    for tutor_id, duration in booked:
+        loads[tutor_id] += duration
+    accepted = NewBookingRequest.objects.filter(
+        request__status="Pending", assigned_tutor__isnull=False
+    ).values_list('assigned_tutor_id', 'duration', 'frequency')
+    for tutor_id, duration, frequency in accepted:
+        loads[tutor_id] += weekly_load(duration, frequency)
+    return loads
+
+
+def propose_matches(requests=None, max_weekly_load=MAX_WEEKLY_LOAD):
+    """
+    Propose a tutor for as many of `requests` (default: every pending one) as possible.
+
+    Requests, tutors and loads are read with four queries, then matched greedily in memory.
+    Requests in the languages with the fewest qualified tutors are placed first, so common
+    languages cannot use up the tutors a rare one depends on; within a language they are
+    taken oldest first. Each goes to the qualified tutor with the lightest load, kept in a
+    heap per language, provided the request fits under `max_weekly_load`. As every tutor has
+    the same cap, if the lightest tutor has no room no other tutor of that language does.
+    Returns the Proposals in the order they were placed; nothing is saved.
+    """
+
+    requests = pending_requests() if requests is None else requests
+    rows = list(
+        requests.order_by('request__created_at', 'pk').values_list('pk', 'language', 'duration', 'frequency')
+    )
+    if not rows:
+        return []
+    languages = {language for _, language, _, _ in rows}
+
+    # languages_specialised is a comma separated list, so it is split here rather than filtered in SQL
+    tutors_by_language = defaultdict(list)
+    for tutor_id, specialisms in Tutor.objects.values_list('pk', 'languages_specialised').iterator():
+        for specialism in specialisms.split(','):
+            if specialism.strip() in languages:
+                tutors_by_language[specialism.strip()].append(tutor_id)
+
+    loads = current_loads()
+    heaps = {}
+    for language, tutor_ids in tutors_by_language.items():
+        heaps[language] = [(loads[tutor_id], tutor_id) for tutor_id in tutor_ids]
+        heapq.heapify(heaps[language])
+
+    # sort() is stable, so requests of the same language stay oldest first
+    rows.sort(key=lambda row: len(tutors_by_language[row[1]]))
+    proposals = []
+    for pk, language, duration, frequency in rows:
+        heap = heaps.get(language)
+        if not heap:
+            continue
+        # A tutor teaching several languages may have taken a request from another heap since
+        # this entry was pushed; loads only grow, so refreshing stale entries keeps the order right.
+        while heap[0][0] != loads[heap[0][1]]:
+            heapq.heapreplace(heap, (loads[heap[0][1]], heap[0][1]))
+        load, tutor_id = heap[0]
+        required = weekly_load(duration, frequency)
+        if load + required > max_weekly_load:
+            continue
+        loads[tutor_id] = load + required
+        heapq.heapreplace(heap, (loads[tutor_id], tutor_id))
+        proposals.append(Proposal(pk, tutor_id, loads[tutor_id]))
+    return proposals
+
+
+def check_proposals(proposals):
+    """
+    Split proposals, e.g. ones posted back from the matching page, into (valid, rejected) lists.
+
+    A proposal is valid when its tutor exists and teaches the request's language, checked
+    with two queries however many there are. Requests that are gone or no longer pending
+    are left to accept_proposals, which skips them.
+    """
+
+    proposals = list(proposals)
+    languages = dict(
+        NewBookingRequest.objects.filter(pk__in={proposal.new_booking_request_id for proposal in proposals})
+        .values_list('pk', 'language')
+    )
+    teaches = {
+        tutor_id: {specialism.strip() for specialism in specialisms.split(',')}
+        for tutor_id, specialisms in Tutor.objects.filter(
+            pk__in={proposal.tutor_id for proposal in proposals}
+        ).values_list('pk', 'languages_specialised')
+    }
+    valid, rejected = [], []
+    for proposal in proposals:
+        language = languages.get(proposal.new_booking_request_id)
+        if language is None or language in teaches.get(proposal.tutor_id, ()):
+            valid.append(proposal)
+        else:
+            rejected.append(proposal)
+    return valid, rejected
+
+
+def accept_proposals(proposals):
+    """
+    Assign the proposed tutors and return how many requests were assigned.
+
+    Each batch is a single UPDATE with a CASE on the request id. Requests that were
+    approved or assigned in the meantime are left alone.
+    """
+
+    proposals = list(proposals)
+    assigned = 0
+    with transaction.atomic():
+        for start in range(0, len(proposals), ACCEPT_BATCH_SIZE):
+            batch = proposals[start:start + ACCEPT_BATCH_SIZE]
+            assigned += pending_requests().filter(
+                pk__in=[proposal.new_booking_request_id for proposal in batch]
+            ).update(assigned_tutor=Case(
+                *[When(pk=proposal.new_booking_request_id, then=proposal.tutor_id) for proposal in batch]
+            ))
+    return assigned
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-17 20:32
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0016_add_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term_start', models.DateField()),
+                ('language', models.CharField(choices=[('C++', 'C++'), ('Python', 'Python'), ('Java', 'Java'), ('JavaScript', 'JavaScript'), ('R', 'R'), ('SQL', 'SQL')], max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('duration', models.DurationField(default=datetime.timedelta(0))),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('paid_bookings', models.PositiveIntegerField(default=0)),
+                ('unpaid_bookings', models.PositiveIntegerField(default=0)),
+                ('completed_bookings', models.PositiveIntegerField(default=0)),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='tutorials.tutor')),
+            ],
+            options={
+                'ordering': ['-term_start', 'tutor', 'language'],
+                'constraints': [models.UniqueConstraint(fields=('term_start', 'tutor', 'language'), name='unique_revenue_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-17 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0017_add_revenue_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newbookingrequest',
+            name='assigned_tutor',
+            field=models.ForeignKey(blank=True, help_text='Tutor accepted for the request, before its sessions are scheduled.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_requests', to='tutorials.tutor'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:01
+
+import django.db.models.deletion
+from datetime import date, timedelta
+from django.db import migrations, models
+
+# The calendar the term logic used to hard-code: (name, first month, first day, last month, last day)
+STANDARD_TERMS = [
+    ("January-Easter", 1, 1, 4, 30),
+    ("May-July", 5, 1, 7, 31),
+    ("September-Christmas", 9, 1, 12, 31),
+]
+
+
+def add_standard_terms(apps, schema_editor):
+    """Fill the term calendar with the standard terms, with the late deadline two weeks before each starts."""
+    Term = apps.get_model('tutorials', 'Term')
+    terms = []
+    for year in range(2020, 2041):
+        for name, start_month, start_day, end_month, end_day in STANDARD_TERMS:
+            start_date = date(year, start_month, start_day)
+            terms.append(Term(
+                name=f"{name} {year}",
+                start_date=start_date,
+                end_date=date(year, end_month, end_day),
+                late_deadline=start_date - timedelta(weeks=2),
+            ))
+    Term.objects.bulk_create(terms)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0018_add_assigned_tutor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('start_date', models.DateField(unique=True)),
+                ('end_date', models.DateField()),
+                ('late_deadline', models.DateField(help_text='Requests made on or after this day are late.')),
+            ],
+            options={
+                'ordering': ['start_date'],
+                'constraints': [models.CheckConstraint(condition=models.Q(('end_date__gte', models.F('start_date'))), name='term_ends_after_start')],
+            },
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='term',
+            field=models.ForeignKey(blank=True, help_text='Term the request counts towards: the one running when it was made, or the next.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='requests', to='tutorials.term'),
+        ),
+        migrations.RunPython(add_standard_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-17 23:05
+
+from django.db import migrations
+
+
+def create_missing_calendar_feeds(apps, schema_editor):
+    """Give the users who signed up before feeds were created at sign-up a feed of their own."""
+    User = apps.get_model('tutorials', 'User')
+    CalendarFeed = apps.get_model('tutorials', 'CalendarFeed')
+    users = User.objects.filter(calendar_feed__isnull=True).values_list('pk', flat=True)
+    CalendarFeed.objects.bulk_create(
+        (CalendarFeed(user_id=user_id) for user_id in users.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0022_add_notification_digests'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_calendar_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.2 on 2026-10-17 23:20
+
+import django.db.models.deletion
+from datetime import datetime, time, timedelta
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+# Totals a rollup keeps, and their value when empty
+ROLLUP_TOTALS = {
+    'revenue': 0,
+    'duration': timedelta(0),
+    'bookings': 0,
+    'paid_bookings': 0,
+    'unpaid_bookings': 0,
+    'completed_bookings': 0,
+}
+
+
+def clear_rollups(apps, schema_editor):
+    """Drop the rollups keyed on the old hard-coded terms; they are rebuilt once keyed on the term calendar."""
+    apps.get_model('tutorials', 'RevenueRollup').objects.all().delete()
+
+
+def rebuild_rollups(apps, schema_editor):
+    """Total each term's bookings per tutor and language, as the rebuild_rollups command does."""
+    Term = apps.get_model('tutorials', 'Term')
+    Booking = apps.get_model('tutorials', 'Booking')
+    RevenueRollup = apps.get_model('tutorials', 'RevenueRollup')
+    rollups = []
+    window_start = None
+    for term in Term.objects.order_by('start_date'):
+        window_end = timezone.make_aware(datetime.combine(term.end_date + timedelta(days=1), time.min))
+        bookings = Booking.objects.filter(date_time__lt=window_end)
+        if window_start is not None:
+            bookings = bookings.filter(date_time__gte=window_start)
+        rows = bookings.order_by().values('tutor', 'language').annotate(
+            revenue=Sum('price'),
+            duration=Sum('duration'),
+            bookings=Count('pk'),
+            paid_bookings=Count('pk', filter=Q(is_paid=True)),
+            unpaid_bookings=Count('pk', filter=Q(is_paid=False)),
+            completed_bookings=Count('pk', filter=Q(is_completed=True)),
+        )
+        rollups.extend(
+            RevenueRollup(
+                term=term, tutor_id=row['tutor'], language=row['language'],
+                **{field: row[field] or ROLLUP_TOTALS[field] for field in ROLLUP_TOTALS},
+            )
+            for row in rows
+        )
+        window_start = window_end
+    RevenueRollup.objects.bulk_create(rollups, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0023_create_missing_calendar_feeds'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_rollups, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='revenuerollup',
+            name='unique_revenue_rollup',
+        ),
+        migrations.AlterModelOptions(
+            name='revenuerollup',
+            options={'ordering': ['-term__start_date', 'tutor', 'language']},
+        ),
+        migrations.RemoveField(
+            model_name='revenuerollup',
+            name='term_start',
+        ),
+        migrations.AddField(
+            model_name='revenuerollup',
+            name='term',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='tutorials.term'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuerollup',
+            constraint=models.UniqueConstraint(fields=('term', 'tutor', 'language'), name='unique_revenue_rollup'),
+        ),
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,21 @@
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import BooleanField, Case, Count, DateTimeField, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from libgravatar import Gravatar
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save
+from django.core.cache import cache
+import uuid
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from datetime import date, datetime, timedelta
-from django.core.validators import MinValueValidator
+from datetime import datetime, timedelta
+from decimal import Decimal
 
 
 class User(AbstractUser):
@@ -26,6 +33,8 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=50, blank=False)
     email = models.EmailField(unique=True, blank=False)
     is_tutor = models.BooleanField('tutor status', default=False)
+    # Kept in step by Notification and NotificationQuerySet, so pages can show it without counting
+    unread_notification_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         """Model options."""
@@ -79,6 +88,83 @@ class Tutee(models.Model):
     def __str__(self):
         return self.user.username
 
+class BookingQuerySet(models.QuerySet):
+    """Queryset helpers shared by every view that lists bookings."""
+
+    def with_end_time(self):
+        """Annotate each booking with the moment it finishes."""
+        return self.annotate(
+            end_time=ExpressionWrapper(F('date_time') + F('duration'), output_field=DateTimeField())
+        )
+
+    def with_completion(self, at=None):
+        """Annotate each booking with `completed`, derived from its end time rather than stored state."""
+        at = at or timezone.now()
+        return self.with_end_time().annotate(
+            completed=ExpressionWrapper(Q(is_completed=True) | Q(end_time__lte=at), output_field=BooleanField())
+        )
+
+    def for_listing(self):
+        """Fetch the tutor and tutee users in the same query, as every booking table renders their names."""
+        return self.select_related('tutor__user', 'tutee__user').only(
+            'date_time', 'duration', 'language', 'price', 'is_paid', 'is_completed',
+            'tutor__user__username', 'tutor__user__first_name', 'tutor__user__last_name',
+            'tutee__user__username', 'tutee__user__first_name', 'tutee__user__last_name',
+        )
+
+    def _invoice_sums(self):
+        zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+        return {
+            'paid': Coalesce(Sum('price', filter=Q(is_paid=True)), zero),
+            'remaining': Coalesce(Sum('price', filter=Q(is_paid=False)), zero),
+        }
+
+    def invoice_totals(self):
+        """Return {'paid': ..., 'remaining': ...}, the summed prices of the paid and unpaid bookings, in one query."""
+        return self.order_by().aggregate(**self._invoice_sums())
+
+    def invoice_totals_by(self, field):
+        """Return the paid and remaining totals grouped by `field`, e.g. 'tutor__user'."""
+        return self.order_by().values(field).annotate(**self._invoice_sums())
+
+    def set_paid(self, is_paid):
+        """
+        Mark the bookings as paid or unpaid with a single UPDATE, returning how many changed.
+
+        Bulk updates skip the save signals, so the prices of the bookings that actually change
+        are moved between the participants' ledger totals and the rollups' paid and unpaid
+        counts here, in the same transaction.
+        """
+        with transaction.atomic():
+            changing = list(self.filter(is_paid=not is_paid).values(
+                'pk', 'tutor__user', 'tutee__user', *BOOKING_STATE_FIELDS
+            ))
+            if not changing:
+                return 0
+            updated = Booking.objects.filter(pk__in=[row['pk'] for row in changing]).update(is_paid=is_paid)
+
+            moved = defaultdict(Decimal)
+            for row in changing:
+                moved[row['tutor__user']] += row['price']
+                if row['tutee__user'] != row['tutor__user']:
+                    moved[row['tutee__user']] += row['price']
+            sign = 1 if is_paid else -1
+            Ledger.objects.adjust_users({
+                user_id: (sign * amount, -sign * amount) for user_id, amount in moved.items()
+            })
+
+            changes = rollup_changes(changing, sign=-1)
+            rollup_changes([dict(row, is_paid=is_paid) for row in changing], changes=changes)
+            RevenueRollup.objects.apply(changes)
+        return updated
+
+    def due_for_completion(self, at=None):
+        """Return bookings that have finished but are not yet flagged as completed."""
+        at = at or timezone.now()
+        # The date_time bound keeps the scan on the indexed column before the end time is computed.
+        return self.filter(is_completed=False, date_time__lte=at).with_end_time().filter(end_time__lte=at)
+
+
 class Booking(models.Model):
 
     date_time = models.DateTimeField()
@@ -104,8 +190,18 @@ class Booking(models.Model):
         default=0.00,
     )
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         ordering = ["date_time"]
+        indexes = [
+            models.Index(fields=["tutor", "date_time"], name="booking_tutor_date_idx"),
+            models.Index(fields=["tutee", "date_time"], name="booking_tutee_date_idx"),
+            # The staff dashboard and invoices page through every booking in (date_time, pk) order
+            models.Index(fields=["date_time", "id"], name="booking_date_idx"),
+            # Partial index: SQLite renders is_completed=False as NOT is_completed, which a composite index cannot serve
+            models.Index(fields=["date_time"], condition=Q(is_completed=False), name="booking_open_date_idx"),
+        ]
 
     def clean(self):
         super().clean()
@@ -124,6 +220,201 @@ class Booking(models.Model):
         # Return the formatted string
         return f"{start_date_time_str} - {end_time_str} : {self.language} with {self.tutor.user.full_name()}"
 
+# Requests made less than this long before a term starts are late
+LATE_NOTICE = timedelta(weeks=2)
+# Seconds a process keeps its copy of the term calendar before reading it again
+TERM_CACHE_SECONDS = 300
+
+
+class Term(models.Model):
+    """A teaching term, with the last day new requests for it count as on time."""
+
+    name = models.CharField(max_length=50)
+    start_date = models.DateField(unique=True)
+    end_date = models.DateField()
+    late_deadline = models.DateField(help_text="Requests made on or after this day are late.")
+
+    class Meta:
+        ordering = ["start_date"]
+        constraints = [
+            models.CheckConstraint(condition=Q(end_date__gte=F('start_date')), name='term_ends_after_start'),
+        ]
+
+    def clean(self):
+        super().clean()
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': "A term cannot end before it starts."})
+
+    def __str__(self):
+        return self.name
+
+
+class TermCalendar:
+    """
+    Process-wide copy of the term calendar, so looking up a date's term needs no query.
+
+    The terms are read once, searched with bisect and each answer is kept by date. Saving or
+    deleting a Term clears this process's copy; other processes reload theirs after
+    TERM_CACHE_SECONDS.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.loaded_at = None
+        self.terms = []
+        self.end_dates = []
+        self.by_day = {}
+
+    def _load(self):
+        self.terms = list(Term.objects.order_by('start_date'))
+        self.end_dates = [term.end_date for term in self.terms]
+        self.by_day = {}
+        self.loaded_at = time.monotonic()
+
+    def upcoming(self, day):
+        """Return the term running on `day` or, between terms, the next one to start; None after the last."""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > TERM_CACHE_SECONDS:
+            self._load()
+        if day not in self.by_day:
+            index = bisect_left(self.end_dates, day)
+            self.by_day[day] = self.terms[index] if index < len(self.terms) else None
+        return self.by_day[day]
+
+    def containing(self, day):
+        """Return the term running on `day`, or None between terms."""
+        term = self.upcoming(day)
+        return term if term is not None and term.start_date <= day else None
+
+
+term_calendar = TermCalendar()
+
+
+def _local_date(moment):
+    return timezone.localtime(moment).date() if isinstance(moment, datetime) else moment
+
+
+# Cache key and lifetime, in seconds, of the request queue summary
+REQUEST_SUMMARY_CACHE_KEY = 'tutorials:request_summary'
+REQUEST_SUMMARY_TTL = 60
+
+
+def invalidate_request_summary():
+    """Drop the cached queue summary now, and again on commit so no other process caches the old counts meanwhile."""
+    cache.delete(REQUEST_SUMMARY_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(REQUEST_SUMMARY_CACHE_KEY))
+
+
+def request_summary():
+    """Return the request queue summary (see RequestQuerySet.summary), cached for REQUEST_SUMMARY_TTL seconds."""
+    summary = cache.get(REQUEST_SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = Request.objects.summary()
+        cache.set(REQUEST_SUMMARY_CACHE_KEY, summary, REQUEST_SUMMARY_TTL)
+    return summary
+
+
+class RequestQuerySet(models.QuerySet):
+    """Queryset helpers for the request queue."""
+
+    def update(self, **kwargs):
+        """Update the rows and drop the cached summary, as bulk updates send no signals."""
+        rows = super().update(**kwargs)
+        invalidate_request_summary()
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        requests = super().bulk_create(*args, **kwargs)
+        invalidate_request_summary()
+        return requests
+
+    def summary(self):
+        """
+        Count the requests by status, type and lateness with a single GROUP BY.
+
+        Returns a dict with the total, the pending and approved counts, the late count and,
+        for each request type, its total and pending counts.
+        """
+        summary = {
+            'total': 0,
+            'pending': 0,
+            'approved': 0,
+            'late': 0,
+            'by_type': {request_type: {'total': 0, 'pending': 0} for request_type, _ in Request.REQUEST_CHOICES},
+        }
+        rows = self.order_by().values_list('status', 'request_type', 'is_late').annotate(count=Count('pk'))
+        for status, request_type, is_late, count in rows:
+            summary['total'] += count
+            if status == "Pending":
+                summary['pending'] += count
+            elif status == "Approved":
+                summary['approved'] += count
+            if is_late:
+                summary['late'] += count
+            by_type = summary['by_type'].setdefault(request_type, {'total': 0, 'pending': 0})
+            by_type['total'] += count
+            if status == "Pending":
+                by_type['pending'] += count
+        return summary
+
+    def for_listing(self):
+        """Fetch the tutee's user alongside each request for the queue table."""
+        return self.select_related('tutee__user')
+
+    def _notify(self, rows, verb, kind):
+        """Tell each request's tutee what happened to it, with a single bulk insert."""
+        from .notifications import notify_each  # The service imports this module
+        notify_each((
+            (user_id, f"Admin {verb} your {request_type} request submitted on {created_at.strftime('%Y-%m-%d %H:%M')}.")
+            for _, user_id, request_type, created_at in rows
+        ), kind=kind)
+
+    def _rows(self):
+        return list(self.order_by().values_list('pk', 'tutee__user_id', 'request_type', 'created_at'))
+
+    def approve(self):
+        """Approve the pending requests with one UPDATE, notify their tutees, and return how many were approved."""
+        with transaction.atomic():
+            rows = self.filter(status="Pending")._rows()
+            if not rows:
+                return 0
+            Request.objects.filter(pk__in=[row[0] for row in rows]).update(status="Approved")
+            self._notify(rows, "approved", 'request_approved')
+        return len(rows)
+
+    def reject(self):
+        """Delete the requests, notify their tutees, and return how many were deleted."""
+        with transaction.atomic():
+            rows = self._rows()
+            if not rows:
+                return 0
+            Request.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            self._notify(rows, "rejected and deleted", 'request_rejected')
+        return len(rows)
+
+    def counts_by_term(self):
+        """Count the requests, and the late ones, of each term in one grouped query."""
+        return (
+            self.order_by('term__start_date')
+            .values('term', 'term__name', 'term__start_date')
+            .annotate(requests=Count('pk'), late=Count('pk', filter=Q(is_late=True)))
+        )
+
+    def with_details(self):
+        """
+        Join the tutee's user and both request subtypes, so the detail page is one query.
+
+        Reverse one-to-ones are LEFT OUTER joins, so a request without one simply has it cached
+        as missing, and accessing it raises DoesNotExist without another query.
+        """
+        return self.select_related(
+            'tutee__user',
+            'new_booking_request',
+            'change_cancel_booking_request__booking__tutor__user',
+        )
+
+
 class Request(models.Model):
     REQUEST_CHOICES = [
         ("Change/Cancel", "Change/Cancel Booking"),
@@ -153,23 +444,36 @@ class Request(models.Model):
         help_text="Current status of the request.",
     )
     is_late = models.BooleanField(default=False)
+    term = models.ForeignKey(
+        Term,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="requests",
+        help_text="Term the request counts towards: the one running when it was made, or the next.",
+    )
+
+    objects = RequestQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="request_status_created_idx"),
+            models.Index(fields=["tutee", "created_at"], name="request_tutee_created_idx"),
+            # The unfiltered staff queue pages through every request, newest first
+            models.Index(fields=["created_at", "id"], name="request_created_idx"),
+        ]
 
     def get_term_start_date(self):
-        """Return the term and the start date of the term based on the booking date."""
-        # Define the start dates for each term
-        if self.created_at.month in [9, 10, 11, 12]:
-            term_start_date = date(self.created_at.year, 9, 1)  # September-Christmas term starts September 1st
-        elif self.created_at.month in [1, 2, 3, 4]:
-            term_start_date = date(self.created_at.year, 1, 1)  # January-Easter term starts January 1st
-        elif self.created_at.month in [5, 6, 7]:
-            term_start_date = date(self.created_at.year, 5, 1)  # May-July term starts May 1st
-        else:
-            term_start_date = None
-        
-        return term_start_date
+        """Return the start date of the term the request was made in, or None between terms."""
+        term = term_calendar.containing(_local_date(self.created_at))
+        return term.start_date if term is not None else None
+
+    def assign_term(self):
+        """Set the term the request counts towards and whether it was made after that term's late deadline."""
+        day = _local_date(self.created_at)
+        self.term = term_calendar.upcoming(day)
+        self.is_late = self.term is not None and day >= self.term.late_deadline
 
     def __str__(self):
         return f"{self.tutee.user.full_name()} - {self.request_type} - {self.status}"
@@ -211,6 +515,15 @@ class NewBookingRequest(models.Model):
         help_text="Optional details or comments about the request."
     )
 
+    assigned_tutor = models.ForeignKey(
+        Tutor,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="assigned_requests",
+        help_text="Tutor accepted for the request, before its sessions are scheduled.",
+    )
+
 class ChangeCancelBookingRequest(models.Model):
     request = models.OneToOneField(
         Request,
@@ -238,6 +551,14 @@ class ChangeCancelBookingRequest(models.Model):
         help_text="Optional details or comments about the request."
     )
 
+class InquiryQuerySet(models.QuerySet):
+    """Queryset helpers for the inbox."""
+
+    def for_listing(self):
+        """Fetch sender and recipient in the same query, the inbox shows one of them per inquiry."""
+        return self.select_related('sender', 'recipient')
+
+
 class Inquiry(models.Model):
     # Inquiry fields
     SENDER_CHOICES = [
@@ -256,20 +577,494 @@ class Inquiry(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = InquiryQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at'], name='inquiry_recipient_created_idx'),
+            models.Index(fields=['sender', 'created_at'], name='inquiry_sender_created_idx'),
+        ]
 
     def __str__(self):
         return f"Inquiry from {self.sender.username} to {self.recipient.username} - {self.status}"
 
+def adjust_unread_counts(changes):
+    """Add {user_id: change} to the users' unread notification counts, in a single UPDATE."""
+    changes = {user_id: change for user_id, change in changes.items() if change}
+    if not changes:
+        return 0
+    change = Case(
+        *[When(pk=user_id, then=Value(amount)) for user_id, amount in changes.items()],
+        default=Value(0), output_field=models.IntegerField(),
+    )
+    updated = User.objects.filter(pk__in=changes).update(
+        unread_notification_count=Greatest(F('unread_notification_count') + change, Value(0))
+    )
+    transaction.on_commit(_wake_notification_streams)
+    return updated
+
+
+def _wake_notification_streams():
+    from .live import broker  # The broker reads these models
+    broker.wake()
+
+
+class NotificationQuerySet(models.QuerySet):
+    """
+    Queryset helpers that keep the users' unread notification counts in step.
+
+    Marking notifications as read must go through mark_read() or notifications.mark_all_read()
+    rather than update(); any drift left by other bulk writes is repaired by the
+    reconcile_unread_counts command.
+    """
+
+    def _unread_by_user(self):
+        """Lock the unread rows and count them per user."""
+        user_ids = self.filter(is_read=False).select_for_update().values_list('user_id', flat=True)
+        counts = defaultdict(int)
+        for user_id in user_ids:
+            counts[user_id] += 1
+        return counts
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        counts = defaultdict(int)
+        for notification in objs:
+            if not notification.is_read:
+                counts[notification.user_id] += 1
+        with transaction.atomic(savepoint=False):
+            notifications = super().bulk_create(objs, *args, **kwargs)
+            adjust_unread_counts(counts)
+        for notification in notifications:
+            notification._stored_state = (notification.user_id, notification.is_read)
+        return notifications
+
+    def mark_read(self):
+        """Mark the unread notifications as read and return how many there were."""
+        with transaction.atomic(savepoint=False):
+            counts = self._unread_by_user()
+            if not counts:
+                return 0
+            marked = self.filter(is_read=False).update(is_read=True)
+            adjust_unread_counts({user_id: -count for user_id, count in counts.items()})
+        return marked
+
+    def delete(self):
+        with transaction.atomic(savepoint=False):
+            counts = self._unread_by_user()
+            deleted = super().delete()
+            adjust_unread_counts({user_id: -count for user_id, count in counts.items()})
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+# Kinds of notification that arrive in bursts; unread ones of a kind collapse into a single digest row
+NOTIFICATION_DIGESTS = {
+    'new_booking_request': "{count} new booking requests.",
+    'change_cancel_request': "{count} new change or cancellation requests.",
+    'inquiry': "{count} new inquiries.",
+    'request_approved': "{count} of your requests were approved.",
+    'request_rejected': "{count} of your requests were rejected and deleted.",
+}
+# Read notifications are deleted by the purge_notifications command after this many days
+NOTIFICATION_RETENTION_DAYS = 90
+
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     message = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # One of NOTIFICATION_DIGESTS, or blank for notifications that are never grouped
+    kind = models.CharField(max_length=30, blank=True)
+    # How many events a digest row stands for
+    count = models.PositiveIntegerField(default=1)
+
+    objects = NotificationQuerySet.as_manager()
 
     def __str__(self):
         return f'Notification for {self.user.username} - {self.message}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored user and read state, to work out what a save or delete changes."""
+        instance = super().from_db(db, field_names, values)
+        stored = dict(zip(field_names, values))
+        if 'user_id' in stored and 'is_read' in stored:
+            instance._stored_state = (stored['user_id'], stored['is_read'])
+        return instance
+
+    def _unread_changes(self, old_state, new_state):
+        """Return {user_id: change} for moving from one (user_id, is_read) state to another."""
+        changes = defaultdict(int)
+        for (user_id, is_read), sign in ((old_state, -1), (new_state, 1)):
+            if user_id is not None and not is_read:
+                changes[user_id] += sign
+        return changes
+
+    def _apply_unread_changes(self, changes):
+        adjust_unread_counts(changes)
+        # Keep a user loaded alongside the notification in step too
+        user = self.user if Notification.user.is_cached(self) else None
+        if user is not None and changes.get(user.pk):
+            user.unread_notification_count = max(0, user.unread_notification_count + changes[user.pk])
+
+    def _load_stored_state(self):
+        if self._state.adding:
+            return (None, True)
+        if not hasattr(self, '_stored_state'):
+            self._stored_state = Notification.objects.filter(pk=self.pk).values_list('user_id', 'is_read').first() or (None, True)
+        return self._stored_state
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'user', 'user_id', 'is_read'} & set(update_fields):
+            return super().save(*args, **kwargs)
+        old_state = self._load_stored_state()
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            new_state = (self.user_id, self.is_read)
+            self._apply_unread_changes(self._unread_changes(old_state, new_state))
+        self._stored_state = new_state
+
+    def delete(self, *args, **kwargs):
+        old_state = self._load_stored_state()
+        with transaction.atomic(savepoint=False):
+            deleted = super().delete(*args, **kwargs)
+            self._apply_unread_changes(self._unread_changes(old_state, (None, True)))
+        return deleted
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+            # The inbox tab pages through all of a user's notifications, newest first
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ]
+
+
+# A claimed batch is hidden from other workers for this long, then retried if it was never finished
+OUTBOX_LEASE = timedelta(minutes=5)
+# Delivery is retried after OUTBOX_RETRY_DELAY, doubling per attempt up to OUTBOX_MAX_RETRY_DELAY
+OUTBOX_RETRY_DELAY = timedelta(minutes=1)
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+OUTBOX_MAX_ATTEMPTS = 8
+
+
+class OutboxMessageQuerySet(models.QuerySet):
+    """Queryset helpers for draining the notification outbox."""
+
+    def due(self, now=None):
+        """Return the messages waiting to be delivered whose next attempt is due."""
+        return self.filter(
+            delivered_at__isnull=True, attempts__lt=OUTBOX_MAX_ATTEMPTS, next_attempt_at__lte=now or timezone.now()
+        )
+
+
+class OutboxMessage(models.Model):
+    """
+    A notification queued in the transaction of the event that caused it.
+
+    The run_outbox command turns each message into a Notification exactly once, marked by
+    materialised_at, then hands it to the delivery backends until one attempt succeeds.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outbox_messages')
+    message = models.CharField(max_length=255)
+    kind = models.CharField(max_length=30, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    materialised_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxMessageQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+        indexes = [
+            models.Index(fields=['delivered_at', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'Outbox message for user {self.user_id} - {self.message}'
+
+
+class CalendarFeedQuerySet(models.QuerySet):
+    """Queryset helpers for keeping the calendar feeds' validators current."""
+
+    def touch_participants(self, tutor_ids, tutee_ids):
+        """Mark the feeds of the given tutors and tutees as changed, in a single UPDATE."""
+        return self.filter(
+            Q(user__tutor_user__in=tutor_ids) | Q(user__tutee_user__in=tutee_ids)
+        ).update(updated_at=timezone.now())
+
+
+class CalendarFeed(models.Model):
+    """The secret address of a user's iCalendar feed and when its bookings last changed."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # Bumped whenever one of the user's bookings changes, so feed polls can be answered without reading them
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = CalendarFeedQuerySet.as_manager()
+
+    def __str__(self):
+        return f'Calendar feed for {self.user.username}'
+
+
+class LedgerQuerySet(models.QuerySet):
+    """Queryset helpers for the per-user invoice ledgers."""
+
+    def for_user(self, user):
+        """Return the user's ledger, computing it from their bookings the first time it is needed."""
+        ledger = self.filter(user=user).first()
+        if ledger is None:
+            totals = Booking.objects.filter(Q(tutor__user=user) | Q(tutee__user=user)).invoice_totals()
+            ledger, _ = self.get_or_create(user=user, defaults=totals)
+        return ledger
+
+    def for_participants(self, tutor_id, tutee_id):
+        """Return the ledgers of a booking's tutor and tutee, skipping either when its id is unknown."""
+        condition = Q(pk__in=[])
+        if tutor_id is not None:
+            condition |= Q(user__tutor_user=tutor_id)
+        if tutee_id is not None:
+            condition |= Q(user__tutee_user=tutee_id)
+        return self.filter(condition)
+
+    def adjust(self, tutor_id, tutee_id, paid=0, remaining=0):
+        """Add to the totals of a booking's tutor and tutee, in a single UPDATE. Missing ledgers are left to for_user."""
+        if not paid and not remaining:
+            return 0
+        return self.for_participants(tutor_id, tutee_id).update(
+            paid=F('paid') + paid, remaining=F('remaining') + remaining
+        )
+
+    def adjust_users(self, amounts):
+        """Add {user_id: (paid, remaining)} to many users' totals with one UPDATE."""
+        if not amounts:
+            return 0
+        amount_field = DecimalField(max_digits=12, decimal_places=2)
+
+        def change(index):
+            return Case(
+                *[When(user_id=user_id, then=Value(amount[index])) for user_id, amount in amounts.items()],
+                default=Value(Decimal('0')), output_field=amount_field,
+            )
+
+        return self.filter(user_id__in=amounts).update(paid=F('paid') + change(0), remaining=F('remaining') + change(1))
+
+
+class Ledger(models.Model):
+    """Running invoice totals of a user's bookings (taught or attended), so invoice headers are a single read."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='ledger')
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    remaining = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = LedgerQuerySet.as_manager()
+
+    def __str__(self):
+        return f'Ledger for {self.user.username}: {self.paid} paid, {self.remaining} remaining'
+
+
+# Totals a RevenueRollup keeps, and their value when empty
+ROLLUP_TOTALS = {
+    'revenue': Decimal('0'),
+    'duration': timedelta(0),
+    'bookings': 0,
+    'paid_bookings': 0,
+    'unpaid_bookings': 0,
+    'completed_bookings': 0,
+}
+
+
+def rollup_changes(states, sign=1, changes=None):
+    """
+    Add what bookings contribute to their (term id, tutor id, language) rollups into `changes`.
+
+    `states` are dicts with the booking's date_time, tutor_id, language, price, duration,
+    is_paid and is_completed; pass sign=-1 to take their contribution out. A booking counts
+    towards the term running on its day or, between terms, the next one; bookings after the
+    last term of the calendar are left out.
+    """
+    changes = {} if changes is None else changes
+    for state in states:
+        term = term_calendar.upcoming(_local_date(state['date_time']))
+        if term is None:
+            continue
+        key = (term.pk, state['tutor_id'], state['language'])
+        totals = changes.setdefault(key, dict(ROLLUP_TOTALS))
+        totals['revenue'] += sign * Decimal(str(state['price'] or 0))
+        totals['duration'] += sign * state['duration']
+        totals['bookings'] += sign
+        totals['paid_bookings'] += sign * bool(state['is_paid'])
+        totals['unpaid_bookings'] += sign * (not state['is_paid'])
+        totals['completed_bookings'] += sign * bool(state['is_completed'])
+    return changes
+
+
+class RevenueRollupQuerySet(models.QuerySet):
+    """Queryset helpers for maintaining the revenue rollups."""
+
+    def apply(self, changes):
+        """Add {(term id, tutor id, language): totals} to the rollups with a read and bulk writes, however many keys."""
+        changes = {key: totals for key, totals in changes.items() if any(totals.values())}
+        if not changes:
+            return
+        # Callers usually hold a transaction already; joining it avoids a savepoint per call
+        with transaction.atomic(savepoint=False):
+            existing = {
+                (rollup.term_id, rollup.tutor_id, rollup.language): rollup
+                for rollup in self.select_for_update().order_by().filter(
+                    term_id__in={key[0] for key in changes},
+                    tutor_id__in={key[1] for key in changes},
+                    language__in={key[2] for key in changes},
+                )
+            }
+            created, updated, emptied = [], [], []
+            for key, totals in changes.items():
+                rollup = existing.get(key)
+                if rollup is None:
+                    rollup = RevenueRollup(term_id=key[0], tutor_id=key[1], language=key[2])
+                    created.append(rollup)
+                for field, amount in totals.items():
+                    setattr(rollup, field, getattr(rollup, field) + amount)
+                if rollup.pk is not None:
+                    (emptied if rollup.bookings <= 0 else updated).append(rollup)
+            self.bulk_update(updated, list(ROLLUP_TOTALS))
+            self.bulk_create(created)
+            if emptied:
+                self.filter(pk__in=[rollup.pk for rollup in emptied]).delete()
+
+
+class RevenueRollup(models.Model):
+    """Revenue, teaching time and booking counts of a tutor in one language over one term, for the reports."""
+
+    term = models.ForeignKey(Term, on_delete=models.CASCADE, related_name='revenue_rollups')
+    tutor = models.ForeignKey(Tutor, on_delete=models.CASCADE, related_name='revenue_rollups')
+    language = models.CharField(max_length=20, choices=settings.LANGUAGE_CHOICES)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    duration = models.DurationField(default=timedelta(0))
+    bookings = models.PositiveIntegerField(default=0)
+    paid_bookings = models.PositiveIntegerField(default=0)
+    unpaid_bookings = models.PositiveIntegerField(default=0)
+    completed_bookings = models.PositiveIntegerField(default=0)
+
+    objects = RevenueRollupQuerySet.as_manager()
+
     class Meta:
-        ordering = ['-created_at'] 
\ No newline at end of file
+        ordering = ['-term__start_date', 'tutor', 'language']
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'tutor', 'language'], name='unique_revenue_rollup'),
+        ]
+        indexes = [
+            # The report pages through a term's rollups by revenue
+            models.Index(fields=['term', 'revenue', 'id'], name='rollup_term_revenue_idx'),
+        ]
+
+    @property
+    def hours(self):
+        return self.duration.total_seconds() / 3600
+
+    def __str__(self):
+        return f"{self.term} - {self.tutor} - {self.language}: {self.revenue}"
+
+
+def _ledger_amounts(price, is_paid):
+    """Split a booking's price into its (paid, remaining) contribution."""
+    price = Decimal(str(price or 0))
+    return (price, Decimal('0')) if is_paid else (Decimal('0'), price)
+
+
+# Fields a booking's stored state is remembered by, to work out what a save or delete changes
+BOOKING_STATE_FIELDS = ('tutor_id', 'tutee_id', 'date_time', 'duration', 'language', 'price', 'is_paid', 'is_completed')
+
+
+def booking_state(booking):
+    """Return the booking's current values of BOOKING_STATE_FIELDS."""
+    return {field: getattr(booking, field) for field in BOOKING_STATE_FIELDS}
+
+
+@receiver(post_save, sender=Request)
+@receiver(post_delete, sender=Request)
+def clear_request_summary(sender, **kwargs):
+    invalidate_request_summary()
+
+
+@receiver(post_save, sender=Term)
+@receiver(post_delete, sender=Term)
+def clear_term_calendar(sender, **kwargs):
+    term_calendar.clear()
+
+
+@receiver(post_save, sender=User)
+def create_calendar_feed(sender, instance, created, raw=False, **kwargs):
+    """Give every new user a calendar feed, so pages only ever read it."""
+    if created and not raw:
+        CalendarFeed.objects.create(user=instance)
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_state(sender, instance, **kwargs):
+    """Keep the state a booking was loaded with; deferred fields are left out and read on save if needed."""
+    # Read __dict__ so deferred fields are not loaded, which would build another instance and recurse
+    instance._loaded_state = {field: instance.__dict__[field] for field in BOOKING_STATE_FIELDS if field in instance.__dict__}
+
+
+@receiver(pre_save, sender=Booking)
+@receiver(pre_delete, sender=Booking)
+def complete_booking_state(sender, instance, **kwargs):
+    """Read the stored values of fields that were deferred when the booking was loaded."""
+    missing = [field for field in BOOKING_STATE_FIELDS if field not in instance._loaded_state]
+    if instance._state.adding or not missing:
+        return
+    stored = Booking.objects.filter(pk=instance.pk).values(*missing).first()
+    if stored is not None:
+        instance._loaded_state.update(stored)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def touch_booking_calendar_feeds(sender, instance, **kwargs):
+    """Invalidate the calendar feeds of everyone taking part in a changed booking."""
+    tutor_ids = {instance.tutor_id, instance._loaded_state.get('tutor_id')} - {None}
+    tutee_ids = {instance.tutee_id, instance._loaded_state.get('tutee_id')} - {None}
+    CalendarFeed.objects.touch_participants(tutor_ids, tutee_ids)
+
+
+@receiver(post_save, sender=Booking)
+def update_totals_on_save(sender, instance, created, **kwargs):
+    """Move the booking's contribution from its old state to its new one in the ledgers and rollups."""
+    old, new = instance._loaded_state, booking_state(instance)
+    new_amounts = _ledger_amounts(new['price'], new['is_paid'])
+    changes = rollup_changes([new])
+    if created:
+        Ledger.objects.adjust(new['tutor_id'], new['tutee_id'], *new_amounts)
+    else:
+        old_amounts = _ledger_amounts(old['price'], old['is_paid'])
+        if (old['tutor_id'], old['tutee_id']) == (new['tutor_id'], new['tutee_id']):
+            Ledger.objects.adjust(
+                new['tutor_id'], new['tutee_id'], new_amounts[0] - old_amounts[0], new_amounts[1] - old_amounts[1]
+            )
+        else:
+            Ledger.objects.adjust(old['tutor_id'], old['tutee_id'], -old_amounts[0], -old_amounts[1])
+            Ledger.objects.adjust(new['tutor_id'], new['tutee_id'], *new_amounts)
+        rollup_changes([old], sign=-1, changes=changes)
+    RevenueRollup.objects.apply(changes)
+    instance._loaded_state = new
+
+
+@receiver(post_delete, sender=Booking)
+def update_totals_on_delete(sender, instance, **kwargs):
+    """Take a deleted booking's stored contribution out of the ledgers and rollups."""
+    old = instance._loaded_state
+    paid, remaining = _ledger_amounts(old['price'], old['is_paid'])
+    Ledger.objects.adjust(old['tutor_id'], old['tutee_id'], -paid, -remaining)
+    RevenueRollup.objects.apply(rollup_changes([old], sign=-1))
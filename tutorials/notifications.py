@@ -0,0 +1,42 @@
+"""Notification service: every event fans out to its recipients with a single insert into the outbox."""
+from django.db import transaction
+from .models import Notification, OutboxMessage, User, adjust_unread_counts
+
+
+def notify_each(notifications, kind=''):
+    """
+    Queue one notification per (user, message) pair with a single bulk insert and return them.
+
+    `user` may be a User or a user id. Call this inside the transaction of the write that
+    triggered the event, so the messages are queued with it or not at all. The run_outbox
+    command then creates the notifications and delivers them, away from the request.
+    Notifications of a `kind` listed in NOTIFICATION_DIGESTS are grouped into digests there.
+    """
+
+    return OutboxMessage.objects.bulk_create([
+        OutboxMessage(user_id=getattr(user, 'pk', user), message=message, kind=kind)
+        for user, message in notifications
+    ])
+
+
+def notify(users, message, kind=''):
+    """Send the same message to each of `users` (users or user ids)."""
+
+    return notify_each(((user, message) for user in users), kind=kind)
+
+
+def notify_staff(message, kind=''):
+    """Send a message to every admin: one query for their ids, one bulk insert."""
+
+    return notify(User.objects.filter(is_staff=True).values_list('pk', flat=True), message, kind=kind)
+
+
+def mark_all_read(user):
+    """Mark all of the user's notifications as read and return how many were unread."""
+
+    # Every row the UPDATE changes was counted as unread, so one user needs no per-user count first
+    with transaction.atomic(savepoint=False):
+        marked = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+        adjust_unread_counts({user.pk: -marked})
+    user.unread_notification_count = max(0, user.unread_notification_count - marked)
+    return marked
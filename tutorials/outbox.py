@@ -0,0 +1,177 @@
+"""Drain the notification outbox: materialise each message once, then deliver it with retries."""
+from collections import defaultdict, namedtuple
+from django.db import transaction
+from django.db.models import Case, CharField, DateTimeField, F, Value, When
+from django.utils import timezone
+from .delivery import load_backends
+from .models import (
+    NOTIFICATION_DIGESTS, Notification, OutboxMessage, OUTBOX_LEASE, OUTBOX_MAX_RETRY_DELAY, OUTBOX_RETRY_DELAY
+)
+
+# Messages claimed, materialised and delivered together
+OUTBOX_BATCH_SIZE = 500
+
+DrainReport = namedtuple('DrainReport', ['materialised', 'delivered', 'failed'])
+DrainReport.__doc__ = """How many messages a drain turned into notifications, delivered, and failed to deliver."""
+
+
+def retry_delay(attempts):
+    """Return how long to wait before the next attempt after `attempts` failed ones."""
+    return min(OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0), OUTBOX_MAX_RETRY_DELAY)
+
+
+def digest_message(kind, count):
+    """Return the text of a digest standing for `count` notifications of `kind`."""
+    return NOTIFICATION_DIGESTS[kind].format(count=count)
+
+
+def materialise(messages, now=None):
+    """
+    Create the notifications of freshly claimed messages, grouping the kinds that have digests.
+
+    A user's messages of a digest kind fold into their newest unread notification of that kind,
+    which takes the new count and moves back to the top. Without one, a burst of them becomes a
+    single digest row such as "12 new booking requests.", so each user keeps at most one unread
+    row per kind. Other messages become one notification each. Runs a bulk insert plus, when
+    digest kinds are present, one read and at most one UPDATE.
+    """
+
+    now = now or timezone.now()
+    groups = defaultdict(list)
+    notifications = []
+    for message in messages:
+        if message.kind in NOTIFICATION_DIGESTS:
+            groups[(message.user_id, message.kind)].append(message)
+        else:
+            notifications.append(Notification(user_id=message.user_id, message=message.message, kind=message.kind))
+
+    unread = {}
+    if groups:
+        rows = Notification.objects.filter(
+            is_read=False, kind__in={kind for _, kind in groups}, user_id__in={user_id for user_id, _ in groups}
+        ).select_for_update().order_by('created_at', 'pk').values_list('pk', 'user_id', 'kind', 'count')
+        for pk, user_id, kind, count in rows:
+            unread[(user_id, kind)] = (pk, count)  # The newest is seen last and wins
+
+    folded = {}
+    for (user_id, kind), group in groups.items():
+        if (user_id, kind) in unread:
+            pk, count = unread[(user_id, kind)]
+            folded[pk] = (kind, count + len(group))
+        elif len(group) == 1:
+            notifications.append(Notification(user_id=user_id, message=group[0].message, kind=kind))
+        else:
+            notifications.append(Notification(
+                user_id=user_id, message=digest_message(kind, len(group)), kind=kind, count=len(group)
+            ))
+
+    if folded:
+        Notification.objects.filter(pk__in=folded).update(
+            count=Case(*[When(pk=pk, then=Value(count)) for pk, (_, count) in folded.items()]),
+            message=Case(
+                *[When(pk=pk, then=Value(digest_message(kind, count))) for pk, (kind, count) in folded.items()],
+                output_field=CharField(),
+            ),
+            created_at=now,
+        )
+    return Notification.objects.bulk_create(notifications)
+
+
+def claim_batch(batch_size=OUTBOX_BATCH_SIZE, now=None):
+    """
+    Claim a batch of due messages and create the notifications of those not yet materialised.
+
+    In one transaction the rows are locked, leased for OUTBOX_LEASE so that other workers pass
+    them over, and materialised. A worker that dies mid-batch leaves the
+    lease to expire, and the retry skips the notifications already created.
+    """
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.due(now).select_related('user').select_for_update(skip_locked=True, of=('self',))
+            [:batch_size]
+        )
+        if not batch:
+            return batch
+        materialise([message for message in batch if message.materialised_at is None], now)
+        OutboxMessage.objects.filter(pk__in=[message.pk for message in batch]).update(
+            next_attempt_at=now + OUTBOX_LEASE,
+            materialised_at=Case(When(materialised_at__isnull=True, then=Value(now)), default=F('materialised_at')),
+        )
+    return batch
+
+
+def record_results(delivered, failures, now=None):
+    """
+    Write the outcome of a batch with at most two UPDATEs.
+
+    `delivered` is a list of message ids, `failures` maps message ids to (attempts so far, error).
+    Failed messages are pushed back with exponential backoff.
+    """
+
+    now = now or timezone.now()
+    if delivered:
+        OutboxMessage.objects.filter(pk__in=delivered).update(delivered_at=now, last_error='')
+    if failures:
+        OutboxMessage.objects.filter(pk__in=failures).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=Case(
+                *[When(pk=pk, then=Value(now + retry_delay(attempts + 1))) for pk, (attempts, _) in failures.items()],
+                output_field=DateTimeField(),
+            ),
+            last_error=Case(
+                *[When(pk=pk, then=Value(error[:1000])) for pk, (_, error) in failures.items()],
+                output_field=CharField(),
+            ),
+        )
+
+
+def _describe(error):
+    return f"{type(error).__name__}: {error}"
+
+
+def deliver_batch(batch, backends):
+    """Hand each message of a claimed batch to every backend, and return (delivered ids, failures)."""
+
+    delivered, failures = [], {}
+    opened = []
+    try:
+        for backend in backends:
+            backend.open()
+            opened.append(backend)
+    except Exception as error:
+        # Nothing can be sent, e.g. the mail server is down: the whole batch backs off
+        failures = {message.pk: (message.attempts, _describe(error)) for message in batch}
+    else:
+        for message in batch:
+            try:
+                for backend in backends:
+                    backend.send(message)
+            except Exception as error:
+                failures[message.pk] = (message.attempts, _describe(error))
+            else:
+                delivered.append(message.pk)
+    finally:
+        for backend in opened:
+            backend.close()
+    return delivered, failures
+
+
+def drain(batch_size=OUTBOX_BATCH_SIZE, backends=None):
+    """Deliver every due message, batch after batch, and return a DrainReport."""
+
+    backends = load_backends() if backends is None else backends
+    materialised = delivered_count = failed = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+        materialised += sum(1 for message in batch if message.materialised_at is None)
+        delivered, failures = deliver_batch(batch, backends)
+        record_results(delivered, failures)
+        delivered_count += len(delivered)
+        failed += len(failures)
+        if len(batch) < batch_size:
+            break
+    return DrainReport(materialised, delivered_count, failed)
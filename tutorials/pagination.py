@@ -0,0 +1,168 @@
+"""Keyset (seek) pagination for the list views of the tutorials app."""
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder that keeps full microsecond precision so seeks compare exactly."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor token cannot be decoded for the paginated ordering."""
+
+
+class KeysetPage:
+    """A single page of results produced by a KeysetPaginator."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __contains__(self, item):
+        return item in self.object_list
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row seen instead of using OFFSET.
+
+    `ordering` lists the fields the page is sorted on, e.g. ('date_time',) or
+    ('-created_at',). The primary key is appended as a tie breaker so cursors
+    stay stable when new rows are inserted. Pass count=False to skip the
+    COUNT(*) query on large tables.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count = count
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        self.ordering = ordering
+        self.fields = [self._resolve_field(name.lstrip('-')) for name in ordering]
+
+    def get_page(self, cursor=None):
+        """Return the page identified by `cursor`, falling back to the first page if it is invalid."""
+
+        try:
+            direction, values = self._decode(cursor) if cursor else ('next', None)
+        except InvalidCursor:
+            direction, values = 'next', None
+
+        backwards = direction == 'previous'
+        queryset = self.queryset.annotate(**{
+            f'cursor_key_{index}': F(name.lstrip('-')) for index, name in enumerate(self.ordering)
+        })
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, backwards))
+        ordering = [self._flip(name) for name in self.ordering] if backwards else self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        # Arriving from a later page guarantees a next one, and arriving from an earlier one a previous one.
+        if backwards:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self._encode('next', rows[-1])
+        if rows and has_previous:
+            previous_cursor = self._encode('previous', rows[0])
+
+        total = self.queryset.count() if self.count else None
+        return KeysetPage(rows, next_cursor, previous_cursor, total)
+
+    def _seek_filter(self, values, backwards):
+        """
+        Build the row-value comparison `(a, b, pk) > (x, y, z)` as a chain of ORs.
+
+        The chain is ANDed with the redundant bound `a >= x`, which lets the database walk an
+        index on the ordering from the cursor instead of collecting the matches of each OR
+        branch and sorting them.
+        """
+
+        conditions = []
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition = Q(**{f'cursor_key_{index}__{lookup}': values[index]})
+            for previous in range(index):
+                condition &= Q(**{f'cursor_key_{previous}': values[previous]})
+            conditions.append(condition)
+        descending = self.ordering[0].startswith('-')
+        bound = Q(**{f"cursor_key_0__{'lte' if descending != backwards else 'gte'}": values[0]})
+        return bound & reduce(or_, conditions)
+
+    def _encode(self, direction, row):
+        values = [getattr(row, f'cursor_key_{index}') for index in range(len(self.ordering))]
+        payload = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = payload['d'], payload['v']
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'previous') or not isinstance(raw_values, list) or len(raw_values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        # NULL cannot be sought past, and values of the wrong type must not reach the query
+        if any(value is None for value in raw_values):
+            raise InvalidCursor(cursor)
+        try:
+            values = [field.to_python(value) for field, value in zip(self.fields, raw_values)]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _resolve_field(self, path):
+        """Follow a `relation__field` path from the queryset model to the ordered field."""
+
+        model = self.queryset.model
+        field = None
+        for part in path.split('__'):
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+            if field.is_relation:
+                model = field.related_model
+        return field
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
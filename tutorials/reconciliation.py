@@ -0,0 +1,151 @@
+"""Match bank statement lines to unpaid bookings and mark the confirmed ones as paid."""
+import csv
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from .models import Booking
+
+# A payment may arrive this many days before or after the session it pays for
+MATCH_WINDOW_DAYS = 14
+# Date formats accepted in the statement's date column
+STATEMENT_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+STATEMENT_COLUMNS = ('date', 'amount', 'description')
+# Unmatched lines are counted, only the first few are kept for the report
+UNMATCHED_SAMPLE_SIZE = 50
+# Matched bookings are marked as paid this many per UPDATE, keeping the IN list under SQLite's variable limit
+APPLY_BATCH_SIZE = 5000
+
+
+def _words(text):
+    """Lowercase `text` and reduce it to space separated words, padded so whole words can be searched."""
+
+    return f" {' '.join(re.findall(r'[a-z0-9]+', text.lower()))} "
+
+
+class BookingIndex:
+    """
+    Unpaid bookings indexed by price, then by date, built from a single query.
+
+    Each price maps to a date-sorted list, so the bookings within the match window of a
+    statement line are found with bisect rather than with a query per line.
+    """
+
+    def __init__(self, bookings=None):
+        bookings = Booking.objects.filter(is_paid=False) if bookings is None else bookings
+        rows = bookings.order_by('date_time', 'pk').values_list(
+            'pk', 'price', 'date_time',
+            'tutee__user__first_name', 'tutee__user__last_name', 'tutee__user__username',
+        )
+        self.by_price = defaultdict(lambda: ([], []))
+        for pk, price, date_time, first_name, last_name, username in rows.iterator(chunk_size=5000):
+            dates, entries = self.by_price[price]
+            dates.append(timezone.localtime(date_time).date())
+            entries.append((pk, _words(f'{first_name} {last_name}'), _words(username)))
+
+    def candidates(self, amount, day, description, window_days=MATCH_WINDOW_DAYS):
+        """Return the ids of the unpaid bookings priced `amount`, near `day`, whose tutee is named in `description`."""
+
+        if amount not in self.by_price:
+            return []
+        dates, entries = self.by_price[amount]
+        window = timedelta(days=window_days)
+        words = _words(description)
+        return [
+            pk
+            for pk, name, username in entries[bisect_left(dates, day - window):bisect_right(dates, day + window)]
+            if name in words or username in words
+        ]
+
+
+class ReconciliationReport:
+    """What reconciling a statement found: matched, ambiguous, unmatched and invalid lines."""
+
+    def __init__(self):
+        self.matched = []  # (line number, booking id)
+        self.ambiguous = []  # (line number, [booking ids])
+        self.unmatched = []  # line numbers, the first UNMATCHED_SAMPLE_SIZE only
+        self.unmatched_count = 0
+        self.invalid = []  # (line number, reason)
+        self.updated = 0
+
+    @property
+    def booking_ids(self):
+        return [booking_id for _, booking_id in self.matched]
+
+
+def _parse_date(value):
+    for date_format in STATEMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+def _parse_amount(value):
+    try:
+        return Decimal(re.sub(r'[^0-9.\-]', '', value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"unrecognised amount {value!r}")
+
+
+def reconcile(lines, apply=True, window_days=MATCH_WINDOW_DAYS):
+    """
+    Match the lines of a bank statement CSV to unpaid bookings.
+
+    `lines` is any iterable of text lines with date, amount and description columns, read
+    lazily so statements of any length stream through. A line matches when exactly one
+    booking that is not yet claimed has its amount, a date within `window_days` and its
+    tutee's full name or username in the description. Lines with several candidates are
+    reported as ambiguous and left alone. With apply=True the matched bookings are marked
+    as paid with bulk updates in one transaction. A malformed file raises csv.Error before
+    anything is marked.
+    """
+
+    report = ReconciliationReport()
+    reader = csv.DictReader(lines)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    missing = [column for column in STATEMENT_COLUMNS if column not in columns]
+    if missing:
+        report.invalid.append((1, f"missing columns: {', '.join(missing)}"))
+        return report
+
+    index = BookingIndex()
+    claimed = set()
+    for line in reader:
+        line_number = reader.line_num
+        try:
+            day = _parse_date(line[columns['date']] or '')
+            amount = _parse_amount(line[columns['amount']] or '')
+        except ValueError as error:
+            report.invalid.append((line_number, str(error)))
+            continue
+        if amount <= 0:
+            continue  # Outgoing payments are not invoices
+
+        candidates = [
+            booking_id
+            for booking_id in index.candidates(amount, day, line[columns['description']] or '', window_days)
+            if booking_id not in claimed
+        ]
+        if len(candidates) == 1:
+            claimed.add(candidates[0])
+            report.matched.append((line_number, candidates[0]))
+        elif candidates:
+            report.ambiguous.append((line_number, candidates))
+        else:
+            report.unmatched_count += 1
+            if len(report.unmatched) < UNMATCHED_SAMPLE_SIZE:
+                report.unmatched.append(line_number)
+
+    if apply and report.matched:
+        booking_ids = report.booking_ids
+        with transaction.atomic():
+            for start in range(0, len(booking_ids), APPLY_BATCH_SIZE):
+                batch = booking_ids[start:start + APPLY_BATCH_SIZE]
+                report.updated += Booking.objects.filter(pk__in=batch).set_paid(True)
+    return report
@@ -0,0 +1,355 @@
+"""Booking conflict detection, free-slot search and recurring series shared by the booking forms and any scheduling code."""
+import calendar
+import heapq
+from bisect import bisect_left
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from itertools import islice
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import Booking, CalendarFeed, Ledger, Request, RevenueRollup, Tutor, booking_state, rollup_changes, term_calendar
+from .notifications import notify_each
+
+# Longest booking that can exist, used to bound the date_time range so the tutor/tutee indexes apply.
+MAX_BOOKING_DURATION = max(duration for duration, _ in settings.DURATION_CHOICES)
+
+# Bookings are offered on a half-hour grid within these hours, matching the booking form's step.
+WORKING_DAY_START = time(9, 0)
+WORKING_DAY_END = time(18, 0)
+SLOT_STEP = timedelta(minutes=30)
+# The free slot search reads bookings this many days at a time until it has enough candidates.
+SEARCH_CHUNK_DAYS = 7
+
+Slot = namedtuple('Slot', ['date_time', 'duration', 'tutor', 'tutee'])
+Slot.__doc__ = """A candidate booking: when it starts, how long it lasts and who takes part (tutor or tutee may be None)."""
+
+
+def _participants_filter(tutors, tutees):
+    """Match bookings involving any of the given tutors or tutees."""
+
+    condition = Q(pk__in=[])
+    if tutors:
+        condition |= Q(tutor__in=tutors)
+    if tutees:
+        condition |= Q(tutee__in=tutees)
+    return condition
+
+
+def _overlapping(start, end):
+    """Return bookings whose [date_time, date_time + duration) intersects [start, end)."""
+
+    return (
+        Booking.objects
+        # Indexed range: anything starting before the earliest possible overlap cannot reach `start`.
+        .filter(date_time__lt=end, date_time__gt=start - MAX_BOOKING_DURATION)
+        .with_end_time()
+        .filter(end_time__gt=start)
+    )
+
+
+def find_conflicts(slot, exclude=None):
+    """
+    Return a queryset of the bookings clashing with `slot` for its tutor or its tutee.
+
+    `exclude` is the primary key of a booking to ignore, e.g. the one being edited.
+    """
+
+    tutors = [slot.tutor] if slot.tutor else []
+    tutees = [slot.tutee] if slot.tutee else []
+    conflicts = (
+        _overlapping(slot.date_time, slot.date_time + slot.duration)
+        .filter(_participants_filter(tutors, tutees))
+        .select_related('tutor__user', 'tutee__user')
+        # The tutor's and the tutee's clashes come from two indexes; sorting them would need a temporary B-tree
+        .order_by()
+    )
+    if exclude is not None:
+        conflicts = conflicts.exclude(pk=exclude)
+    return conflicts
+
+
+def find_conflicts_bulk(slots, exclude=None):
+    """
+    Check many candidate slots with a single query.
+
+    Returns a list with, for each slot in order, the list of bookings it clashes with.
+    Slots are only checked against existing bookings, not against each other.
+    """
+
+    slots = list(slots)
+    if not slots:
+        return []
+
+    window_start = min(slot.date_time for slot in slots)
+    window_end = max(slot.date_time + slot.duration for slot in slots)
+    tutors = {slot.tutor.pk for slot in slots if slot.tutor}
+    tutees = {slot.tutee.pk for slot in slots if slot.tutee}
+
+    bookings = (
+        _overlapping(window_start, window_end)
+        .filter(_participants_filter(tutors, tutees))
+        .select_related('tutor__user', 'tutee__user')
+        .order_by('date_time', 'pk')
+    )
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude)
+
+    # Bookings are sorted by start, so each participant's schedule can be searched with bisect.
+    by_tutor = defaultdict(list)
+    by_tutee = defaultdict(list)
+    for booking in bookings:
+        by_tutor[booking.tutor_id].append(booking)
+        by_tutee[booking.tutee_id].append(booking)
+    starts_by_tutor = {key: [booking.date_time for booking in value] for key, value in by_tutor.items()}
+    starts_by_tutee = {key: [booking.date_time for booking in value] for key, value in by_tutee.items()}
+
+    results = []
+    for slot in slots:
+        end = slot.date_time + slot.duration
+        conflicts = {}
+        schedules = []
+        if slot.tutor:
+            schedules.append((by_tutor[slot.tutor.pk], starts_by_tutor.get(slot.tutor.pk, [])))
+        if slot.tutee:
+            schedules.append((by_tutee[slot.tutee.pk], starts_by_tutee.get(slot.tutee.pk, [])))
+        for schedule, starts in schedules:
+            index = bisect_left(starts, slot.date_time - MAX_BOOKING_DURATION)
+            while index < len(schedule) and starts[index] < end:
+                booking = schedule[index]
+                if booking.end_time > slot.date_time:
+                    conflicts[booking.pk] = booking
+                index += 1
+        results.append(sorted(conflicts.values(), key=lambda booking: (booking.date_time, booking.pk)))
+    return results
+
+
+FreeSlot = namedtuple('FreeSlot', ['tutor', 'date_time', 'load'])
+FreeSlot.__doc__ = """A tutor free for the requested duration from `date_time`, with their booking count in the window."""
+
+
+def _align_to_grid(moment):
+    """Round `moment` up to the next step of the half-hour grid."""
+
+    floor = moment.replace(minute=0, second=0, microsecond=0)
+    steps = -(-(moment - floor) // SLOT_STEP)
+    return floor + steps * SLOT_STEP
+
+
+def _day_bounds(days, not_before):
+    """Return the grid-aligned (first start, end) of the working hours of each day, skipping the past."""
+
+    bounds = []
+    for day in days:
+        day_start = timezone.make_aware(datetime.combine(day, WORKING_DAY_START))
+        day_end = timezone.make_aware(datetime.combine(day, WORKING_DAY_END))
+        bounds.append((_align_to_grid(max(day_start, not_before)), day_end))
+    return bounds
+
+
+def _free_starts(busy, day_bounds, duration):
+    """
+    Yield, in order, every grid-aligned start within working hours that keeps clear of `busy`.
+
+    `busy` is a list of (start, end) intervals sorted by start; they may overlap.
+    """
+
+    index = 0
+    for start, day_end in day_bounds:
+        while start + duration <= day_end:
+            while index < len(busy) and busy[index][1] <= start:
+                index += 1
+            if index < len(busy) and busy[index][0] < start + duration:
+                start = _align_to_grid(busy[index][1])
+                continue
+            yield start
+            start += SLOT_STEP
+
+
+def find_free_slots(language, duration, first_day, last_day, tutee=None, limit=20):
+    """
+    Return up to `limit` FreeSlots for `language` between two dates (inclusive).
+
+    Qualified tutors' bookings are read one sorted query per week of the window, and each
+    tutor's free time is swept lazily, so the search stops as soon as the earliest `limit`
+    candidates are known. Candidates are ranked by start, then by the lighter tutor load.
+    If `tutee` is given, their own bookings are treated as busy for every tutor.
+    """
+
+    window_start = timezone.make_aware(datetime.combine(first_day, WORKING_DAY_START))
+    window_end = timezone.make_aware(datetime.combine(last_day, WORKING_DAY_END))
+    not_before = max(window_start, timezone.now())
+    if not_before >= window_end:
+        return []
+
+    # languages_specialised is a comma separated list, so the database filter is only a first pass.
+    qualified = Q(languages_specialised__icontains=language)
+    tutor_ids = {
+        tutor_id
+        for tutor_id, languages in Tutor.objects.filter(qualified).values_list('pk', 'languages_specialised')
+        if language in [specialism.strip() for specialism in languages.split(',')]
+    }
+    if not tutor_ids:
+        return []
+
+    window_bookings = Booking.objects.filter(
+        tutor__languages_specialised__icontains=language, date_time__gte=window_start, date_time__lt=window_end
+    )
+    load = Counter(dict(window_bookings.order_by().values_list('tutor_id').annotate(Count('pk'))))
+
+    participants = Q(tutor__languages_specialised__icontains=language)
+    if tutee is not None:
+        participants |= Q(tutee=tutee)
+
+    found = []
+    day = first_day
+    while day <= last_day and len(found) < limit:
+        days = [day + timedelta(days=offset) for offset in range(min(SEARCH_CHUNK_DAYS, (last_day - day).days + 1))]
+        chunk_start = max(timezone.make_aware(datetime.combine(days[0], WORKING_DAY_START)), not_before)
+        chunk_end = timezone.make_aware(datetime.combine(days[-1], WORKING_DAY_END))
+        day = days[-1] + timedelta(days=1)
+        if chunk_start >= chunk_end:
+            continue
+
+        rows = (
+            Booking.objects
+            .filter(participants, date_time__lt=chunk_end, date_time__gt=chunk_start - MAX_BOOKING_DURATION)
+            .order_by('date_time')
+            .values_list('tutor_id', 'tutee_id', 'date_time', 'duration')
+        )
+        busy_by_tutor = defaultdict(list)
+        tutee_busy = []
+        for tutor_id, tutee_id, date_time, booking_duration in rows:
+            interval = (date_time, date_time + booking_duration)
+            if tutor_id in tutor_ids:
+                busy_by_tutor[tutor_id].append(interval)
+            if tutee is not None and tutee_id == tutee.pk:
+                tutee_busy.append(interval)
+
+        day_bounds = _day_bounds(days, chunk_start)
+
+        def candidates(tutor_id):
+            busy = list(heapq.merge(busy_by_tutor[tutor_id], tutee_busy)) if tutee_busy else busy_by_tutor[tutor_id]
+            for start in _free_starts(busy, day_bounds, duration):
+                yield start, load[tutor_id], tutor_id
+
+        # Every candidate of this chunk starts before any candidate of the next one.
+        ranked = heapq.merge(*(candidates(tutor_id) for tutor_id in tutor_ids))
+        found.extend(islice(ranked, limit - len(found)))
+
+    tutors = Tutor.objects.select_related('user').in_bulk([tutor_id for _, _, tutor_id in found])
+    return [FreeSlot(tutors[tutor_id], start, tutor_load) for start, tutor_load, tutor_id in found]
+
+
+# Gap between the sessions of a recurring request; monthly series keep the same day of the month instead.
+SERIES_STEPS = {
+    'One-time': None,
+    'Weekly': timedelta(weeks=1),
+    'Bi-weekly': timedelta(weeks=2),
+}
+# Furthest a series may run past its first session, which bounds the bookings one approval creates
+SERIES_MAX_SPAN = timedelta(days=366)
+
+
+def term_end_date(day):
+    """Return the last day of the term `day` falls in, or None between terms."""
+
+    term = term_calendar.containing(day)
+    return term.end_date if term is not None else None
+
+
+def _add_months(moment, months):
+    """Move `moment` forward by `months` on the same day of the month, or the month's last day if it is shorter."""
+
+    year, month = divmod(moment.month - 1 + months, 12)
+    year, month = moment.year + year, month + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+def series_starts(first, frequency, until):
+    """
+    Return the start of every session of a recurring series, from `first` up to the end of `until`.
+
+    Steps are taken on the local wall clock so sessions keep their hour across daylight saving changes.
+    """
+
+    if frequency == 'One-time':
+        return [first]
+    local_first = timezone.localtime(first).replace(tzinfo=None)
+    starts = []
+    moment = local_first
+    index = 0
+    while moment.date() <= until:
+        starts.append(timezone.make_aware(moment))
+        index += 1
+        # Each step is taken from the first session so a short month does not shift the rest.
+        try:
+            if frequency == 'Monthly':
+                moment = _add_months(local_first, index)
+            else:
+                moment = local_first + index * SERIES_STEPS[frequency]
+        except (OverflowError, ValueError):
+            break  # No further session falls before the last representable date
+    return starts
+
+
+def book_series(new_booking_request, tutor, first, price, until=None):
+    """
+    Approve a new booking request by creating every session of its series at once.
+
+    The sessions run from `first` at the request's frequency until `until`, which defaults to the
+    end of the term. All of them are checked against existing bookings with one query; if any
+    clashes a ValidationError lists them and nothing is written. Otherwise the bookings, the
+    request status, the calendar feeds, ledgers and rollups and one summary notification each
+    for the tutor and tutee are saved in a single transaction with bulk inserts. Returns the created bookings.
+    """
+
+    request = new_booking_request.request
+    tutee = request.tutee
+    if until is None:
+        until = term_end_date(timezone.localtime(first).date())
+        if until is None:
+            raise ValidationError("The first session is not in a term; choose an end date for the series.")
+    slots = [
+        Slot(start, new_booking_request.duration, tutor, tutee)
+        for start in series_starts(first, new_booking_request.frequency, until)
+    ]
+    if not slots:
+        raise ValidationError("The series ends before its first session.")
+
+    with transaction.atomic():
+        clashes = [
+            f"{timezone.localtime(slot.date_time):%m/%d/%Y %I:%M %p} overlaps with {booking}."
+            for slot, conflicts in zip(slots, find_conflicts_bulk(slots))
+            for booking in conflicts
+        ]
+        if clashes:
+            raise ValidationError(clashes)
+
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                date_time=slot.date_time,
+                duration=slot.duration,
+                language=new_booking_request.language,
+                tutor=tutor,
+                tutee=tutee,
+                price=price,
+            )
+            for slot in slots
+        ])
+        # bulk_create skips the signals that keep the calendar feeds, ledgers and rollups current
+        CalendarFeed.objects.touch_participants([tutor.pk], [tutee.pk])
+        Ledger.objects.adjust(tutor.pk, tutee.pk, remaining=sum(booking.price for booking in bookings))
+        RevenueRollup.objects.apply(rollup_changes(booking_state(booking) for booking in bookings))
+        Request.objects.filter(pk=request.pk).update(status="Approved")
+        request.status = "Approved"
+
+        frequency = new_booking_request.frequency.lower()
+        starting = f"starting {timezone.localtime(slots[0].date_time):%m/%d/%Y %I:%M %p}"
+        notify_each([
+            (tutor.user, f"You have {len(bookings)} new {frequency} {new_booking_request.language} bookings with {tutee.user.full_name()} {starting}."),
+            (tutee.user, f"Admin approved your New Booking request: {len(bookings)} {frequency} sessions with {tutor.user.full_name()} {starting}."),
+        ])
+    return bookings
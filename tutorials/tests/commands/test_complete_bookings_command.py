@@ -0,0 +1,52 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+from io import StringIO
+from datetime import timedelta
+from tutorials.models import Booking, Tutor, Tutee, User
+
+class CompleteBookingsCommandTestCase(TestCase):
+    """Tests of the complete_bookings management command."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', is_tutor=True
+        )
+        tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org'
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=tutee_user)
+
+    def create_booking(self, date_time, duration=timedelta(hours=1)):
+        return Booking.objects.create(
+            date_time=date_time,
+            duration=duration,
+            language="Python",
+            tutor=self.tutor,
+            tutee=self.tutee,
+            price=20.00,
+        )
+
+    def test_finished_bookings_are_marked_completed(self):
+        finished = self.create_booking(now() - timedelta(days=1))
+        call_command('complete_bookings', stdout=StringIO())
+        finished.refresh_from_db()
+        self.assertTrue(finished.is_completed)
+
+    def test_running_bookings_are_not_marked_completed(self):
+        running = self.create_booking(now() - timedelta(minutes=30), duration=timedelta(hours=2))
+        upcoming = self.create_booking(now() + timedelta(days=1))
+        call_command('complete_bookings', stdout=StringIO())
+        running.refresh_from_db()
+        upcoming.refresh_from_db()
+        self.assertFalse(running.is_completed)
+        self.assertFalse(upcoming.is_completed)
+
+    def test_bookings_are_completed_across_several_batches(self):
+        for day in range(1, 6):
+            self.create_booking(now() - timedelta(days=day))
+        out = StringIO()
+        call_command('complete_bookings', batch_size=2, stdout=out)
+        self.assertFalse(Booking.objects.filter(is_completed=False).exists())
+        self.assertIn("Marked 5 bookings as completed.", out.getvalue())
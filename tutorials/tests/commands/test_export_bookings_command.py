@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+from io import StringIO
+from datetime import timedelta
+from tutorials.models import Booking, Tutor, Tutee, User
+
+class ExportBookingsCommandTestCase(TestCase):
+    """Tests of the export_bookings management command."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org')
+        tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        tutee = Tutee.objects.create(user=tutee_user)
+        for price, is_paid in [(20, True), (15, False)]:
+            Booking.objects.create(
+                date_time=now() + timedelta(days=1), duration=timedelta(hours=1), language="Python",
+                tutor=tutor, tutee=tutee, price=price, is_paid=is_paid,
+            )
+
+    def test_csv_to_stdout(self):
+        out = StringIO()
+        call_command('export_bookings', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('id,date_time,duration_minutes'))
+        self.assertEqual(len(lines), 3)
+
+    def test_jsonl_paid_only_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bookings.jsonl')
+            call_command('export_bookings', format='jsonl', status='Paid', output=path)
+            with open(path, encoding='utf-8') as output:
+                rows = [json.loads(line) for line in output]
+        self.assertEqual([row['price'] for row in rows], ['20.00'])
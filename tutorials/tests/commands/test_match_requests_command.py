@@ -0,0 +1,30 @@
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from datetime import timedelta
+from tutorials.models import NewBookingRequest, Request, Tutor, Tutee, User
+
+class MatchRequestsCommandTestCase(TestCase):
+    """Tests of the match_requests management command."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        tutee = Tutee.objects.create(user=User.objects.create_user(username='@tutee', email='tutee@example.org'))
+        for language in ["Python", "Java"]:
+            NewBookingRequest.objects.create(
+                request=Request.objects.create(tutee=tutee, request_type="New Booking"),
+                language=language, duration=timedelta(hours=1),
+            )
+
+    def test_reports_without_assigning(self):
+        out = StringIO()
+        call_command('match_requests', stdout=out)
+        self.assertIn("1 of 2 pending requests matched to 1 tutors.", out.getvalue())
+        self.assertFalse(NewBookingRequest.objects.filter(assigned_tutor__isnull=False).exists())
+
+    def test_accept_assigns_tutors(self):
+        out = StringIO()
+        call_command('match_requests', accept=True, stdout=out)
+        self.assertIn("Assigned tutors to 1 requests.", out.getvalue())
+        self.assertEqual(NewBookingRequest.objects.get(assigned_tutor=self.tutor).language, "Python")
@@ -0,0 +1,44 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from tutorials.models import Notification, OutboxMessage, User
+
+class PurgeNotificationsCommandTestCase(TestCase):
+    """Tests of the purge_notifications management command."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@user', email='user@example.org')
+        old = timezone.now() - timedelta(days=100)
+        for index in range(5):
+            notification = Notification.objects.create(user=self.user, message=f"Old read {index}", is_read=True)
+            Notification.objects.filter(pk=notification.pk).update(created_at=old)
+        unread = Notification.objects.create(user=self.user, message="Old unread")
+        Notification.objects.filter(pk=unread.pk).update(created_at=old)
+        Notification.objects.create(user=self.user, message="Recent read", is_read=True)
+        OutboxMessage.objects.create(user=self.user, message="Delivered", delivered_at=old)
+        OutboxMessage.objects.create(user=self.user, message="Waiting")
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge_notifications', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_expired_read_rows_in_batches(self):
+        output = self.purge('--batch-size', '2')
+        self.assertIn("Deleted 5 read notifications and 1 delivered outbox messages.", output)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('message', flat=True)), ["Old unread", "Recent read"]
+        )
+        self.assertEqual(list(OutboxMessage.objects.values_list('message', flat=True)), ["Waiting"])
+        self.assertEqual(User.objects.get(pk=self.user.pk).unread_notification_count, 1)
+
+    def test_days_option(self):
+        self.assertIn("Deleted 0 read notifications", self.purge('--days', '365'))
+        self.assertIn("Deleted 6 read notifications", self.purge('--days', '0'))
+
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            self.purge('--batch-size', '0')
@@ -0,0 +1,56 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+from io import StringIO
+from datetime import timedelta
+from decimal import Decimal
+from tutorials.models import Booking, Ledger, Tutor, Tutee, User
+
+class RebuildLedgersCommandTestCase(TestCase):
+    """Tests of the rebuild_ledgers management command."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org')
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=tutee_user)
+        for price, is_paid in [(20, False), (15, True)]:
+            Booking.objects.create(
+                date_time=now() + timedelta(days=1), duration=timedelta(hours=1), language="Python",
+                tutor=self.tutor, tutee=self.tutee, price=price, is_paid=is_paid,
+            )
+        self.tutor_ledger = Ledger.objects.for_user(tutor_user)
+        self.tutee_ledger = Ledger.objects.for_user(tutee_user)
+
+    def test_drifted_ledgers_are_corrected(self):
+        # Raw updates bypass the signals that maintain the ledgers
+        Booking.objects.update(is_paid=True)
+        out = StringIO()
+        call_command('rebuild_ledgers', stdout=out)
+        self.assertIn("Rebuilt 2 ledgers, 2 had drifted.", out.getvalue())
+        for ledger in (self.tutor_ledger, self.tutee_ledger):
+            ledger.refresh_from_db()
+            self.assertEqual((ledger.paid, ledger.remaining), (Decimal('35'), Decimal('0')))
+
+    def test_rebuild_matches_the_ledger_of_a_self_booking(self):
+        user = User.objects.create_user(username='@both', email='both@example.org', is_tutor=True)
+        tutor = Tutor.objects.create(user=user, languages_specialised="Python")
+        tutee = Tutee.objects.create(user=user)
+        ledger = Ledger.objects.for_user(user)
+        Booking.objects.create(
+            date_time=now() + timedelta(days=2), duration=timedelta(hours=1), language="Python",
+            tutor=tutor, tutee=tutee, price=30,
+        )
+        ledger.refresh_from_db()
+        incremental = (ledger.paid, ledger.remaining)
+        self.assertEqual(incremental, (Decimal('0'), Decimal('30')))
+        out = StringIO()
+        call_command('rebuild_ledgers', stdout=out)
+        self.assertIn("Rebuilt 3 ledgers, 0 had drifted.", out.getvalue())
+        ledger.refresh_from_db()
+        self.assertEqual((ledger.paid, ledger.remaining), incremental)
+
+    def test_correct_ledgers_are_left_alone(self):
+        out = StringIO()
+        call_command('rebuild_ledgers', stdout=out)
+        self.assertIn("Rebuilt 2 ledgers, 0 had drifted.", out.getvalue())
@@ -0,0 +1,42 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from io import StringIO
+from datetime import date, datetime
+from tutorials.models import Request, Term, Tutee, User
+
+class RecomputeLatenessCommandTestCase(TestCase):
+    """Tests of the recompute_lateness management command."""
+
+    def setUp(self):
+        tutee = Tutee.objects.create(user=User.objects.create_user(username='@tutee', email='tutee@example.org'))
+        self.requests = {
+            day: Request.objects.create(
+                tutee=tutee, request_type="New Booking", created_at=timezone.make_aware(datetime.combine(day, datetime.min.time()))
+            )
+            for day in [date(2030, 8, 1), date(2030, 8, 20), date(2030, 10, 1), date(2050, 1, 1)]
+        }
+
+    def recompute(self):
+        out = StringIO()
+        call_command('recompute_lateness', stdout=out)
+        return {day: Request.objects.get(pk=request.pk) for day, request in self.requests.items()}
+
+    def test_assigns_terms_and_lateness(self):
+        requests = self.recompute()
+        self.assertEqual(requests[date(2030, 8, 1)].term.start_date, date(2030, 9, 1))
+        self.assertFalse(requests[date(2030, 8, 1)].is_late)
+        self.assertTrue(requests[date(2030, 8, 20)].is_late)
+        self.assertTrue(requests[date(2030, 10, 1)].is_late)
+        self.assertIsNone(requests[date(2050, 1, 1)].term)
+        self.assertFalse(requests[date(2050, 1, 1)].is_late)
+
+    def test_follows_calendar_changes(self):
+        Term.objects.filter(start_date=date(2030, 9, 1)).update(late_deadline=date(2030, 10, 15))
+        requests = self.recompute()
+        self.assertFalse(requests[date(2030, 8, 20)].is_late)
+        self.assertFalse(requests[date(2030, 10, 1)].is_late)
+
+    def test_runs_one_update_per_term(self):
+        with self.assertNumQueries(Term.objects.count() + 6):
+            call_command('recompute_lateness', stdout=StringIO())
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from io import StringIO
+from datetime import datetime, timedelta
+from tutorials.models import Booking, Tutor, Tutee, User
+
+class ReconcilePaymentsCommandTestCase(TestCase):
+    """Tests of the reconcile_payments management command."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        tutee_user = User.objects.create_user(username='@janedoe', email='jane@example.org', first_name='Jane', last_name='Doe')
+        tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        tutee = Tutee.objects.create(user=tutee_user)
+        self.booking = Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2030, 10, 5, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=tutor, tutee=tutee, price=20,
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'statement.csv')
+        with open(self.path, 'w', encoding='utf-8-sig', newline='') as statement:
+            statement.write("Date,Amount,Description\r\n2030-10-06,20.00,Jane Doe\r\n2030-10-06,99.00,Nobody\r\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_marks_matched_bookings_as_paid(self):
+        out = StringIO()
+        call_command('reconcile_payments', self.path, stdout=out)
+        self.assertIn("1 lines matched, 0 ambiguous, 1 unmatched; 1 bookings marked as paid.", out.getvalue())
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.is_paid)
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('reconcile_payments', self.path, dry_run=True, stdout=out)
+        self.assertIn("1 bookings would be marked as paid.", out.getvalue())
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.is_paid)
+
+    def test_narrow_window(self):
+        out = StringIO()
+        call_command('reconcile_payments', self.path, window_days=0, stdout=out)
+        self.assertIn("0 lines matched", out.getvalue())
+
+    def test_malformed_file(self):
+        with open(self.path, 'w', encoding='utf-8', newline='') as statement:
+            statement.write('Date,Amount,Description\r\n2030-10-06,20.00,"Jane Doe' + 'x' * 200000 + '\r\n')
+        with self.assertRaises(CommandError):
+            call_command('reconcile_payments', self.path, stdout=StringIO())
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('reconcile_payments', os.path.join(self.directory.name, 'missing.csv'))
@@ -0,0 +1,37 @@
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from tutorials.models import Notification, User
+
+class ReconcileUnreadCountsCommandTestCase(TestCase):
+    """Tests of the reconcile_unread_counts management command."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'@user{index}', email=f'user{index}@example.org')
+            for index in range(3)
+        ]
+        Notification.objects.create(user=self.users[0], message="Unread")
+        Notification.objects.create(user=self.users[0], message="Read", is_read=True)
+        Notification.objects.create(user=self.users[1], message="Unread")
+
+    def reconcile(self):
+        out = StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        return out.getvalue()
+
+    def counts(self):
+        return [user.unread_notification_count for user in User.objects.order_by('pk')]
+
+    def test_counts_in_step_are_left_alone(self):
+        self.assertIn("of 0 users", self.reconcile())
+        self.assertEqual(self.counts(), [1, 1, 0])
+
+    def test_repairs_drift_with_one_update(self):
+        # Raw updates bypass the counters
+        Notification.objects.filter(user=self.users[1]).update(is_read=True)
+        User.objects.filter(pk=self.users[2].pk).update(unread_notification_count=5)
+        with self.assertNumQueries(1):
+            output = self.reconcile()
+        self.assertIn("of 2 users", output)
+        self.assertEqual(self.counts(), [1, 0, 0])
@@ -0,0 +1,28 @@
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from tutorials.models import Notification, User
+from tutorials.notifications import notify
+
+class RunOutboxCommandTestCase(TestCase):
+    """Tests of the run_outbox management command."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'@user{index}', email=f'user{index}@example.org')
+            for index in range(3)
+        ]
+
+    def test_drains_the_outbox(self):
+        notify(self.users, "Hello")
+        out = StringIO()
+        call_command('run_outbox', '--batch-size', '2', stdout=out)
+        self.assertIn("Materialised 3 notifications, delivered 3 messages, 0 failed.", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_empty_outbox(self):
+        out = StringIO()
+        call_command('run_outbox', stdout=out)
+        self.assertIn("Materialised 0 notifications, delivered 0 messages, 0 failed.", out.getvalue())
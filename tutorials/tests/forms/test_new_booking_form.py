@@ -99,6 +99,34 @@ class NewBookingFormTestCase(TestCase):
         form = BookingForm(data=overlapping_data)
         self.assertFalse(form.is_valid())
 
+    def test_form_is_invalid_when_earlier_booking_runs_into_the_slot(self):
+        Booking.objects.create(
+            date_time=self.valid_form_data['date_time'] - timedelta(minutes=30),
+            duration=timedelta(hours=1),
+            language="Python",
+            tutor=self.tutor,
+            tutee=self.tutee,
+            price=30.00
+        )
+        form = BookingForm(data=self.valid_form_data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('date_time', form.errors)
+
+    def test_form_is_invalid_when_tutee_is_double_booked(self):
+        other_tutor_user = User.objects.get(username="@petrapickles")
+        other_tutor = Tutor.objects.create(user=other_tutor_user, languages_specialised="Python")
+        Booking.objects.create(
+            date_time=self.valid_form_data['date_time'],
+            duration=timedelta(minutes=30),
+            language="Python",
+            tutor=other_tutor,
+            tutee=self.tutee,
+            price=30.00
+        )
+        form = BookingForm(data=self.valid_form_data)
+        self.assertFalse(form.is_valid())
+        self.assertIn("the tutee", form.errors['date_time'][0])
+
     def test_valid_form_can_be_saved(self):
         form = BookingForm(data=self.valid_form_data)
         before_count = Booking.objects.count()
@@ -1,3 +1,6 @@
+from functools import wraps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from with_asserts.mixin import AssertHTMLMixin
 
@@ -34,4 +37,64 @@ class MenuTesterMixin(AssertHTMLMixin):
         """Check that no menu is present."""
         
         for url in self.menu_urls:
-            self.assertNotHTML(response, f'a[href="{url}"]')
\ No newline at end of file
+            self.assertNotHTML(response, f'a[href="{url}"]')
+
+
+class QueryBudget(CaptureQueriesContext):
+    """Context manager that records the SQL run in a block and fails the test if it exceeds a budget."""
+
+    def __init__(self, test_case, max_queries, label='block'):
+        super().__init__(connection)
+        self.test_case = test_case
+        self.max_queries = max_queries
+        self.label = label
+
+    @property
+    def sql_time(self):
+        """Total time, in seconds, the database spent on the recorded queries."""
+
+        return sum(float(query['time']) for query in self.captured_queries)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self) > self.max_queries:
+            queries = '\n'.join(query['sql'] for query in self.captured_queries)
+            self.test_case.fail(
+                f"{self.label} ran {len(self)} queries ({self.sql_time:.3f}s of SQL), "
+                f"over its budget of {self.max_queries}:\n{queries}"
+            )
+
+
+def query_budget(max_queries):
+    """Decorator for test methods that fails the test when it runs more than max_queries queries."""
+
+    def decorator(test_method):
+        @wraps(test_method)
+        def modified_test_method(self, *args, **kwargs):
+            with QueryBudget(self, max_queries, label=test_method.__name__):
+                return test_method(self, *args, **kwargs)
+        return modified_test_method
+    return decorator
+
+
+class QueryBudgetTesterMixin:
+    """Class to extend tests with tools to keep the number of queries of a view in check."""
+
+    def assert_query_budget(self, max_queries, label='block'):
+        """Return a context manager failing the test if the block exceeds max_queries queries."""
+
+        return QueryBudget(self, max_queries, label)
+
+    def assert_queries_do_not_scale(self, hit_view, add_rows, max_queries, label='view'):
+        """Hit a view before and after add_rows() grows the data, and check the query count stays put."""
+
+        with self.assert_query_budget(max_queries, label) as small:
+            hit_view()
+        add_rows()
+        with self.assert_query_budget(max_queries, label) as large:
+            hit_view()
+        self.assertEqual(
+            len(small), len(large),
+            f"{label} ran {len(small)} queries on the small data set but {len(large)} on the large one."
+        )
+        return small, large
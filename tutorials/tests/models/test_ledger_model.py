@@ -0,0 +1,90 @@
+from django.test import TestCase
+from django.utils.timezone import now
+from datetime import timedelta
+from decimal import Decimal
+from tutorials.models import Booking, Ledger, Tutor, Tutee, User
+
+class LedgerModelTestCase(TestCase):
+    """Tests of the incrementally maintained invoice ledgers."""
+
+    def setUp(self):
+        self.tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        self.tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org')
+        self.tutor = Tutor.objects.create(user=self.tutor_user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=self.tutee_user)
+        self.booking = self.create_booking(20)
+        self.tutor_ledger = Ledger.objects.for_user(self.tutor_user)
+        self.tutee_ledger = Ledger.objects.for_user(self.tutee_user)
+
+    def create_booking(self, price, tutee=None, is_paid=False):
+        return Booking.objects.create(
+            date_time=now() + timedelta(days=1), duration=timedelta(hours=1), language="Python",
+            tutor=self.tutor, tutee=tutee or self.tutee, price=price, is_paid=is_paid,
+        )
+
+    def assert_ledger(self, ledger, paid, remaining):
+        ledger.refresh_from_db()
+        self.assertEqual((ledger.paid, ledger.remaining), (Decimal(paid), Decimal(remaining)))
+
+    def test_ledger_is_computed_from_existing_bookings(self):
+        self.assert_ledger(self.tutor_ledger, '0', '20')
+        self.assert_ledger(self.tutee_ledger, '0', '20')
+
+    def test_new_booking_is_added(self):
+        self.create_booking(15, is_paid=True)
+        self.assert_ledger(self.tutor_ledger, '15', '20')
+        self.assert_ledger(self.tutee_ledger, '15', '20')
+
+    def test_toggling_is_paid_moves_the_price(self):
+        self.booking.is_paid = True
+        self.booking.save()
+        self.assert_ledger(self.tutee_ledger, '20', '0')
+        self.booking.is_paid = False
+        self.booking.save()
+        self.assert_ledger(self.tutee_ledger, '0', '20')
+
+    def test_price_change_is_applied(self):
+        self.booking.price = Decimal('32.50')
+        self.booking.save()
+        self.assert_ledger(self.tutor_ledger, '0', '32.50')
+
+    def test_saving_without_invoice_changes_does_not_write_the_ledger(self):
+        self.booking.date_time += timedelta(hours=2)
+        with self.assertNumQueries(2):  # The booking itself and its calendar feeds
+            self.booking.save()
+
+    def test_moving_a_booking_to_another_tutee_moves_its_price(self):
+        other_tutee = Tutee.objects.create(user=User.objects.create_user(username='@other', email='other@example.org'))
+        other_ledger = Ledger.objects.for_user(other_tutee.user)
+        self.booking.tutee = other_tutee
+        self.booking.save()
+        self.assert_ledger(self.tutee_ledger, '0', '0')
+        self.assert_ledger(other_ledger, '0', '20')
+        self.assert_ledger(self.tutor_ledger, '0', '20')
+
+    def test_deleted_booking_is_removed(self):
+        self.booking.delete()
+        self.assert_ledger(self.tutor_ledger, '0', '0')
+        self.assert_ledger(self.tutee_ledger, '0', '0')
+
+    def test_saving_a_partially_loaded_booking_reads_its_stored_state(self):
+        booking = Booking.objects.only('date_time').get(pk=self.booking.pk)
+        booking.price = 30
+        booking.save()
+        self.assert_ledger(self.tutor_ledger, '0', '30')
+        self.assert_ledger(self.tutee_ledger, '0', '30')
+
+    def test_set_paid_moves_prices_in_bulk(self):
+        self.create_booking(15)
+        self.create_booking(5, is_paid=True)
+        updated = Booking.objects.filter(tutor=self.tutor).set_paid(True)
+        self.assertEqual(updated, 2)
+        self.assert_ledger(self.tutor_ledger, '40', '0')
+        self.assert_ledger(self.tutee_ledger, '40', '0')
+        self.assertEqual(Booking.objects.filter(tutor=self.tutor).set_paid(True), 0)
+
+    def test_invoice_totals_aggregate(self):
+        self.create_booking(15, is_paid=True)
+        with self.assertNumQueries(1):
+            totals = Booking.objects.invoice_totals()
+        self.assertEqual(totals, {'paid': Decimal('15'), 'remaining': Decimal('20')})
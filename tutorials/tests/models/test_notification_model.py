@@ -39,3 +39,51 @@ class NotificationModelTestCase(TestCase):
         expected_str = f"Notification for {self.user.username} - {self.notification.message}"
         self.assertEqual(str(self.notification), expected_str)
 
+
+
+class UnreadNotificationCountTestCase(TestCase):
+    """Tests that the users' unread notification counters follow their notifications."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="@reader", email="reader@example.com", password="Password123")
+        self.other = User.objects.create_user(username="@other", email="other@example.com", password="Password123")
+
+    def count(self, user):
+        return User.objects.get(pk=user.pk).unread_notification_count
+
+    def test_create_read_and_delete(self):
+        notification = Notification.objects.create(user=self.user, message="One")
+        Notification.objects.create(user=self.user, message="Two")
+        Notification.objects.create(user=self.user, message="Seen", is_read=True)
+        self.assertEqual(self.count(self.user), 2)
+        self.assertEqual(self.user.unread_notification_count, 2)
+
+        notification = Notification.objects.get(pk=notification.pk)
+        notification.is_read = True
+        notification.save()
+        self.assertEqual(self.count(self.user), 1)
+        notification.save()
+        self.assertEqual(self.count(self.user), 1)
+
+        Notification.objects.get(message="Two").delete()
+        notification.delete()
+        self.assertEqual(self.count(self.user), 0)
+
+    def test_moving_a_notification_moves_the_count(self):
+        notification = Notification.objects.create(user=self.user, message="Misdirected")
+        notification.user = self.other
+        notification.save()
+        self.assertEqual((self.count(self.user), self.count(self.other)), (0, 1))
+
+    def test_bulk_create_mark_read_and_delete(self):
+        Notification.objects.bulk_create(
+            [Notification(user=self.user, message=f"{index}") for index in range(3)]
+            + [Notification(user=self.other, message="Hi"), Notification(user=self.other, message="Old", is_read=True)]
+        )
+        self.assertEqual((self.count(self.user), self.count(self.other)), (3, 1))
+
+        self.assertEqual(Notification.objects.filter(message__in=["0", "Hi"]).mark_read(), 2)
+        self.assertEqual((self.count(self.user), self.count(self.other)), (2, 0))
+
+        Notification.objects.all().delete()
+        self.assertEqual((self.count(self.user), self.count(self.other)), (0, 0))
@@ -0,0 +1,87 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from tutorials.models import Booking, RevenueRollup, Term, Tutor, Tutee, User
+
+class RevenueRollupModelTestCase(TestCase):
+    """Tests of the incrementally maintained revenue rollups."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org')
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python, Java")
+        self.tutee = Tutee.objects.create(user=tutee_user)
+        self.autumn = timezone.make_aware(datetime(2030, 10, 7, 10, 0))
+        self.booking = self.create_booking(self.autumn, 20)
+
+    def create_booking(self, date_time, price, language="Python", is_paid=False):
+        return Booking.objects.create(
+            date_time=date_time, duration=timedelta(hours=1), language=language,
+            tutor=self.tutor, tutee=self.tutee, price=price, is_paid=is_paid,
+        )
+
+    def rollup(self, term_start=date(2030, 9, 1), language="Python"):
+        return RevenueRollup.objects.get(term__start_date=term_start, tutor=self.tutor, language=language)
+
+    def test_bookings_between_terms_count_towards_the_next_term(self):
+        self.create_booking(timezone.make_aware(datetime(2030, 8, 15, 10, 0)), 15)
+        self.assertEqual(self.rollup().bookings, 2)
+        self.assertFalse(RevenueRollup.objects.filter(term__start_date=date(2030, 5, 1)).exists())
+
+    def test_bookings_after_the_last_term_are_left_out(self):
+        last_term = Term.objects.order_by('start_date').last()
+        self.create_booking(timezone.make_aware(datetime.combine(last_term.end_date + timedelta(days=1), datetime.min.time())), 15)
+        self.assertEqual(RevenueRollup.objects.count(), 1)
+
+    def test_new_bookings_are_added(self):
+        self.create_booking(self.autumn + timedelta(days=7), 15, is_paid=True)
+        rollup = self.rollup()
+        self.assertEqual(rollup.revenue, Decimal('35'))
+        self.assertEqual(rollup.duration, timedelta(hours=2))
+        self.assertEqual((rollup.bookings, rollup.paid_bookings, rollup.unpaid_bookings), (2, 1, 1))
+        self.assertEqual(rollup.term.name, "September-Christmas 2030")
+
+    def test_each_language_and_term_has_its_own_rollup(self):
+        self.create_booking(self.autumn, 10, language="Java")
+        self.create_booking(timezone.make_aware(datetime(2031, 2, 3, 10, 0)), 10)
+        self.assertEqual(RevenueRollup.objects.count(), 3)
+        self.assertEqual(self.rollup().bookings, 1)
+
+    def test_moving_a_booking_to_another_term(self):
+        self.booking.date_time = timezone.make_aware(datetime(2031, 2, 3, 10, 0))
+        self.booking.save()
+        self.assertFalse(RevenueRollup.objects.filter(term__start_date=date(2030, 9, 1)).exists())
+        self.assertEqual(self.rollup(term_start=date(2031, 1, 1)).revenue, Decimal('20'))
+
+    def test_deleted_booking_is_removed(self):
+        self.create_booking(self.autumn, 15)
+        self.booking.delete()
+        rollup = self.rollup()
+        self.assertEqual((rollup.revenue, rollup.bookings), (Decimal('15'), 1))
+
+    def test_set_paid_updates_the_counts(self):
+        Booking.objects.all().set_paid(True)
+        rollup = self.rollup()
+        self.assertEqual((rollup.paid_bookings, rollup.unpaid_bookings), (1, 0))
+
+    def test_complete_bookings_updates_the_counts(self):
+        self.booking.date_time = timezone.now() - timedelta(days=1)
+        self.booking.save()
+        call_command('complete_bookings', stdout=StringIO())
+        self.assertEqual(RevenueRollup.objects.get().completed_bookings, 1)
+
+    def test_rebuild_rollups_matches_the_incremental_rollups(self):
+        self.create_booking(self.autumn, 15, language="Java", is_paid=True)
+        self.create_booking(timezone.make_aware(datetime(2031, 8, 4, 10, 0)), 10)
+        fields = ('term', 'tutor', 'language', 'revenue', 'duration', 'bookings',
+                  'paid_bookings', 'unpaid_bookings', 'completed_bookings')
+        incremental = sorted(RevenueRollup.objects.values_list(*fields))
+        # Raw updates skip the signals, the rebuild corrects the drift
+        RevenueRollup.objects.update(revenue=0)
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn("Rebuilt 3 rollups.", out.getvalue())
+        self.assertEqual(sorted(RevenueRollup.objects.values_list(*fields)), incremental)
@@ -0,0 +1,60 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from tutorials.models import Request, Term, Tutee, User, term_calendar
+
+class TermModelTestCase(TestCase):
+    """Tests of the term calendar and its cached lookup."""
+
+    def setUp(self):
+        term_calendar.clear()
+        self.tutee = Tutee.objects.create(user=User.objects.create_user(username='@tutee', email='tutee@example.org'))
+
+    def tearDown(self):
+        term_calendar.clear()
+
+    def test_standard_terms_are_installed(self):
+        term = Term.objects.get(start_date=date(2030, 9, 1))
+        self.assertEqual(str(term), "September-Christmas 2030")
+        self.assertEqual(term.end_date, date(2030, 12, 31))
+        self.assertEqual(term.late_deadline, date(2030, 8, 18))
+
+    def test_term_cannot_end_before_it_starts(self):
+        term = Term(name="Backwards", start_date=date(2050, 2, 1), end_date=date(2050, 1, 1), late_deadline=date(2050, 1, 1))
+        with self.assertRaises(ValidationError):
+            term.full_clean()
+
+    def test_lookups_are_answered_from_the_cache(self):
+        term_calendar.containing(date(2030, 10, 1))
+        with self.assertNumQueries(0):
+            self.assertEqual(term_calendar.containing(date(2030, 10, 1)).start_date, date(2030, 9, 1))
+            self.assertEqual(term_calendar.containing(date(2031, 3, 1)).start_date, date(2031, 1, 1))
+            self.assertIsNone(term_calendar.containing(date(2030, 8, 10)))
+            self.assertEqual(term_calendar.upcoming(date(2030, 8, 10)).start_date, date(2030, 9, 1))
+
+    def test_saving_a_term_clears_the_cache(self):
+        self.assertIsNone(term_calendar.containing(date(2030, 8, 10)))
+        Term.objects.create(name="Summer school 2030", start_date=date(2030, 8, 1), end_date=date(2030, 8, 20), late_deadline=date(2030, 7, 18))
+        self.assertEqual(term_calendar.containing(date(2030, 8, 10)).name, "Summer school 2030")
+
+    def test_assign_term(self):
+        request = Request(tutee=self.tutee, request_type="New Booking", created_at=timezone.make_aware(datetime(2030, 8, 10, 12, 0)))
+        request.assign_term()
+        self.assertEqual(request.term.start_date, date(2030, 9, 1))
+        self.assertFalse(request.is_late)
+
+        request.created_at = timezone.make_aware(datetime(2030, 8, 25, 12, 0))
+        request.assign_term()
+        self.assertTrue(request.is_late)
+
+    def test_counts_by_term(self):
+        for day, is_late in [(date(2030, 10, 1), True), (date(2030, 11, 1), False), (date(2031, 2, 1), True)]:
+            request = Request(tutee=self.tutee, request_type="New Booking", created_at=timezone.make_aware(datetime.combine(day, datetime.min.time())))
+            request.assign_term()
+            request.is_late = is_late
+            request.save()
+        counts = list(Request.objects.counts_by_term())
+        self.assertEqual([(row['term__name'], row['requests'], row['late']) for row in counts], [
+            ("September-Christmas 2030", 2, 1), ("January-Easter 2031", 1, 1),
+        ])
@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.live import NotificationBroker, broker, event_stream, format_event
+from tutorials.models import Notification, User
+
+class NotificationBrokerTestCase(TestCase):
+    """Tests of the process-wide notification broker behind the event streams."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@reader', email='reader@example.org', password='Password123')
+        self.other = User.objects.create_user(username='@other', email='other@example.org', password='Password123')
+
+    async def test_poll_publishes_new_notifications_and_counts_to_subscribers(self):
+        broker = NotificationBroker()
+        async with broker.subscribe(self.user.pk, 0) as queue:
+            await broker.poll_once()
+            self.assertTrue(queue.empty())
+            await sync_to_async(Notification.objects.create)(user=self.user, message="Hello")
+            await sync_to_async(Notification.objects.create)(user=self.other, message="Not yours")
+            await broker.poll_once()
+            event, data = queue.get_nowait()
+            self.assertEqual((event, data['message']), ('notification', "Hello"))
+            self.assertEqual(queue.get_nowait(), ('unread', {'count': 1}))
+            self.assertTrue(queue.empty())
+
+            # Nothing changed, nothing is sent
+            await broker.poll_once()
+            self.assertTrue(queue.empty())
+        self.assertEqual(dict(broker.subscribers), {})
+
+    def test_poll_is_two_queries_for_any_number_of_streams(self):
+        async def poll():
+            broker = NotificationBroker()
+            async with broker.subscribe(self.user.pk, 0), broker.subscribe(self.user.pk, 0), broker.subscribe(self.other.pk, 0):
+                broker.last_notification_id = 0
+                await broker.poll_once()
+
+        with self.assertNumQueries(2):
+            async_to_sync(poll)()
+
+    async def test_full_queue_drops_events(self):
+        broker = NotificationBroker()
+        async with broker.subscribe(self.user.pk, 0) as queue:
+            for count in range(queue.maxsize + 5):
+                broker.publish(self.user.pk, 'unread', {'count': count})
+            self.assertEqual(queue.qsize(), queue.maxsize)
+
+    async def test_event_stream_starts_with_the_count(self):
+        stream = event_stream(self.user.pk, 3)
+        first = await anext(stream)
+        self.assertIn('retry: ', first)
+        self.assertTrue(first.endswith(format_event('unread', {'count': 3})))
+        await stream.aclose()
+
+
+class NotificationStreamViewTestCase(TestCase):
+    """Tests of the notification_stream view."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@reader', email='reader@example.org', password='Password123')
+        Notification.objects.create(user=self.user, message="Hello")
+        self.url = reverse('notification_stream')
+
+    def test_without_asgi_tells_the_browser_not_to_reconnect(self):
+        self.client.login(username='@reader', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_pages_served_without_asgi_do_not_open_the_stream(self):
+        self.client.login(username='@reader', password='Password123')
+        response = self.client.get(reverse('profile'))
+        self.assertNotContains(response, 'new EventSource')
+
+    async def test_pages_served_by_asgi_open_the_stream(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('profile'))
+        self.assertContains(response, 'new EventSource')
+
+    def test_requires_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    async def test_asgi_responds_with_an_event_stream(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    async def test_event_stream_pushes_changes(self):
+        stream = event_stream(self.user.pk, 1)
+        try:
+            self.assertTrue((await anext(stream)).endswith(format_event('unread', {'count': 1})))
+            next_event = asyncio.ensure_future(anext(stream))
+            while not broker.subscribers:
+                await asyncio.sleep(0)
+            await broker.poll_once()
+            await sync_to_async(Notification.objects.create)(user=self.user, message="Another")
+            await broker.poll_once()
+            self.assertIn('"message": "Another"', await asyncio.wait_for(next_event, 5))
+            self.assertEqual(await asyncio.wait_for(anext(stream), 5), format_event('unread', {'count': 2}))
+        finally:
+            # Close the generator and the poller it started while this test's event loop is running
+            await stream.aclose()
+            if broker.poller is not None and broker.loop is asyncio.get_running_loop():
+                broker.poller.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await broker.poller
+        self.assertEqual(dict(broker.subscribers), {})
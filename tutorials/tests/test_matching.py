@@ -0,0 +1,117 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.matching import Proposal, accept_proposals, check_proposals, current_loads, propose_matches
+from tutorials.models import Booking, NewBookingRequest, Request, Tutor, Tutee, User
+
+class MatchingTestCase(TestCase):
+    """Tests of the batch tutor matching engine."""
+
+    def setUp(self):
+        self.tutee = self.create_tutee('@tutee')
+
+    def create_tutor(self, username, languages):
+        user = User.objects.create_user(username=username, email=f'{username[1:]}@example.org', is_tutor=True)
+        return Tutor.objects.create(user=user, languages_specialised=languages)
+
+    def create_tutee(self, username):
+        user = User.objects.create_user(username=username, email=f'{username[1:]}@example.org')
+        return Tutee.objects.create(user=user)
+
+    def create_request(self, language, duration=timedelta(hours=1), frequency="Weekly", status="Pending"):
+        request = Request.objects.create(tutee=self.tutee, request_type="New Booking", status=status)
+        return NewBookingRequest.objects.create(request=request, language=language, duration=duration, frequency=frequency)
+
+    def test_requests_go_to_the_lightest_qualified_tutor(self):
+        busy = self.create_tutor('@busy', "Python")
+        free = self.create_tutor('@free', "Python")
+        self.create_tutor('@javaonly', "Java")
+        Booking.objects.create(
+            date_time=timezone.now() + timedelta(days=1), duration=timedelta(hours=2), language="Python",
+            tutor=busy, tutee=self.tutee, price=20,
+        )
+        first = self.create_request("Python")
+        second = self.create_request("Python")
+        third = self.create_request("Python")
+        proposals = propose_matches()
+        self.assertEqual([(proposal.new_booking_request_id, proposal.tutor_id) for proposal in proposals], [
+            (first.pk, free.pk), (second.pk, free.pk), (third.pk, busy.pk),
+        ])
+        self.assertEqual(proposals[-1].weekly_load, timedelta(hours=3))
+
+    def test_frequency_scales_the_weekly_load(self):
+        self.create_tutor('@tutor', "Python")
+        self.create_request("Python", duration=timedelta(hours=2), frequency="Bi-weekly")
+        self.create_request("Python", duration=timedelta(hours=2), frequency="Monthly")
+        self.assertEqual(propose_matches()[-1].weekly_load, timedelta(hours=1, minutes=30))
+
+    def test_rare_languages_are_placed_first(self):
+        # Only the polyglot teaches Scala, so the older Python request must not take their only hour
+        polyglot = self.create_tutor('@polyglot', "Python, Scala")
+        pythonist = self.create_tutor('@pythonist', "Python")
+        python = self.create_request("Python")
+        scala = self.create_request("Scala")
+        proposals = propose_matches(max_weekly_load=timedelta(hours=1))
+        self.assertEqual([(proposal.new_booking_request_id, proposal.tutor_id) for proposal in proposals], [
+            (scala.pk, polyglot.pk), (python.pk, pythonist.pk),
+        ])
+
+    def test_tutors_are_not_loaded_past_the_cap(self):
+        self.create_tutor('@tutor', "Python")
+        for _ in range(3):
+            self.create_request("Python", duration=timedelta(hours=2))
+        self.assertEqual(len(propose_matches(max_weekly_load=timedelta(hours=5))), 2)
+
+    def test_unqualified_and_handled_requests_are_skipped(self):
+        self.create_tutor('@tutor', "Python")
+        self.create_request("Java")
+        self.create_request("Python", status="Approved")
+        self.assertEqual(propose_matches(), [])
+
+    def test_accepting_assigns_tutors_and_counts_towards_the_load(self):
+        tutor = self.create_tutor('@tutor', "Python")
+        other = self.create_tutor('@other', "Python")
+        first = self.create_request("Python")
+        second = self.create_request("Python", duration=timedelta(hours=2))
+        self.assertEqual(accept_proposals(propose_matches()), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual({first.assigned_tutor_id, second.assigned_tutor_id}, {tutor.pk, other.pk})
+        self.assertEqual(sum(current_loads().values(), timedelta()), timedelta(hours=3))
+        self.assertEqual(propose_matches(), [])
+
+    def test_accepting_leaves_handled_requests_alone(self):
+        tutor = self.create_tutor('@tutor', "Python")
+        approved = self.create_request("Python", status="Approved")
+        self.assertEqual(accept_proposals([Proposal(approved.pk, tutor.pk, None)]), 0)
+        approved.refresh_from_db()
+        self.assertIsNone(approved.assigned_tutor)
+
+    def test_check_proposals_rejects_missing_and_unqualified_tutors(self):
+        python = self.create_tutor('@python', "Python")
+        java = self.create_tutor('@java', "Java")
+        request = self.create_request("Python")
+        proposals = [Proposal(request.pk, python.pk, None), Proposal(request.pk, java.pk, None), Proposal(request.pk, 0, None)]
+        with self.assertNumQueries(2):
+            valid, rejected = check_proposals(proposals)
+        self.assertEqual(valid, proposals[:1])
+        self.assertEqual(rejected, proposals[1:])
+
+    def test_large_queue_is_matched_with_a_fixed_number_of_queries(self):
+        users = User.objects.bulk_create([
+            User(username=f'@tutor{index}', email=f'tutor{index}@example.org', is_tutor=True) for index in range(40)
+        ])
+        Tutor.objects.bulk_create([
+            Tutor(user=user, languages_specialised="Python, Java" if index % 2 else "C++")
+            for index, user in enumerate(users)
+        ])
+        requests = Request.objects.bulk_create([
+            Request(tutee=self.tutee, request_type="New Booking") for _ in range(60)
+        ])
+        NewBookingRequest.objects.bulk_create([
+            NewBookingRequest(request=request, language=("Python", "Java", "C++")[index % 3], duration=timedelta(hours=1))
+            for index, request in enumerate(requests)
+        ])
+        with self.assertNumQueries(4):
+            proposals = propose_matches()
+        self.assertEqual(len(proposals), 60)
@@ -0,0 +1,74 @@
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import Inquiry, Notification, OutboxMessage, Tutee, User
+from tutorials.notifications import mark_all_read, notify, notify_each, notify_staff
+from tutorials.outbox import drain
+
+class NotificationServiceTestCase(TestCase):
+    """Tests of the notification fan-out service."""
+
+    def setUp(self):
+        self.admins = [
+            User.objects.create_user(username=f'@admin{index}', email=f'admin{index}@example.org', password='Password123', is_staff=True)
+            for index in range(30)
+        ]
+        self.tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org', password='Password123')
+        Tutee.objects.create(user=self.tutee_user)
+
+    def test_notify_each_is_one_insert_into_the_outbox(self):
+        with self.assertNumQueries(1):
+            notify_each([(self.tutee_user, "Hello"), (self.admins[0].pk, "Hi")])
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list('user__username', 'message')),
+            [('@admin0', "Hi"), ('@tutee', "Hello")],
+        )
+
+    def test_notify_staff_reads_the_admins_once(self):
+        with self.assertNumQueries(2):
+            notify_staff("Something happened.")
+        self.assertEqual(OutboxMessage.objects.filter(user__is_staff=True).count(), 30)
+
+    def test_notify_nobody(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(notify([], "Nobody"), [])
+
+    def test_new_booking_request_notifies_every_admin(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.post(reverse('new_booking_request'), {
+            'frequency': 'Weekly', 'duration': '1:00:00', 'language': 'Python', 'details': '',
+        })
+        self.assertRedirects(response, reverse('requests'), fetch_redirect_response=False)
+        self.assertEqual(OutboxMessage.objects.filter(message="New Booking request from @tutee.").count(), 30)
+
+    def test_tutee_inquiry_notifies_every_admin(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.post(reverse('send_inquiry'), {'message': "When is my next session?"})
+        self.assertRedirects(response, reverse('inbox'), fetch_redirect_response=False)
+        inquiry = Inquiry.objects.get()
+        self.assertEqual(inquiry.recipient, self.admins[0])
+        self.assertEqual(OutboxMessage.objects.filter(message="You have a new inquiry from @tutee.").count(), 30)
+
+    def test_admin_inquiry_is_saved_and_notifies_the_recipient(self):
+        self.client.login(username='@admin0', password='Password123')
+        self.client.post(reverse('send_inquiry'), {'recipient': self.tutee_user.pk, 'message': "Hello"})
+        self.assertEqual(Inquiry.objects.get().recipient, self.tutee_user)
+        self.assertEqual(list(OutboxMessage.objects.values_list('user__username', flat=True)), ['@tutee'])
+
+    def test_mark_all_read(self):
+        notify([self.tutee_user, self.admins[0]], "Hello")
+        drain(backends=[])
+        self.tutee_user.refresh_from_db()
+        self.assertEqual(mark_all_read(self.tutee_user), 1)
+        self.assertEqual(self.tutee_user.unread_notification_count, 0)
+        self.assertEqual(User.objects.get(pk=self.tutee_user.pk).unread_notification_count, 0)
+        self.assertEqual(User.objects.get(pk=self.admins[0].pk).unread_notification_count, 1)
+
+    def test_pages_read_the_unread_count_without_counting(self):
+        notify([self.tutee_user, self.tutee_user], "Hello")
+        drain(backends=[])
+        self.client.login(username='@tutee', password='Password123')
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.context['unread_notifications_count'], 2)
+        self.assertFalse(any('"tutorials_notification"' in query['sql'] for query in queries.captured_queries))
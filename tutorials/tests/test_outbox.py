@@ -0,0 +1,179 @@
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.delivery import EmailDeliveryBackend
+from tutorials.models import Notification, OutboxMessage, User, OUTBOX_MAX_ATTEMPTS
+from tutorials.notifications import notify
+from tutorials.outbox import claim_batch, drain, materialise, retry_delay
+
+class FlakyBackend:
+    """A delivery backend that refuses the messages listed in `refuse`, recording what it was given."""
+
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.sent = []
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send(self, outbox_message):
+        if outbox_message.message in self.refuse:
+            raise ConnectionError("refused")
+        self.sent.append(outbox_message.message)
+
+
+class BrokenBackend(FlakyBackend):
+    def open(self):
+        raise ConnectionError("mail server down")
+
+
+class OutboxTestCase(TestCase):
+    """Tests of draining the notification outbox."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'@user{index}', email=f'user{index}@example.org')
+            for index in range(3)
+        ]
+
+    def test_drain_materialises_and_delivers_each_message_once(self):
+        notify(self.users, "Hello")
+        backend = FlakyBackend()
+        report = drain(backends=[backend])
+        self.assertEqual(tuple(report), (3, 3, 0))
+        self.assertEqual(backend.sent, ["Hello"] * 3)
+        self.assertEqual(Notification.objects.filter(message="Hello").count(), 3)
+        self.assertEqual(User.objects.get(pk=self.users[0].pk).unread_notification_count, 1)
+        self.assertFalse(OutboxMessage.objects.filter(delivered_at__isnull=True).exists())
+
+        self.assertEqual(tuple(drain(backends=[backend])), (0, 0, 0))
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_batches_share_one_connection(self):
+        notify(self.users, "Hello")
+        backend = FlakyBackend()
+        self.assertEqual(tuple(drain(batch_size=2, backends=[backend])), (3, 3, 0))
+        self.assertEqual(backend.opened, 2)
+
+    def test_claim_is_a_fixed_number_of_queries(self):
+        notify(self.users * 10, "Hello")
+        # Savepoint, the claim, one notification insert, the unread counters and the lease
+        with self.assertNumQueries(6):
+            self.assertEqual(len(claim_batch()), 30)
+
+    def test_failed_delivery_backs_off_without_duplicating_notifications(self):
+        notify(self.users[:1], "Refused")
+        notify(self.users[1:], "Hello")
+        report = drain(backends=[FlakyBackend(refuse=["Refused"])])
+        self.assertEqual(tuple(report), (3, 2, 1))
+
+        failed = OutboxMessage.objects.get(message="Refused")
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn("ConnectionError: refused", failed.last_error)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        self.assertIsNotNone(failed.materialised_at)
+
+        # Not due yet, then retried once the backoff has passed
+        self.assertEqual(tuple(drain(backends=[FlakyBackend()])), (0, 0, 0))
+        OutboxMessage.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(tuple(drain(backends=[FlakyBackend()])), (0, 1, 0))
+        self.assertEqual(Notification.objects.filter(message="Refused").count(), 1)
+
+    def test_unreachable_backend_backs_off_the_whole_batch(self):
+        notify(self.users, "Hello")
+        self.assertEqual(tuple(drain(backends=[BrokenBackend()])), (3, 0, 3))
+        self.assertEqual(set(OutboxMessage.objects.values_list('attempts', flat=True)), {1})
+
+    def test_gives_up_after_the_maximum_attempts(self):
+        notify(self.users[:1], "Refused")
+        OutboxMessage.objects.update(attempts=OUTBOX_MAX_ATTEMPTS)
+        self.assertEqual(tuple(drain(backends=[FlakyBackend()])), (0, 0, 0))
+
+    def test_expired_lease_is_claimed_again(self):
+        notify(self.users[:1], "Hello")
+        self.assertEqual(len(claim_batch()), 1)
+        self.assertEqual(claim_batch(), [])
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(tuple(drain(backends=[FlakyBackend()])), (0, 1, 0))
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(retry_delay(1), timedelta(minutes=1))
+        self.assertEqual(retry_delay(3), timedelta(minutes=4))
+        self.assertEqual(retry_delay(20), timedelta(hours=1))
+
+    def test_email_backend(self):
+        self.users[2].email = ''
+        self.users[2].save()
+        notify(self.users, "Your session moved.")
+        self.assertEqual(tuple(drain(backends=[EmailDeliveryBackend()])), (3, 3, 0))
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ['user0@example.org', 'user1@example.org'])
+        self.assertEqual(mail.outbox[0].body, "Your session moved.")
+
+
+class DigestTestCase(TestCase):
+    """Tests of grouping bursts of similar notifications into digests."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='@admin', email='admin@example.org', is_staff=True)
+        self.other_admin = User.objects.create_user(username='@other', email='other@example.org', is_staff=True)
+
+    def messages(self):
+        return sorted(Notification.objects.values_list('user__username', 'message', 'count'))
+
+    def test_a_burst_becomes_one_digest_per_user(self):
+        for index in range(12):
+            notify([self.admin, self.other_admin], f"New Booking request from @tutee{index}.", kind='new_booking_request')
+        notify([self.admin], "Something else.")
+        drain(backends=[])
+        self.assertEqual(self.messages(), [
+            ('@admin', "12 new booking requests.", 12),
+            ('@admin', "Something else.", 1),
+            ('@other', "12 new booking requests.", 12),
+        ])
+        self.assertEqual(User.objects.get(pk=self.admin.pk).unread_notification_count, 2)
+
+    def test_a_single_message_keeps_its_text(self):
+        notify([self.admin], "New Booking request from @tutee.", kind='new_booking_request')
+        drain(backends=[])
+        self.assertEqual(self.messages(), [('@admin', "New Booking request from @tutee.", 1)])
+
+    def test_later_messages_fold_into_the_unread_notification(self):
+        notify([self.admin], "New Booking request from @tutee.", kind='new_booking_request')
+        drain(backends=[])
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=1))
+        notify([self.admin] * 2, "New Booking request from @other.", kind='new_booking_request')
+        notify([self.admin], "You have a new inquiry from @tutee.", kind='inquiry')
+        drain(backends=[])
+        self.assertEqual(self.messages(), [
+            ('@admin', "3 new booking requests.", 3),
+            ('@admin', "You have a new inquiry from @tutee.", 1),
+        ])
+        digest = Notification.objects.get(kind='new_booking_request')
+        self.assertGreater(digest.created_at, timezone.now() - timedelta(hours=1))
+        self.assertEqual(User.objects.get(pk=self.admin.pk).unread_notification_count, 2)
+
+    def test_read_notifications_are_not_folded_into(self):
+        notify([self.admin], "New Booking request from @tutee.", kind='new_booking_request')
+        drain(backends=[])
+        Notification.objects.mark_read()
+        notify([self.admin], "New Booking request from @other.", kind='new_booking_request')
+        drain(backends=[])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_materialise_query_count(self):
+        notify([self.admin, self.other_admin] * 20, "New Booking request.", kind='new_booking_request')
+        Notification.objects.create(user=self.admin, message="New Booking request.", kind='new_booking_request')
+        messages = list(OutboxMessage.objects.all())
+        # The unread lookup, one UPDATE for the folded digests, the insert and the unread counters
+        with self.assertNumQueries(4):
+            materialise(messages)
+        self.assertEqual(self.messages(), [
+            ('@admin', "21 new booking requests.", 21),
+            ('@other', "20 new booking requests.", 20),
+        ])
@@ -0,0 +1,107 @@
+import base64
+import json
+from django.test import TestCase
+from django.utils.timezone import now
+from datetime import timedelta
+from tutorials.models import Booking, Request, Tutor, Tutee, User
+from tutorials.pagination import KeysetPaginator
+
+class KeysetPaginatorTestCase(TestCase):
+    """Tests of the keyset paginator."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', is_tutor=True
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutees = []
+        for index, first_name in enumerate(['Dora', 'Adam', 'Cleo', 'Bill', 'Erin']):
+            user = User.objects.create_user(
+                username=f'@tutee{index}', email=f'tutee{index}@example.org', first_name=first_name
+            )
+            self.tutees.append(Tutee.objects.create(user=user))
+        start = now() + timedelta(days=1)
+        # Two bookings per slot so the primary key tie breaker is exercised
+        self.bookings = [
+            Booking.objects.create(
+                date_time=start + timedelta(hours=index // 2),
+                duration=timedelta(hours=1),
+                language="Python",
+                tutor=self.tutor,
+                tutee=self.tutees[0],
+                price=10.00,
+            )
+            for index in range(7)
+        ]
+
+    def walk_forward(self, paginator):
+        page = paginator.get_page()
+        pages = [list(page)]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pages.append(list(page))
+        return page, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        paginator = KeysetPaginator(Booking.objects.all(), 3, ['date_time'])
+        _, pages = self.walk_forward(paginator)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.bookings)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        paginator = KeysetPaginator(Booking.objects.all(), 3, ['date_time'])
+        first_page = paginator.get_page()
+        self.assertFalse(first_page.has_previous())
+        second_page = paginator.get_page(first_page.next_cursor)
+        self.assertTrue(second_page.has_previous())
+        back = paginator.get_page(second_page.previous_cursor)
+        self.assertEqual(list(back), list(first_page))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_cursor_is_stable_under_inserts(self):
+        paginator = KeysetPaginator(Booking.objects.all(), 3, ['date_time'])
+        first_page = paginator.get_page()
+        Booking.objects.create(
+            date_time=now(),
+            duration=timedelta(hours=1),
+            language="Python",
+            tutor=self.tutor,
+            tutee=self.tutees[0],
+            price=10.00,
+        )
+        second_page = paginator.get_page(first_page.next_cursor)
+        self.assertEqual(list(second_page), self.bookings[3:6])
+
+    def test_descending_ordering(self):
+        for days in range(3):
+            Request.objects.create(
+                tutee=self.tutees[0], request_type="New Booking", created_at=now() - timedelta(days=days)
+            )
+        paginator = KeysetPaginator(Request.objects.all(), 2, ['-created_at'])
+        _, pages = self.walk_forward(paginator)
+        self.assertEqual(sum(pages, []), list(Request.objects.order_by('-created_at')))
+
+    def test_ordering_across_a_relation(self):
+        paginator = KeysetPaginator(Tutee.objects.all(), 2, ['user__first_name'])
+        _, pages = self.walk_forward(paginator)
+        names = [tutee.user.first_name for tutee in sum(pages, [])]
+        self.assertEqual(names, ['Adam', 'Bill', 'Cleo', 'Dora', 'Erin'])
+
+    def test_count_can_be_skipped(self):
+        self.assertEqual(KeysetPaginator(Booking.objects.all(), 3, ['date_time']).get_page().count, 7)
+        page = KeysetPaginator(Booking.objects.all(), 3, ['date_time'], count=False).get_page()
+        self.assertIsNone(page.count)
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(Booking.objects.all(), 3, ['date_time'])
+        for cursor in ['not-a-cursor', 'e30', '!!!']:
+            page = paginator.get_page(cursor)
+            self.assertEqual(list(page), self.bookings[:3])
+
+    def test_crafted_cursor_values_return_first_page(self):
+        paginator = KeysetPaginator(Booking.objects.all(), 3, ['date_time'])
+        for values in [[None, 1], [{'a': 1}, 1]]:
+            payload = json.dumps({'d': 'next', 'v': values}).encode()
+            page = paginator.get_page(base64.urlsafe_b64encode(payload).decode())
+            self.assertEqual(list(page), self.bookings[:3])
@@ -0,0 +1,103 @@
+"""Regression checks that the hot list queries are served by an index."""
+import base64
+import json
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from datetime import timedelta
+from tutorials.models import User, Tutor, Tutee, Booking, Request, Inquiry, Notification, RevenueRollup, Term
+from tutorials.pagination import KeysetPaginator
+from tutorials.scheduling import Slot, find_conflicts
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific.")
+class QueryPlanTestCase(TestCase):
+    """Run EXPLAIN QUERY PLAN on the filters used by the views and fail on full table scans or sorts."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@planner', email='planner@example.org')
+        self.tutor = Tutor.objects.create(user=self.user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=self.user)
+
+    def assert_no_full_scan(self, queryset, table):
+        """Check the plan searches `table` through an index rather than scanning it."""
+
+        self.check_plan(queryset.explain(), table)
+
+    def assert_pages_use_an_index(self, paginator, table, cursor_values, filtered=True):
+        """Check the first page, and the page after a cursor made of `cursor_values`, read `table` in index order."""
+
+        cursor = base64.urlsafe_b64encode(json.dumps({'d': 'next', 'v': cursor_values}).encode()).decode()
+        for page in (None, cursor):
+            with CaptureQueriesContext(connection) as queries:
+                paginator.get_page(page)
+            sql = next(query['sql'] for query in queries.captured_queries if f'FROM "{table}"' in query['sql'])
+            with connection.cursor() as explain:
+                explain.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[-1] for row in explain.fetchall())
+            self.check_plan(plan, table, filtered)
+
+    def check_plan(self, plan, table, filtered=True):
+        """Fail on a scan of `table` or a sort; unfiltered listings may walk a whole index in order."""
+
+        self.assertNotRegex(plan, rf'SCAN {table}(?! USING (COVERING )?INDEX)\b', msg=plan)
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, msg=plan)
+        access = 'SEARCH' if filtered else '(SCAN|SEARCH)'
+        self.assertRegex(plan, rf'{access} {table} USING (COVERING )?INDEX', msg=plan)
+
+    def test_tutor_bookings_use_an_index(self):
+        self.assert_no_full_scan(Booking.objects.for_listing().filter(tutor=self.tutor), 'tutorials_booking')
+
+    def test_tutee_bookings_use_an_index(self):
+        self.assert_no_full_scan(Booking.objects.for_listing().filter(tutee=self.tutee), 'tutorials_booking')
+
+    def test_bookings_due_for_completion_use_an_index(self):
+        self.assert_no_full_scan(Booking.objects.due_for_completion(), 'tutorials_booking')
+
+    def test_booking_conflicts_use_an_index(self):
+        slot = Slot(now(), timedelta(hours=1), self.tutor, self.tutee)
+        self.assert_no_full_scan(find_conflicts(slot), 'tutorials_booking')
+
+    def test_unread_notifications_use_an_index(self):
+        self.assert_no_full_scan(Notification.objects.filter(user=self.user, is_read=False), 'tutorials_notification')
+
+    def test_user_notifications_use_an_index(self):
+        self.assert_no_full_scan(Notification.objects.filter(user=self.user), 'tutorials_notification')
+
+    def test_received_inquiries_use_an_index(self):
+        self.assert_no_full_scan(Inquiry.objects.for_listing().filter(recipient=self.user), 'tutorials_inquiry')
+
+    def test_sent_inquiries_use_an_index(self):
+        self.assert_no_full_scan(Inquiry.objects.for_listing().filter(sender=self.user), 'tutorials_inquiry')
+
+    def test_requests_by_status_use_an_index(self):
+        self.assert_no_full_scan(Request.objects.for_listing().filter(status="Pending"), 'tutorials_request')
+
+    def test_tutee_requests_use_an_index(self):
+        self.assert_no_full_scan(Request.objects.for_listing().filter(tutee=self.tutee), 'tutorials_request')
+
+    def test_staff_booking_listing_pages_use_an_index(self):
+        paginator = KeysetPaginator(Booking.objects.for_listing(), 6, ['date_time'], count=False)
+        self.assert_pages_use_an_index(paginator, 'tutorials_booking', [now().isoformat(), 1], filtered=False)
+
+    def test_staff_request_queue_pages_use_an_index(self):
+        paginator = KeysetPaginator(Request.objects.for_listing(), 4, ['-created_at'])
+        self.assert_pages_use_an_index(paginator, 'tutorials_request', [now().isoformat(), 1], filtered=False)
+
+    def test_request_queue_by_status_pages_use_an_index(self):
+        paginator = KeysetPaginator(Request.objects.for_listing().filter(status="Pending"), 4, ['-created_at'])
+        self.assert_pages_use_an_index(paginator, 'tutorials_request', [now().isoformat(), 1])
+
+    def test_inbox_notification_pages_use_an_index(self):
+        paginator = KeysetPaginator(Notification.objects.filter(user=self.user), 20, ['-created_at'], count=False)
+        self.assert_pages_use_an_index(paginator, 'tutorials_notification', [now().isoformat(), 1])
+
+    def test_inbox_inquiry_pages_use_an_index(self):
+        paginator = KeysetPaginator(Inquiry.objects.for_listing().filter(recipient=self.user), 20, ['-created_at'], count=False)
+        self.assert_pages_use_an_index(paginator, 'tutorials_inquiry', [now().isoformat(), 1])
+
+    def test_revenue_rollup_pages_use_an_index(self):
+        rollups = RevenueRollup.objects.filter(term=Term.objects.first()).select_related('tutor__user')
+        paginator = KeysetPaginator(rollups, 20, ['-revenue'], count=False)
+        self.assert_pages_use_an_index(paginator, 'tutorials_revenuerollup', ['5.00', 1])
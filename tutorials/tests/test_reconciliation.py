@@ -0,0 +1,96 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from tutorials.models import Booking, Ledger, Tutor, Tutee, User
+from tutorials.reconciliation import reconcile
+
+class ReconcileTestCase(TestCase):
+    """Tests of matching bank statement lines to unpaid bookings."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', is_tutor=True)
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.jane = Tutee.objects.create(user=User.objects.create_user(
+            username='@janedoe', email='jane@example.org', first_name='Jane', last_name='Doe'
+        ))
+        self.john = Tutee.objects.create(user=User.objects.create_user(
+            username='@johnsmith', email='john@example.org', first_name='John', last_name='Smith'
+        ))
+        self.jane_booking = self._book(self.jane, 5, 20)
+        self.john_booking = self._book(self.john, 6, 20)
+
+    def _book(self, tutee, day, price, is_paid=False):
+        return Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2030, 10, day, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=self.tutor, tutee=tutee, price=price, is_paid=is_paid,
+        )
+
+    def _statement(self, *lines):
+        return StringIO("Date,Amount,Description\n" + "\n".join(lines) + "\n")
+
+    def test_unique_match_is_marked_paid(self):
+        report = reconcile(self._statement("2030-10-07,20.00,TUITION JANE DOE"))
+        self.assertEqual(report.matched, [(2, self.jane_booking.pk)])
+        self.assertEqual(report.updated, 1)
+        self.jane_booking.refresh_from_db()
+        self.john_booking.refresh_from_db()
+        self.assertTrue(self.jane_booking.is_paid)
+        self.assertFalse(self.john_booking.is_paid)
+        self.assertEqual(Ledger.objects.for_user(self.jane.user).paid, Decimal('20'))
+
+    def test_username_in_description_matches(self):
+        report = reconcile(self._statement("07/10/2030,£20,ref johnsmith"))
+        self.assertEqual(report.booking_ids, [self.john_booking.pk])
+
+    def test_dry_run_changes_nothing(self):
+        report = reconcile(self._statement("2030-10-07,20.00,Jane Doe"), apply=False)
+        self.assertEqual(report.booking_ids, [self.jane_booking.pk])
+        self.assertEqual(report.updated, 0)
+        self.assertFalse(Booking.objects.filter(is_paid=True).exists())
+
+    def test_wrong_amount_or_date_is_unmatched(self):
+        report = reconcile(self._statement("2030-10-07,25.00,Jane Doe", "2030-12-07,20.00,Jane Doe"))
+        self.assertEqual(report.matched, [])
+        self.assertEqual(report.unmatched_count, 2)
+        self.assertEqual(report.unmatched, [2, 3])
+
+    def test_several_candidates_are_ambiguous(self):
+        second = self._book(self.jane, 8, 20)
+        report = reconcile(self._statement("2030-10-07,20.00,Jane Doe"))
+        self.assertEqual(report.matched, [])
+        self.assertEqual(report.ambiguous, [(2, [self.jane_booking.pk, second.pk])])
+        self.assertFalse(Booking.objects.filter(is_paid=True).exists())
+
+    def test_each_booking_is_claimed_once(self):
+        report = reconcile(self._statement("2030-10-07,20.00,Jane Doe", "2030-10-08,20.00,Jane Doe"))
+        self.assertEqual(report.booking_ids, [self.jane_booking.pk])
+        self.assertEqual(report.unmatched_count, 1)
+
+    def test_paid_bookings_are_ignored(self):
+        self.jane_booking.is_paid = True
+        self.jane_booking.save()
+        report = reconcile(self._statement("2030-10-07,20.00,Jane Doe"))
+        self.assertEqual(report.matched, [])
+
+    def test_invalid_lines_and_outgoing_payments(self):
+        report = reconcile(self._statement("someday,20.00,Jane Doe", "2030-10-07,abc,Jane Doe", "2030-10-07,-20.00,Jane Doe"))
+        self.assertEqual([line for line, _ in report.invalid], [2, 3])
+        self.assertEqual(report.unmatched_count, 0)
+
+    def test_missing_columns(self):
+        report = reconcile(StringIO("Date,Amount\n2030-10-07,20.00\n"))
+        self.assertEqual(report.invalid, [(1, "missing columns: description")])
+
+    def test_large_statement_runs_a_fixed_number_of_queries(self):
+        lines = [f"2030-10-07,{index % 90 + 1}.00,Someone Else" for index in range(50000)]
+        lines.append("2030-10-07,20.00,Jane Doe")
+        with CaptureQueriesContext(connection) as queries:
+            report = reconcile(self._statement(*lines))
+        self.assertEqual(report.booking_ids, [self.jane_booking.pk])
+        self.assertEqual(report.unmatched_count, 50000)
+        self.assertEqual(len(report.unmatched), 50)
+        self.assertLessEqual(len(queries), 12)
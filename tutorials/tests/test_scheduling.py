@@ -0,0 +1,224 @@
+from django.test import TestCase
+from django.utils import timezone
+from django.core.exceptions import ValidationError
+from datetime import date, datetime, time, timedelta
+from tutorials.models import Booking, NewBookingRequest, OutboxMessage, Request, Tutor, Tutee, User
+from tutorials.scheduling import (
+    Slot, book_series, find_conflicts, find_conflicts_bulk, find_free_slots, series_starts, term_end_date
+)
+
+class ConflictDetectionTestCase(TestCase):
+    """Tests of the booking conflict detection service."""
+
+    def setUp(self):
+        self.tutor = self.create_tutor('@tutor')
+        self.other_tutor = self.create_tutor('@othertutor')
+        self.tutee = self.create_tutee('@tutee')
+        self.other_tutee = self.create_tutee('@othertutee')
+        self.start = timezone.make_aware(datetime(2030, 1, 7, 10, 0))
+        # 10:00 - 12:00 with tutor and tutee
+        self.booking = self.create_booking(self.start, timedelta(hours=2), self.tutor, self.tutee)
+
+    def create_tutor(self, username):
+        user = User.objects.create_user(username=username, email=f'{username[1:]}@example.org', is_tutor=True)
+        return Tutor.objects.create(user=user, languages_specialised="Python")
+
+    def create_tutee(self, username):
+        user = User.objects.create_user(username=username, email=f'{username[1:]}@example.org')
+        return Tutee.objects.create(user=user)
+
+    def create_booking(self, date_time, duration, tutor, tutee):
+        return Booking.objects.create(
+            date_time=date_time, duration=duration, language="Python", tutor=tutor, tutee=tutee, price=10.00
+        )
+
+    def test_booking_running_into_the_slot_is_a_conflict(self):
+        slot = Slot(self.start + timedelta(hours=1), timedelta(hours=1), self.tutor, self.other_tutee)
+        self.assertEqual(list(find_conflicts(slot)), [self.booking])
+
+    def test_booking_starting_inside_the_slot_is_a_conflict(self):
+        slot = Slot(self.start - timedelta(minutes=30), timedelta(hours=1), self.tutor, self.other_tutee)
+        self.assertEqual(list(find_conflicts(slot)), [self.booking])
+
+    def test_tutee_double_booking_is_a_conflict(self):
+        slot = Slot(self.start + timedelta(minutes=30), timedelta(minutes=30), self.other_tutor, self.tutee)
+        self.assertEqual(list(find_conflicts(slot)), [self.booking])
+
+    def test_adjacent_slots_do_not_conflict(self):
+        before = Slot(self.start - timedelta(hours=1), timedelta(hours=1), self.tutor, self.tutee)
+        after = Slot(self.start + timedelta(hours=2), timedelta(hours=1), self.tutor, self.tutee)
+        self.assertFalse(find_conflicts(before).exists())
+        self.assertFalse(find_conflicts(after).exists())
+
+    def test_other_participants_do_not_conflict(self):
+        slot = Slot(self.start, timedelta(hours=1), self.other_tutor, self.other_tutee)
+        self.assertFalse(find_conflicts(slot).exists())
+
+    def test_excluded_booking_does_not_conflict_with_itself(self):
+        slot = Slot(self.start, timedelta(hours=2), self.tutor, self.tutee)
+        self.assertFalse(find_conflicts(slot, exclude=self.booking.pk).exists())
+
+    def test_bulk_mode_checks_every_slot_in_one_query(self):
+        other_booking = self.create_booking(
+            self.start + timedelta(days=7), timedelta(minutes=30), self.other_tutor, self.tutee
+        )
+        slots = [
+            Slot(self.start + timedelta(hours=1), timedelta(hours=1), self.tutor, self.other_tutee),
+            Slot(self.start + timedelta(hours=3), timedelta(hours=1), self.tutor, self.tutee),
+            Slot(self.start + timedelta(days=7), timedelta(hours=1), self.tutor, self.tutee),
+            Slot(self.start, timedelta(hours=3), self.tutor, self.tutee),
+        ]
+        with self.assertNumQueries(1):
+            results = find_conflicts_bulk(slots)
+        self.assertEqual(results, [[self.booking], [], [other_booking], [self.booking]])
+
+    def test_bulk_mode_matches_single_mode(self):
+        for hours in range(0, 48, 5):
+            self.create_booking(self.start + timedelta(hours=hours, minutes=30), timedelta(hours=1), self.tutor, self.other_tutee)
+        slots = [
+            Slot(self.start + timedelta(minutes=30 * step), timedelta(hours=1), self.tutor, self.tutee)
+            for step in range(96)
+        ]
+        # Single mode returns its clashes in no particular order, bulk mode by date and time
+        expected = [sorted(find_conflicts(slot), key=lambda booking: (booking.date_time, booking.pk)) for slot in slots]
+        self.assertEqual(find_conflicts_bulk(slots), expected)
+
+    def test_bulk_mode_without_slots(self):
+        self.assertEqual(find_conflicts_bulk([]), [])
+
+
+class FreeSlotSearchTestCase(TestCase):
+    """Tests of the free slot search."""
+
+    def setUp(self):
+        self.python_tutor = self.create_tutor('@pythontutor', "Python, SQL")
+        self.busy_tutor = self.create_tutor('@busytutor', "Python")
+        self.java_tutor = self.create_tutor('@javatutor', "Java, JavaScript")
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org')
+        self.tutee = Tutee.objects.create(user=tutee_user)
+        self.day = (timezone.now() + timedelta(days=7)).date()
+
+    def create_tutor(self, username, languages):
+        user = User.objects.create_user(username=username, email=f'{username[1:]}@example.org', is_tutor=True)
+        return Tutor.objects.create(user=user, languages_specialised=languages)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.day, time(hour, minute)))
+
+    def book(self, tutor, start, duration, tutee=None):
+        return Booking.objects.create(
+            date_time=start, duration=duration, language="Python", tutor=tutor,
+            tutee=tutee or self.tutee, price=10.00
+        )
+
+    def test_only_tutors_teaching_the_language_are_offered(self):
+        slots = find_free_slots("Java", timedelta(hours=1), self.day, self.day)
+        self.assertEqual({slot.tutor for slot in slots}, {self.java_tutor})
+        # "R" is a substring of "JavaScript" but the Java tutor does not teach it
+        self.assertEqual(find_free_slots("R", timedelta(hours=1), self.day, self.day), [])
+
+    def test_slots_avoid_existing_bookings(self):
+        other_tutee = Tutee.objects.create(
+            user=User.objects.create_user(username='@other', email='other@example.org')
+        )
+        self.book(self.python_tutor, self.at(9), timedelta(hours=2), other_tutee)
+        self.book(self.busy_tutor, self.at(9), timedelta(hours=3), other_tutee)
+        slots = find_free_slots("Python", timedelta(hours=1), self.day, self.day, limit=100)
+        python_starts = [slot.date_time for slot in slots if slot.tutor == self.python_tutor]
+        busy_starts = [slot.date_time for slot in slots if slot.tutor == self.busy_tutor]
+        self.assertEqual(python_starts[0], self.at(11))
+        self.assertEqual(busy_starts[0], self.at(12))
+        self.assertEqual(python_starts[-1], self.at(17))
+
+    def test_slots_are_ranked_by_start_then_lighter_load(self):
+        self.book(self.busy_tutor, self.at(17), timedelta(minutes=30))
+        slots = find_free_slots("Python", timedelta(minutes=30), self.day, self.day, limit=2)
+        self.assertEqual([(slot.tutor, slot.date_time) for slot in slots], [
+            (self.python_tutor, self.at(9)), (self.busy_tutor, self.at(9)),
+        ])
+
+    def test_tutee_bookings_block_every_tutor(self):
+        self.book(self.java_tutor, self.at(9), timedelta(hours=4))
+        slots = find_free_slots("Python", timedelta(hours=1), self.day, self.day, tutee=self.tutee)
+        self.assertEqual(slots[0].date_time, self.at(13))
+
+    def test_slots_do_not_run_past_the_working_day(self):
+        slots = find_free_slots("Python", timedelta(hours=3), self.day, self.day, limit=100)
+        self.assertTrue(all(slot.date_time + timedelta(hours=3) <= self.at(18) for slot in slots))
+
+    def test_search_uses_a_fixed_number_of_queries(self):
+        for hour in range(9, 17):
+            self.book(self.busy_tutor, self.at(hour), timedelta(minutes=30))
+        # Tutors, their loads, one week of bookings and the tutors of the chosen slots
+        with self.assertNumQueries(4):
+            find_free_slots("Python", timedelta(hours=1), self.day, self.day + timedelta(days=30), tutee=self.tutee)
+
+
+class RecurringSeriesTestCase(TestCase):
+    """Tests of booking a recurring request's whole series."""
+
+    def setUp(self):
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor', is_tutor=True
+        )
+        tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', first_name='Tia', last_name='Tutee'
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=tutee_user)
+        self.request = Request.objects.create(tutee=self.tutee, request_type="New Booking")
+        self.new_booking_request = NewBookingRequest.objects.create(
+            request=self.request, frequency="Weekly", duration=timedelta(hours=1), language="Python"
+        )
+        self.first = timezone.make_aware(datetime(2030, 9, 2, 10, 0))
+
+    def test_term_end_date(self):
+        self.assertEqual(term_end_date(date(2030, 10, 1)), date(2030, 12, 31))
+        self.assertEqual(term_end_date(date(2030, 2, 1)), date(2030, 4, 30))
+        self.assertEqual(term_end_date(date(2030, 6, 1)), date(2030, 7, 31))
+        self.assertIsNone(term_end_date(date(2030, 8, 1)))
+
+    def test_series_starts(self):
+        until = date(2030, 9, 30)
+        self.assertEqual(len(series_starts(self.first, "Weekly", until)), 5)
+        self.assertEqual(len(series_starts(self.first, "Bi-weekly", until)), 3)
+        self.assertEqual(series_starts(self.first, "One-time", until), [self.first])
+
+    def test_series_starts_stop_at_the_last_representable_date(self):
+        first = timezone.make_aware(datetime(9999, 11, 1, 10, 0))
+        self.assertEqual(len(series_starts(first, "Monthly", date.max)), 2)
+        self.assertEqual(len(series_starts(first, "Weekly", date.max)), 9)
+
+    def test_monthly_series_keeps_the_day_or_uses_the_last_day(self):
+        first = timezone.make_aware(datetime(2031, 1, 31, 10, 0))
+        starts = series_starts(first, "Monthly", date(2031, 4, 30))
+        self.assertEqual([start.date() for start in starts], [
+            date(2031, 1, 31), date(2031, 2, 28), date(2031, 3, 31), date(2031, 4, 30)
+        ])
+
+    def test_twelve_week_series_is_booked_in_a_handful_of_queries(self):
+        with self.assertNumQueries(10):
+            bookings = book_series(self.new_booking_request, self.tutor, self.first, 20, until=date(2030, 11, 24))
+        self.assertEqual(len(bookings), 12)
+        self.assertEqual(Booking.objects.filter(tutor=self.tutor, tutee=self.tutee).count(), 12)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, "Approved")
+        self.assertEqual(OutboxMessage.objects.filter(user=self.tutor.user).count(), 1)
+        self.assertEqual(OutboxMessage.objects.filter(user=self.tutee.user).count(), 1)
+
+    def test_series_defaults_to_the_end_of_the_term(self):
+        bookings = book_series(self.new_booking_request, self.tutor, self.first, 20)
+        self.assertEqual(timezone.localtime(bookings[-1].date_time).date(), date(2030, 12, 30))
+
+    def test_clash_rejects_the_whole_series(self):
+        other_tutee = Tutee.objects.create(user=User.objects.create_user(username='@other', email='other@example.org'))
+        Booking.objects.create(
+            date_time=self.first + timedelta(weeks=3, minutes=30), duration=timedelta(hours=1),
+            language="Python", tutor=self.tutor, tutee=other_tutee, price=10,
+        )
+        with self.assertRaises(ValidationError) as raised:
+            book_series(self.new_booking_request, self.tutor, self.first, 20, until=date(2030, 11, 24))
+        self.assertEqual(len(raised.exception.messages), 1)
+        self.assertEqual(Booking.objects.filter(tutee=self.tutee).count(), 0)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, "Pending")
@@ -0,0 +1,93 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
+from tutorials.models import Booking, NewBookingRequest, Request, Tutor, Tutee, User
+
+class ApproveBookingRequestViewTestCase(TestCase):
+    """Tests of approving a new booking request as a series of bookings."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.org', password='Password123', is_staff=True
+        )
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor', is_tutor=True
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', first_name='Tia', last_name='Tutee', password='Password123'
+        )
+        self.tutee = Tutee.objects.create(user=self.tutee_user)
+        self.request = Request.objects.create(tutee=self.tutee, request_type="New Booking")
+        NewBookingRequest.objects.create(
+            request=self.request, frequency="Bi-weekly", duration=timedelta(hours=1), language="Python"
+        )
+        self.url = reverse('approve_booking_request', args=[self.request.id])
+        self.first = timezone.make_aware(datetime(2030, 9, 2, 10, 0))
+        self.form_input = {
+            'tutor': self.tutor.pk,
+            'first_date_time': '2030-09-02T10:00',
+            'until': '2030-10-31',
+            'price': '20.00',
+        }
+
+    def test_approve_booking_request_url(self):
+        self.assertEqual(self.url, f'/requests/{self.request.id}/approve')
+
+    def test_get_approve_booking_request(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'approve_booking_request.html')
+
+    def test_non_staff_cannot_approve(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_successful_approval_books_the_series(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, self.form_input, follow=True)
+        self.assertRedirects(response, reverse('requests'))
+        bookings = Booking.objects.filter(tutee=self.tutee)
+        self.assertEqual(bookings.count(), 5)
+        self.assertEqual(bookings.first().date_time, self.first)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, "Approved")
+
+    def test_approved_request_cannot_be_approved_again(self):
+        self.client.login(username='@admin', password='Password123')
+        self.client.post(self.url, self.form_input)
+        response = self.client.post(self.url, self.form_input)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Booking.objects.filter(tutee=self.tutee).count(), 5)
+
+    def test_clashing_series_is_not_booked(self):
+        other_tutee = Tutee.objects.create(user=User.objects.create_user(username='@other', email='other@example.org'))
+        Booking.objects.create(
+            date_time=self.first + timedelta(weeks=4), duration=timedelta(hours=1),
+            language="Python", tutor=self.tutor, tutee=other_tutee, price=10,
+        )
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, self.form_input)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertEqual(Booking.objects.filter(tutee=self.tutee).count(), 0)
+
+    def test_series_cannot_run_past_the_horizon(self):
+        self.client.login(username='@admin', password='Password123')
+        for until in ('2031-09-04', '9999-12-31'):
+            response = self.client.post(self.url, {**self.form_input, 'until': until})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('until', response.context['form'].errors)
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_tutor_must_teach_the_language(self):
+        self.tutor.languages_specialised = "Java"
+        self.tutor.save()
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, self.form_input)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tutor', response.context['form'].errors)
+        self.assertEqual(Booking.objects.count(), 0)
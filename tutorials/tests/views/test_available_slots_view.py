@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tutorials.models import Tutor, Tutee, User
+
+class AvailableSlotsViewTestCase(TestCase):
+    """Tests of the free slot search endpoint."""
+
+    def setUp(self):
+        self.url = reverse('available_slots')
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.org', password='Password123', is_staff=True
+        )
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor', is_tutor=True
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', password='Password123'
+        )
+        self.tutee = Tutee.objects.create(user=self.tutee_user)
+        day = (timezone.now() + timedelta(days=7)).date()
+        self.params = {
+            'language': 'Python',
+            'duration': '1:00:00',
+            'start': day.isoformat(),
+            'end': day.isoformat(),
+            'tutee': self.tutee.pk,
+        }
+
+    def test_available_slots_url(self):
+        self.assertEqual(self.url, '/new_booking/slots')
+
+    def test_get_available_slots_as_staff(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()['slots']
+        self.assertTrue(slots)
+        self.assertEqual(slots[0]['tutor'], self.tutor.pk)
+        self.assertEqual(slots[0]['tutor_name'], 'Tom Tutor')
+        self.assertTrue(slots[0]['date_time'].endswith('T09:00'))
+
+    def test_get_available_slots_rejects_invalid_parameters(self):
+        self.client.login(username='@admin', password='Password123')
+        for field, value in [('language', 'Cobol'), ('duration', '0:10:00'), ('start', 'soon')]:
+            params = self.params.copy()
+            params[field] = value
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+    def test_get_available_slots_rejects_impossible_dates(self):
+        self.client.login(username='@admin', password='Password123')
+        for field in ('start', 'end'):
+            params = self.params.copy()
+            params[field] = '2024-02-30'
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['error'], "Enter a valid date range.")
+
+    def test_get_available_slots_as_non_staff_is_forbidden(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_available_slots_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 302)
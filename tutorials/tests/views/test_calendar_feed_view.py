@@ -0,0 +1,105 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
+from uuid import uuid4
+from tutorials.models import Booking, CalendarFeed, Tutor, Tutee, User
+
+class CalendarFeedViewTestCase(TestCase):
+    """Tests of the iCalendar feeds."""
+
+    def setUp(self):
+        self.tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor',
+            password='Password123', is_tutor=True
+        )
+        self.tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', first_name='Tia', last_name='Tutee', password='Password123'
+        )
+        self.tutor = Tutor.objects.create(user=self.tutor_user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=self.tutee_user)
+        self.booking = Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2030, 1, 7, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=self.tutor, tutee=self.tutee, price=10,
+        )
+        self.feed = self.tutee_user.calendar_feed
+        self.url = reverse('calendar_feed', args=[self.feed.token])
+
+    def get_feed(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content).decode() if response.streaming else ''
+        return response, body
+
+    def test_calendar_feed_url(self):
+        self.assertEqual(self.url, f'/calendar/{self.feed.token}.ics')
+
+    def test_feed_lists_the_users_bookings(self):
+        response, body = self.get_feed()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:booking-{self.booking.pk}@testserver\r\n', body)
+        self.assertIn('DTSTART:20300107T100000Z\r\nDTEND:20300107T110000Z\r\n', body)
+        self.assertIn('SUMMARY:Python session: Tom Tutor with Tia Tutee\r\n', body)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+
+    def test_feed_does_not_list_other_bookings(self):
+        other_user = User.objects.create_user(username='@other', email='other@example.org')
+        Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2030, 1, 8, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=self.tutor, tutee=Tutee.objects.create(user=other_user), price=10,
+        )
+        _, body = self.get_feed()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+
+    def test_unknown_token_is_not_found(self):
+        response = self.client.get(reverse('calendar_feed', args=[uuid4()]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_modified_without_reading_bookings(self):
+        response, _ = self.get_feed()
+        with self.assertNumQueries(1):
+            response, _ = self.get_feed(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(1):
+            response, _ = self.get_feed(if_modified_since=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changing_a_booking_changes_the_etag(self):
+        response, _ = self.get_feed()
+        self.booking.date_time += timedelta(hours=1)
+        self.booking.save()
+        response, body = self.get_feed(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('DTSTART:20300107T110000Z', body)
+
+    def test_moving_a_booking_to_another_tutee_changes_the_old_feed(self):
+        response, _ = self.get_feed()
+        other_user = User.objects.create_user(username='@other', email='other@example.org')
+        self.booking.tutee = Tutee.objects.create(user=other_user)
+        self.booking.save()
+        response, body = self.get_feed(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('BEGIN:VEVENT', body)
+
+    def test_deleting_a_booking_changes_the_etag(self):
+        response, _ = self.get_feed()
+        self.booking.delete()
+        response, _ = self.get_feed(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_dashboard_links_to_the_feed(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, self.url)
+
+    def test_new_users_get_a_feed(self):
+        user = User.objects.create_user(username='@new', email='new@example.org')
+        self.assertTrue(CalendarFeed.objects.filter(user=user).exists())
+
+    def test_dashboard_does_not_create_feeds(self):
+        self.feed.delete()
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CalendarFeed.objects.filter(user=self.tutee_user).exists())
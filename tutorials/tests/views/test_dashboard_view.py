@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils.timezone import now, timezone
@@ -52,6 +54,7 @@ class DashboardViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'dashboard.html')
         self.assertIn('bookings', response.context)
+        self.assertContains(response, f'value="{self.tutee_user.username}"')
 
     def test_dashboard_view_accessible_to_tutor(self):
         self.client.login(username='tutor_user', password='tutorpass')
@@ -116,3 +119,33 @@ class DashboardViewTest(TestCase):
         response = self.client.post(reverse('dashboard'), {'delete_booking_id': 999})
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Booking not found.")
+
+    def test_dashboard_view_derives_completion_without_writing(self):
+        finished_booking = Booking.objects.create(
+            date_time=now() - timedelta(days=2),
+            duration=timedelta(hours=1),
+            language="Python",
+            tutor=self.tutor,
+            tutee=self.tutee,
+        )
+        self.client.login(username='admin_user', password='adminpass')
+        response = self.client.get(reverse('dashboard'), {'status': 'Completed'})
+        self.assertIn(finished_booking, response.context['bookings'])
+        finished_booking.refresh_from_db()
+        self.assertFalse(finished_booking.is_completed)
+
+    def test_dashboard_view_query_count_does_not_grow_with_bookings(self):
+        self.client.login(username='admin_user', password='adminpass')
+        with CaptureQueriesContext(connection) as few_bookings:
+            self.client.get(reverse('dashboard'))
+        for day in range(2, 6):
+            Booking.objects.create(
+                date_time=now() + timedelta(days=day),
+                duration=timedelta(hours=1),
+                language="Python",
+                tutor=self.tutor,
+                tutee=self.tutee,
+            )
+        with CaptureQueriesContext(connection) as many_bookings:
+            self.client.get(reverse('dashboard'))
+        self.assertEqual(len(few_bookings), len(many_bookings))
@@ -0,0 +1,77 @@
+import csv
+import json
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
+from tutorials.models import Booking, Tutor, Tutee, User
+
+class ExportInvoicesViewTestCase(TestCase):
+    """Tests of the streaming booking exports."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.org', password='Password123', is_staff=True
+        )
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor',
+            password='Password123', is_tutor=True
+        )
+        tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', first_name='Tia', last_name='Tutee'
+        )
+        tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        tutee = Tutee.objects.create(user=tutee_user)
+        self.paid = Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2020, 1, 6, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=tutor, tutee=tutee, price=20, is_paid=True,
+        )
+        self.pending = Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2030, 1, 6, 10, 0)), duration=timedelta(minutes=90),
+            language="Python", tutor=tutor, tutee=tutee, price=15,
+        )
+
+    def get_export(self, export_format, **params):
+        response = self.client.get(reverse('export_invoices', args=[export_format]), params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_url(self):
+        self.assertEqual(reverse('export_invoices', args=['csv']), '/invoices/export.csv')
+
+    def test_csv_export(self):
+        self.client.login(username='@admin', password='Password123')
+        response, body = self.get_export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual([row['id'] for row in rows], [str(self.paid.pk), str(self.pending.pk)])
+        self.assertEqual(rows[0]['tutor_name'], 'Tom Tutor')
+        self.assertEqual(rows[0]['tutee_name'], 'Tia Tutee')
+        self.assertEqual(rows[0]['price'], '20.00')
+        self.assertEqual(rows[0]['is_paid'], 'True')
+        self.assertEqual(rows[0]['is_completed'], 'True')
+        self.assertEqual(rows[1]['duration_minutes'], '90')
+        self.assertEqual(rows[1]['is_completed'], 'False')
+
+    def test_jsonl_export_with_status_filter(self):
+        self.client.login(username='@admin', password='Password123')
+        response, body = self.get_export('jsonl', status='Pending')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.pending.pk)
+        self.assertFalse(rows[0]['is_paid'])
+
+    def test_export_uses_one_query_for_the_rows(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(reverse('export_invoices', args=['csv']))
+        with self.assertNumQueries(1):
+            b''.join(response.streaming_content)
+
+    def test_unknown_format_is_not_found(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(reverse('export_invoices', args=['xml']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_staff_cannot_export(self):
+        self.client.login(username='@tutor', password='Password123')
+        response = self.client.get(reverse('export_invoices', args=['csv']))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,76 @@
+"""Tests of the inbox and its paginated JSON pages."""
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import Inquiry, Notification, User
+from tutorials.views import INBOX_PAGE_SIZE
+
+class InboxViewTestCase(TestCase):
+    """Tests of the inbox view and the inbox_page endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='@admin', email='admin@example.org', password='Password123', is_staff=True)
+        self.other = User.objects.create_user(username='@tutee', email='tutee@example.org', password='Password123')
+        Inquiry.objects.bulk_create(
+            [Inquiry(sender=self.other, recipient=self.user, message=f"Question {index}") for index in range(INBOX_PAGE_SIZE + 5)]
+            + [Inquiry(sender=self.user, recipient=self.other, message="Answer")]
+        )
+        Notification.objects.bulk_create([Notification(user=self.user, message=f"Note {index}") for index in range(INBOX_PAGE_SIZE + 1)])
+        Notification.objects.create(user=self.other, message="Not yours")
+        self.client.login(username='@admin', password='Password123')
+
+    def page_url(self, tab, cursor=None):
+        url = reverse('inbox_page', args=[tab])
+        return f'{url}?cursor={cursor}' if cursor else url
+
+    def test_inbox_renders_the_first_page_of_the_selected_tab(self):
+        response = self.client.get(reverse('inbox'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'inbox.html')
+        self.assertEqual(len(response.context['page']), INBOX_PAGE_SIZE)
+        self.assertTrue(response.context['page'].has_next())
+        self.assertContains(response, "Question 24")
+        self.assertNotContains(response, "Question 0<")
+        self.assertNotContains(response, "Note 0")
+
+    def test_sent_tab(self):
+        response = self.client.get(reverse('inbox') + '?tab=sent')
+        self.assertEqual([inquiry.message for inquiry in response.context['page']], ["Answer"])
+        self.assertContains(response, "<strong>To:</strong>@tutee")
+
+    def test_inbox_marks_notifications_as_read(self):
+        self.client.get(reverse('inbox'))
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+        self.assertTrue(Notification.objects.filter(user=self.other, is_read=False).exists())
+
+    def test_pages_walk_the_whole_tab_with_one_query_each(self):
+        messages, cursor = [], None
+        while True:
+            # Session, user and the page with its senders and recipients
+            with self.assertNumQueries(3):
+                data = self.client.get(self.page_url('received', cursor)).json()
+            messages += [item['message'] for item in data['items']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(messages, [f"Question {index}" for index in reversed(range(INBOX_PAGE_SIZE + 5))])
+
+    def test_page_items(self):
+        item = self.client.get(self.page_url('received')).json()['items'][0]
+        self.assertEqual(item['sender'], '@tutee')
+        self.assertEqual(item['status'], 'Pending')
+        self.assertIn('Respond', item['html'])
+
+    def test_notifications_tab_only_shows_the_users_notifications(self):
+        data = self.client.get(self.page_url('notifications')).json()
+        self.assertEqual(len(data['items']), INBOX_PAGE_SIZE)
+        data = self.client.get(self.page_url('notifications', data['next_cursor'])).json()
+        self.assertEqual([item['message'] for item in data['items']], ["Note 0"])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_unknown_tab(self):
+        self.assertEqual(self.client.get(self.page_url('archive')).status_code, 404)
+
+    def test_page_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.page_url('received'))
+        self.assertEqual(response.status_code, 302)
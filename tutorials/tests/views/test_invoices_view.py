@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+from datetime import timedelta
+from decimal import Decimal
+from tutorials.models import Booking, Tutor, Tutee, User
+
+class InvoicesViewTestCase(TestCase):
+    """Tests of the invoices view."""
+
+    def setUp(self):
+        self.url = reverse('invoices')
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.org', password='Password123', is_staff=True
+        )
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', password='Password123', is_tutor=True
+        )
+        self.tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', password='Password123'
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        self.tutee = Tutee.objects.create(user=self.tutee_user)
+        self.booking = self.create_booking(20)
+
+    def create_booking(self, price, is_paid=False):
+        return Booking.objects.create(
+            date_time=now() + timedelta(days=1), duration=timedelta(hours=1), language="Python",
+            tutor=self.tutor, tutee=self.tutee, price=price, is_paid=is_paid,
+        )
+
+    def test_totals_are_shown_to_tutees(self):
+        self.create_booking(15, is_paid=True)
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.get(self.url)
+        total = response.context['total']
+        self.assertEqual((total.paid, total.remaining), (Decimal('15'), Decimal('20')))
+
+    def test_staff_do_not_compute_totals(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url)
+        self.assertIsNone(response.context['total'])
+
+    def test_toggling_payment_updates_the_totals(self):
+        self.client.login(username='@tutee', password='Password123')
+        self.client.get(self.url)
+        response = self.client.post(self.url, {'booking_id': self.booking.id}, follow=True)
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.is_paid)
+        total = response.context['total']
+        self.assertEqual((total.paid, total.remaining), (Decimal('20'), Decimal('0')))
+
+    def test_batch_mark_as_paid(self):
+        second = self.create_booking(15)
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(
+            self.url + '?status=Pending', {'mark': 'paid', 'booking_ids': [self.booking.id, second.id]}
+        )
+        self.assertRedirects(response, self.url + '?status=Pending')
+        self.assertEqual(Booking.objects.filter(is_paid=True).count(), 2)
+
+    def test_batch_mark_uses_a_single_update(self):
+        bookings = [self.create_booking(10) for _ in range(20)]
+        self.client.login(username='@admin', password='Password123')
+        self.client.get(self.url)
+        with self.assertNumQueries(9):  # Session, user, savepoints, changed rows, UPDATE, ledgers, rollups
+            self.client.post(self.url, {'mark': 'paid', 'booking_ids': [booking.id for booking in bookings]})
+        self.assertEqual(Booking.objects.filter(is_paid=True).count(), 20)
+
+    def test_batch_mark_as_unpaid_updates_the_ledger(self):
+        self.client.login(username='@tutee', password='Password123')
+        self.client.get(self.url)
+        self.client.logout()
+        self.booking.is_paid = True
+        self.booking.save()
+        self.client.login(username='@admin', password='Password123')
+        self.client.post(self.url, {'mark': 'unpaid', 'booking_ids': [self.booking.id]})
+        self.client.login(username='@tutee', password='Password123')
+        total = self.client.get(self.url).context['total']
+        self.assertEqual((total.paid, total.remaining), (Decimal('0'), Decimal('20')))
+
+    def test_non_staff_cannot_batch_mark(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.post(self.url, {'mark': 'paid', 'booking_ids': [self.booking.id]})
+        self.assertEqual(response.status_code, 403)
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.is_paid)
+
+    def test_batch_mark_without_selection(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, {'mark': 'paid'}, follow=True)
+        self.assertContains(response, "Select the bookings to mark as paid or unpaid.")
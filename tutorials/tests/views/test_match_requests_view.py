@@ -0,0 +1,79 @@
+from django.contrib import messages
+from django.contrib.messages import get_messages
+from django.test import TestCase
+from django.urls import reverse
+from datetime import timedelta
+from tutorials.models import NewBookingRequest, Request, Tutor, Tutee, User
+
+class MatchRequestsViewTestCase(TestCase):
+    """Tests of the tutor matching page."""
+
+    def setUp(self):
+        self.url = reverse('match_requests')
+        User.objects.create_user(username='@admin', email='admin@example.org', password='Password123', is_staff=True)
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor', is_tutor=True
+        )
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org', password='Password123')
+        tutee = Tutee.objects.create(user=tutee_user)
+        self.new_booking_requests = [
+            NewBookingRequest.objects.create(
+                request=Request.objects.create(tutee=tutee, request_type="New Booking"),
+                language="Python", duration=timedelta(hours=1),
+            )
+            for _ in range(3)
+        ]
+
+    def test_match_requests_url(self):
+        self.assertEqual(self.url, '/requests/match')
+
+    def test_get_lists_the_proposals(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'match_requests.html')
+        self.assertEqual(response.context['proposal_count'], 3)
+        self.assertContains(response, 'Tom Tutor')
+
+    def test_non_staff_are_forbidden(self):
+        self.client.login(username='@tutee', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_accept_selected(self):
+        self.client.login(username='@admin', password='Password123')
+        chosen = self.new_booking_requests[0]
+        response = self.client.post(self.url, {'action': 'accept_selected', 'proposals': [f'{chosen.pk}:{self.tutor.pk}']})
+        self.assertRedirects(response, self.url)
+        self.assertEqual(list(NewBookingRequest.objects.filter(assigned_tutor=self.tutor)), [chosen])
+
+    def test_accept_selected_rejects_unknown_and_unqualified_tutors(self):
+        java_tutor = Tutor.objects.create(
+            user=User.objects.create_user(username='@java', email='java@example.org', is_tutor=True),
+            languages_specialised="Java",
+        )
+        first, second, third = self.new_booking_requests
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, {'action': 'accept_selected', 'proposals': [
+            f'{first.pk}:{self.tutor.pk}', f'{second.pk}:{java_tutor.pk}', f'{third.pk}:999999',
+        ]})
+        self.assertRedirects(response, self.url)
+        self.assertEqual(list(NewBookingRequest.objects.filter(assigned_tutor__isnull=False)), [first])
+        errors = [str(message) for message in get_messages(response.wsgi_request) if message.level == messages.ERROR]
+        self.assertEqual(len(errors), 1)
+        self.assertIn(f'request {second.pk} to tutor {java_tutor.pk}', errors[0])
+        self.assertIn(f'request {third.pk} to tutor 999999', errors[0])
+
+    def test_accept_all(self):
+        self.client.login(username='@admin', password='Password123')
+        self.client.post(self.url, {'action': 'accept_all'})
+        self.assertEqual(NewBookingRequest.objects.filter(assigned_tutor=self.tutor).count(), 3)
+
+    def test_schedule_form_starts_with_the_assigned_tutor(self):
+        chosen = self.new_booking_requests[0]
+        chosen.assigned_tutor = self.tutor
+        chosen.save()
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(reverse('approve_booking_request', args=[chosen.request_id]))
+        self.assertEqual(response.context['form'].initial['tutor'], self.tutor.pk)
@@ -3,7 +3,7 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
 from django.utils import timezone
-from tutorials.models import Booking, Notification, Tutor, Tutee
+from tutorials.models import Booking, OutboxMessage, Tutor, Tutee
 from tutorials.forms import BookingForm
 
 User = get_user_model()
@@ -55,8 +55,8 @@ class NewBookingViewTest(TestCase):
         self.assertEqual(booking.language, 'Python')
         self.assertEqual(booking.price, 50.00)
 
-        tutor_notification = Notification.objects.get(user=self.tutor_user)
-        tutee_notification = Notification.objects.get(user=self.tutee_user)
+        tutor_notification = OutboxMessage.objects.get(user=self.tutor_user)
+        tutee_notification = OutboxMessage.objects.get(user=self.tutee_user)
 
         self.assertEqual(tutor_notification.message, "You have a new booking with Tutee User.")
         self.assertEqual(tutee_notification.message, "You have a new booking with Tutor User.")
@@ -0,0 +1,210 @@
+"""Query budgets for every URL of the application."""
+from django.db import transaction
+from django.test import TestCase
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils.timezone import now
+from datetime import timedelta
+from urllib.parse import urlencode
+from code_tutors.urls import urlpatterns
+from tutorials.models import (
+    User, Tutor, Tutee, Booking, Request, NewBookingRequest, Inquiry, Notification
+)
+from tutorials.tests.helpers import QueryBudgetTesterMixin, query_budget
+
+# Maximum number of queries a GET of each URL may run, keyed by URL name.
+QUERY_BUDGETS = {
+    'admin:index': 4,
+    '': 0,
+    'dashboard': 6,
+    'new_booking': 5,
+    'available_slots': 6,
+    'tutee_lookup': 3,
+    'request_summary': 3,
+    'calendar_feed': 2,
+    'edit_booking': 7,
+    'log_out': 4,
+    'password': 3,
+    'profile': 3,
+    'tutee_sign_up': 0,
+    'tutor_sign_up': 0,
+    'invoices': 5,
+    'export_invoices': 3,
+    'reconcile_payments': 3,
+    'tutors': 5,
+    'revenue_report': 6,
+    'tutees': 5,
+    'requests': 6,
+    'new_booking_request': 3,
+    'change_cancel_booking_request': 6,
+    'request_info': 3,
+    'match_requests': 9,
+    'approve_booking_request': 5,
+    'inbox': 5,
+    'inbox_page': 3,
+    'notification_stream': 2,
+    'send_inquiry': 4,
+    'respond_to_inquiry': 6,
+    'delete_notification': 2,
+}
+
+
+class QueryBudgetTestCase(QueryBudgetTesterMixin, TestCase):
+    """Check every view stays within its query budget and does not scale with the data."""
+
+    SMALL_ROWS = 1
+    LARGE_ROWS = 12
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='@admin', email='admin@example.org', first_name='Ada', last_name='Admin',
+            password='Password123', is_staff=True, is_superuser=True
+        )
+        self.tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor',
+            password='Password123', is_tutor=True
+        )
+        self.tutee_user = User.objects.create_user(
+            username='@tutee', email='tutee@example.org', first_name='Tia', last_name='Tutee',
+            password='Password123'
+        )
+        self.tutor = Tutor.objects.create(user=self.tutor_user, languages_specialised="Python, Java")
+        self.tutee = Tutee.objects.create(user=self.tutee_user)
+        self.row_count = 0
+        self.add_rows(self.SMALL_ROWS)
+        self.booking = Booking.objects.filter(tutor=self.tutor).first()
+        self.request = Request.objects.filter(tutee=self.tutee).first()
+        self.inquiry = Inquiry.objects.filter(recipient=self.admin).first()
+        self.calendar_feed = self.tutor_user.calendar_feed
+
+    def add_rows(self, count):
+        """Add `count` of every row type the views list, each with its own users."""
+
+        for _ in range(count):
+            index = self.row_count = self.row_count + 1
+            tutor_user = User.objects.create_user(
+                username=f'@tutor{index}', email=f'tutor{index}@example.org',
+                first_name='Tutor', last_name=f'Number{index}', is_tutor=True
+            )
+            tutee_user = User.objects.create_user(
+                username=f'@tutee{index}', email=f'tutee{index}@example.org',
+                first_name='Tutee', last_name=f'Number{index}'
+            )
+            tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+            tutee = Tutee.objects.create(user=tutee_user)
+            for booking_tutor, booking_tutee in [(tutor, tutee), (self.tutor, self.tutee)]:
+                Booking.objects.create(
+                    date_time=now() + timedelta(days=index),
+                    duration=timedelta(hours=1),
+                    language="Python",
+                    tutor=booking_tutor,
+                    tutee=booking_tutee,
+                    price=25.00,
+                )
+            for request_tutee in [tutee, self.tutee]:
+                request = Request.objects.create(tutee=request_tutee, request_type="New Booking")
+                NewBookingRequest.objects.create(
+                    request=request, duration=timedelta(hours=1), language="Python"
+                )
+            for user in [self.admin, self.tutor_user, self.tutee_user]:
+                Inquiry.objects.create(sender=tutee_user, recipient=user, message="Hello")
+                Inquiry.objects.create(sender=user, recipient=tutee_user, message="Hi")
+                Notification.objects.create(user=user, message="Something happened.")
+
+    def url_cases(self):
+        """Return (url name, user to log in as, url factory) for every URL of the application."""
+
+        return [
+            ('admin:index', self.admin, lambda: reverse('admin:index')),
+            ('', None, lambda: reverse('')),
+            ('dashboard', self.admin, lambda: reverse('dashboard')),
+            ('new_booking', self.admin, lambda: reverse('new_booking')),
+            ('available_slots', self.admin, lambda: reverse('available_slots') + '?' + urlencode({
+                'language': 'Python', 'duration': '1:00:00',
+                'start': (now() + timedelta(days=1)).date().isoformat(),
+                'end': (now() + timedelta(days=30)).date().isoformat(),
+            })),
+            ('tutee_lookup', self.admin, lambda: reverse('tutee_lookup') + '?q=@'),
+            ('request_summary', self.admin, lambda: reverse('request_summary')),
+            ('calendar_feed', None, lambda: reverse('calendar_feed', args=[self.calendar_feed.token])),
+            ('edit_booking', self.admin, lambda: reverse('edit_booking', args=[self.booking.id])),
+            ('log_out', self.admin, lambda: reverse('log_out')),
+            ('password', self.admin, lambda: reverse('password')),
+            ('profile', self.admin, lambda: reverse('profile')),
+            ('tutee_sign_up', None, lambda: reverse('tutee_sign_up')),
+            ('tutor_sign_up', None, lambda: reverse('tutor_sign_up')),
+            ('invoices', self.admin, lambda: reverse('invoices')),
+            ('export_invoices', self.admin, lambda: reverse('export_invoices', args=['csv'])),
+            ('reconcile_payments', self.admin, lambda: reverse('reconcile_payments')),
+            ('tutors', self.admin, lambda: reverse('tutors')),
+            ('revenue_report', self.admin, lambda: reverse('revenue_report')),
+            ('tutees', self.admin, lambda: reverse('tutees')),
+            ('requests', self.admin, lambda: reverse('requests')),
+            ('new_booking_request', self.tutee_user, lambda: reverse('new_booking_request')),
+            ('change_cancel_booking_request', self.tutee_user, lambda: reverse('change_cancel_booking_request')),
+            ('request_info', self.admin, lambda: reverse('request_info', args=[self.request.id])),
+            ('match_requests', self.admin, lambda: reverse('match_requests')),
+            ('approve_booking_request', self.admin, lambda: reverse('approve_booking_request', args=[self.request.id])),
+            ('inbox', self.admin, lambda: reverse('inbox')),
+            ('inbox_page', self.admin, lambda: reverse('inbox_page', args=['received'])),
+            ('notification_stream', self.admin, lambda: reverse('notification_stream')),
+            ('send_inquiry', self.admin, lambda: reverse('send_inquiry')),
+            ('respond_to_inquiry', self.admin, lambda: reverse('respond_to_inquiry', args=[self.inquiry.id])),
+            ('delete_notification', self.admin, lambda: reverse('delete_notification')),
+        ]
+
+    def test_query_budget_fails_when_exceeded(self):
+        with self.assertRaises(AssertionError):
+            with self.assert_query_budget(1, label='two counts'):
+                User.objects.count()
+                Booking.objects.count()
+
+    def test_query_budget_records_queries_and_sql_time(self):
+        with self.assert_query_budget(1) as budget:
+            User.objects.count()
+        self.assertEqual(len(budget), 1)
+        self.assertGreaterEqual(budget.sql_time, 0)
+
+    @query_budget(1)
+    def test_query_budget_decorator(self):
+        User.objects.count()
+
+    def test_every_url_has_a_query_budget(self):
+        url_names = set()
+        for pattern in urlpatterns:
+            if isinstance(pattern, URLResolver):
+                url_names.add(f'{pattern.namespace}:index')
+            elif isinstance(pattern, URLPattern) and pattern.name is not None:
+                url_names.add(pattern.name)
+        self.assertEqual(url_names - set(QUERY_BUDGETS), set())
+        self.assertEqual({name for name, _, _ in self.url_cases()}, set(QUERY_BUDGETS))
+
+    def test_views_stay_within_budget_and_do_not_scale_with_rows(self):
+        for url_name, user, url in self.url_cases():
+            with self.subTest(url=url_name), transaction.atomic():
+                def log_in():
+                    if user is not None:
+                        self.client.force_login(user)
+                    else:
+                        self.client.logout()
+
+                def hit_view():
+                    response = self.client.get(url())
+                    self.assertLess(response.status_code, 400)
+                    if response.streaming:
+                        # Streamed bodies only query the database as they are consumed
+                        b''.join(response.streaming_content)
+
+                def grow_data():
+                    self.add_rows(self.LARGE_ROWS - self.SMALL_ROWS)
+                    # Views such as log_out end the session, start a fresh one outside the measurement
+                    log_in()
+
+                log_in()
+                self.assert_queries_do_not_scale(
+                    hit_view,
+                    grow_data,
+                    QUERY_BUDGETS[url_name],
+                    label=url_name or 'log_in',
+                )
+                # Start the next URL from the small data set again
+                transaction.set_rollback(True)
@@ -0,0 +1,68 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
+from tutorials.models import Booking, Tutor, Tutee, User
+
+class ReconcilePaymentsViewTestCase(TestCase):
+    """Tests of the bank statement upload."""
+
+    def setUp(self):
+        self.url = reverse('reconcile_payments')
+        User.objects.create_user(username='@admin', email='admin@example.org', password='Password123', is_staff=True)
+        tutor_user = User.objects.create_user(username='@tutor', email='tutor@example.org', password='Password123', is_tutor=True)
+        tutee_user = User.objects.create_user(username='@janedoe', email='jane@example.org', first_name='Jane', last_name='Doe')
+        tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python")
+        tutee = Tutee.objects.create(user=tutee_user)
+        self.booking = Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2030, 10, 5, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=tutor, tutee=tutee, price=20,
+        )
+
+    def _upload(self, content=b"\xef\xbb\xbfDate,Amount,Description\n2030-10-06,20.00,Jane Doe\n"):
+        return SimpleUploadedFile('statement.csv', content, content_type='text/csv')
+
+    def test_reconcile_payments_url(self):
+        self.assertEqual(self.url, '/invoices/reconcile/')
+
+    def test_get_shows_the_form(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'reconcile_payments.html')
+        self.assertIsNone(response.context['report'])
+
+    def test_non_staff_are_forbidden(self):
+        self.client.login(username='@tutor', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_dry_run_reports_without_marking(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, {'statement': self._upload(), 'dry_run': 'on'})
+        self.assertEqual(response.context['report'].booking_ids, [self.booking.pk])
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.is_paid)
+
+    def test_upload_marks_bookings_as_paid(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, {'statement': self._upload()})
+        self.assertEqual(response.context['report'].updated, 1)
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.is_paid)
+
+    def test_malformed_csv_upload_is_an_error(self):
+        self.client.login(username='@admin', password='Password123')
+        # An unterminated quote runs the field on past the csv module's size limit
+        content = b'Date,Amount,Description\n2030-10-06,20.00,"Jane Doe' + b'x' * 200000 + b'\n'
+        response = self.client.post(self.url, {'statement': self._upload(content)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('statement', response.context['form'].errors)
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.is_paid)
+
+    def test_undecodable_upload_is_an_error(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.post(self.url, {'statement': self._upload(b"Date,Amount,Description\n\xff\xfe\n")})
+        self.assertTrue(response.context['form'].errors)
@@ -1,6 +1,8 @@
 from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
 from django.urls import reverse
-from tutorials.models import User, Tutee, Request, NewBookingRequest, ChangeCancelBookingRequest
+from tutorials.models import User, Tutor, Tutee, Booking, Request, NewBookingRequest, ChangeCancelBookingRequest
 
 class RequestInfoViewTestCase(TestCase):
     """Tests of the RequestInfo view."""
@@ -70,4 +72,20 @@ class RequestInfoViewTestCase(TestCase):
         response = self.client.get(reverse('request_info', args=[self.request.id]))
         self.assertEqual(response.status_code, 200)
         self.assertIsNone(response.context.get('new_booking_request'))
-        self.assertIsNone(response.context.get('change_cancel_request'))
\ No newline at end of file
+        self.assertIsNone(response.context.get('change_cancel_request'))
+
+    def test_get_request_info_joins_the_request_subtypes(self):
+        tutor = Tutor.objects.create(user=self.staff_user, languages_specialised="Python")
+        booking = Booking.objects.create(
+            date_time=timezone.now() + timedelta(days=1), duration=timedelta(hours=1),
+            language="Python", tutor=tutor, tutee=self.tutee, price=20,
+        )
+        change_cancel_request = ChangeCancelBookingRequest.objects.create(request=self.request, booking=booking)
+        self.client.login(username=self.user.username, password='Password123')
+
+        # Session, user and the request with everything the page shows
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('request_info', args=[self.request.id]))
+        self.assertEqual(response.context['change_cancel_request'], change_cancel_request)
+        self.assertIsNone(response.context['new_booking_request'])
+        self.assertContains(response, str(booking))
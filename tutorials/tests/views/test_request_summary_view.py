@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import Request, Tutee, User
+
+class RequestSummaryViewTestCase(TestCase):
+    """Tests of the cached request queue summary and its JSON endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('request_summary')
+        User.objects.create_user(username='@admin', email='admin@example.org', password='Password123', is_staff=True)
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org', password='Password123')
+        self.tutee = Tutee.objects.create(user=tutee_user)
+        for request_type, status, is_late in [
+            ("New Booking", "Pending", True),
+            ("New Booking", "Pending", False),
+            ("New Booking", "Approved", False),
+            ("Change/Cancel", "Pending", True),
+        ]:
+            Request.objects.create(tutee=self.tutee, request_type=request_type, status=status, is_late=is_late)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_request_summary_url(self):
+        self.assertEqual(self.url, '/requests/summary.json')
+
+    def test_summary_counts(self):
+        self.client.login(username='@admin', password='Password123')
+        summary = self.client.get(self.url).json()
+        self.assertEqual(summary['total'], 4)
+        self.assertEqual(summary['pending'], 3)
+        self.assertEqual(summary['approved'], 1)
+        self.assertEqual(summary['late'], 2)
+        self.assertEqual(summary['by_type']['New Booking'], {'total': 3, 'pending': 2})
+        self.assertEqual(summary['by_type']['Change/Cancel'], {'total': 1, 'pending': 1})
+
+    def test_summary_is_cached(self):
+        self.client.login(username='@admin', password='Password123')
+        self.client.get(self.url)
+        # Only the session and the user are read once the summary is cached
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_saving_deleting_and_bulk_updates_clear_the_cache(self):
+        self.client.login(username='@admin', password='Password123')
+        self.client.get(self.url)
+        Request.objects.create(tutee=self.tutee, request_type="New Booking")
+        self.assertEqual(self.client.get(self.url).json()['pending'], 4)
+        Request.objects.filter(status="Pending").update(status="Approved")
+        self.assertEqual(self.client.get(self.url).json()['pending'], 0)
+        Request.objects.all().delete()
+        self.assertEqual(self.client.get(self.url).json()['total'], 0)
+
+    def test_non_staff_are_forbidden(self):
+        self.client.login(username='@tutee', password='Password123')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_requests_page_shows_the_summary_to_staff(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(reverse('requests'))
+        self.assertEqual(response.context['summary']['pending'], 3)
+        self.assertContains(response, 'id="pending-requests-badge"')
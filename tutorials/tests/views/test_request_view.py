@@ -1,7 +1,8 @@
 """Tests of the home view."""
 from django.test import TestCase
+from datetime import timedelta
 from django.urls import reverse
-from tutorials.models import User, Tutee, Request, Notification
+from tutorials.models import User, Tutee, Request, NewBookingRequest, OutboxMessage
 
 class RequestViewTestCase(TestCase):
     """Tests of the Request view."""
@@ -64,7 +65,7 @@ class RequestViewTestCase(TestCase):
         
     def test_approve_request(self):
         self.client.login(username=self.staff_user.username, password='Password123')
-        response = self.client.post(self.url, {'approve_request_id': self.request.id})
+        response = self.client.post(self.url, {'approve_request_id': self.request.id}, follow=True)
         self.assertEqual(response.status_code, 200)
         self.request.refresh_from_db()
         self.assertEqual(self.request.status, 'Approved')
@@ -72,7 +73,7 @@ class RequestViewTestCase(TestCase):
     
     def test_delete_request(self):
         self.client.login(username=self.staff_user.username, password='Password123')
-        response = self.client.post(self.url, {'delete_request_id': self.request.id})
+        response = self.client.post(self.url, {'delete_request_id': self.request.id}, follow=True)
         self.assertEqual(response.status_code, 200)
         with self.assertRaises(Request.DoesNotExist):
             self.request.refresh_from_db()
@@ -80,7 +81,7 @@ class RequestViewTestCase(TestCase):
     
     def test_invalid_request_id(self):
         self.client.login(username=self.staff_user.username, password='Password123')
-        response = self.client.post(self.url, {'approve_request_id': 9999})  
+        response = self.client.post(self.url, {'approve_request_id': 9999}, follow=True)  
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Request not found.")
     
@@ -107,18 +108,65 @@ class RequestViewTestCase(TestCase):
     
     def test_notification_on_approve_request(self):
         self.client.login(username=self.staff_user.username, password='Password123')
-        response = self.client.post(self.url, {'approve_request_id': self.request.id})
+        response = self.client.post(self.url, {'approve_request_id': self.request.id}, follow=True)
         self.assertEqual(response.status_code, 200)
-        notification = Notification.objects.last()
+        notification = OutboxMessage.objects.last()
         self.assertIsNotNone(notification)
         self.assertEqual(notification.user, self.request.tutee.user)
         self.assertIn("approved", notification.message)
 
     def test_notification_on_delete_request(self):
         self.client.login(username=self.staff_user.username, password='Password123')
-        response = self.client.post(self.url, {'delete_request_id': self.request.id})
+        response = self.client.post(self.url, {'delete_request_id': self.request.id}, follow=True)
         self.assertEqual(response.status_code, 200)
-        notification = Notification.objects.last()
+        notification = OutboxMessage.objects.last()
         self.assertIsNotNone(notification)
         self.assertEqual(notification.user, self.request.tutee.user)
         self.assertIn("deleted", notification.message)
+
+    def test_post_redirects_back_to_the_filtered_queue(self):
+        self.client.login(username=self.staff_user.username, password='Password123')
+        response = self.client.post(self.url + '?status=Pending', {'approve_request_id': self.request.id})
+        self.assertRedirects(response, self.url + '?status=Pending')
+
+    def test_non_staff_cannot_approve(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.post(self.url, {'approve_request_id': self.request.id})
+        self.assertEqual(response.status_code, 403)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, 'Pending')
+
+    def test_bulk_approve_runs_a_fixed_number_of_queries(self):
+        requests = [self.request] + [
+            Request.objects.create(tutee=self.tutee, request_type="New Booking") for _ in range(20)
+        ]
+        already_approved = Request.objects.create(tutee=self.tutee, request_type="Change", status="Approved")
+        self.client.login(username=self.staff_user.username, password='Password123')
+
+        # Session and user, then a read, one UPDATE and one INSERT into the outbox inside a savepoint
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, {
+                'action': 'approve', 'request_ids': [request.id for request in requests] + [already_approved.id],
+            })
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(Request.objects.filter(status='Approved').count(), 22)
+        self.assertEqual(OutboxMessage.objects.filter(user=self.user, message__contains='approved').count(), 21)
+
+    def test_bulk_reject_deletes_requests_and_their_details(self):
+        requests = [self.request] + [
+            Request.objects.create(tutee=self.tutee, request_type="New Booking") for _ in range(5)
+        ]
+        for request in requests[1:]:
+            NewBookingRequest.objects.create(request=request, duration=timedelta(hours=1), language="Python")
+        self.client.login(username=self.staff_user.username, password='Password123')
+
+        response = self.client.post(self.url, {'action': 'reject', 'request_ids': [request.id for request in requests]}, follow=True)
+        self.assertContains(response, "6 requests deleted successfully.")
+        self.assertFalse(Request.objects.exists())
+        self.assertFalse(NewBookingRequest.objects.exists())
+        self.assertEqual(OutboxMessage.objects.filter(message__contains='deleted').count(), 6)
+
+    def test_bulk_action_without_selection(self):
+        self.client.login(username=self.staff_user.username, password='Password123')
+        response = self.client.post(self.url, {'action': 'approve'}, follow=True)
+        self.assertContains(response, "Invalid action.")
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from tutorials.models import Booking, Term, Tutor, Tutee, User
+
+class RevenueReportViewTestCase(TestCase):
+    """Tests of the revenue report."""
+
+    def setUp(self):
+        self.url = reverse('revenue_report')
+        User.objects.create_user(username='@admin', email='admin@example.org', password='Password123', is_staff=True)
+        tutor_user = User.objects.create_user(
+            username='@tutor', email='tutor@example.org', first_name='Tom', last_name='Tutor',
+            password='Password123', is_tutor=True
+        )
+        tutee_user = User.objects.create_user(username='@tutee', email='tutee@example.org')
+        self.tutor = Tutor.objects.create(user=tutor_user, languages_specialised="Python, Java")
+        self.tutee = Tutee.objects.create(user=tutee_user)
+        for day, language, price in [(7, "Python", 20), (8, "Java", 15), (9, "Python", 10)]:
+            Booking.objects.create(
+                date_time=timezone.make_aware(datetime(2030, 10, day, 10, 0)), duration=timedelta(minutes=90),
+                language=language, tutor=self.tutor, tutee=self.tutee, price=price,
+            )
+        Booking.objects.create(
+            date_time=timezone.make_aware(datetime(2031, 2, 3, 10, 0)), duration=timedelta(hours=1),
+            language="Python", tutor=self.tutor, tutee=self.tutee, price=50,
+        )
+
+    def test_revenue_report_url(self):
+        self.assertEqual(self.url, '/reports/revenue/')
+
+    def test_report_defaults_to_the_latest_term(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['term'].start_date, date(2031, 1, 1))
+        self.assertEqual(response.context['total']['revenue'], Decimal('50'))
+
+    def test_report_for_a_term(self):
+        self.client.login(username='@admin', password='Password123')
+        term = Term.objects.get(start_date=date(2030, 9, 1))
+        response = self.client.get(self.url, {'term': term.pk})
+        total = response.context['total']
+        self.assertEqual(total['revenue'], Decimal('45'))
+        self.assertEqual(total['hours'], 4.5)
+        languages = {row['language']: row['revenue'] for row in response.context['languages']}
+        self.assertEqual(languages, {'Java': Decimal('15'), 'Python': Decimal('30')})
+        self.assertContains(response, 'Tom Tutor')
+        self.assertContains(response, f'<option value="{term.pk}" selected>September-Christmas 2030</option>', html=True)
+
+    def test_report_does_not_read_bookings(self):
+        self.client.login(username='@admin', password='Password123')
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse(any('tutorials_booking' in query['sql'] for query in queries.captured_queries))
+
+    def test_non_staff_cannot_see_the_report(self):
+        self.client.login(username='@tutor', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
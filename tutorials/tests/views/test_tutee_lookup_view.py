@@ -0,0 +1,39 @@
+from django.test import TestCase
+from django.urls import reverse
+from tutorials.models import Tutee, User
+
+class TuteeLookupViewTestCase(TestCase):
+    """Tests of the tutee username search used by the request queue's filter."""
+
+    def setUp(self):
+        self.url = reverse('tutee_lookup')
+        User.objects.create_user(username='@admin', email='admin@example.org', password='Password123', is_staff=True)
+        for username, first_name in [('@alice', 'Alice'), ('@alan', 'Alan'), ('@bob', 'Bob')]:
+            user = User.objects.create_user(
+                username=username, email=f'{first_name.lower()}@example.org', first_name=first_name,
+                last_name='Tutee', password='Password123'
+            )
+            Tutee.objects.create(user=user)
+        # Users without a tutee profile are never suggested
+        User.objects.create_user(username='@albert', email='albert@example.org', is_tutor=True)
+
+    def test_tutee_lookup_url(self):
+        self.assertEqual(self.url, '/requests/tutees')
+
+    def test_prefix_matches_tutees_in_username_order(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url, {'q': '@al'})
+        self.assertEqual(response.json()['tutees'], [
+            {'username': '@alan', 'name': 'Alan Tutee'},
+            {'username': '@alice', 'name': 'Alice Tutee'},
+        ])
+
+    def test_empty_query_returns_nothing(self):
+        self.client.login(username='@admin', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['tutees'], [])
+
+    def test_non_staff_are_forbidden(self):
+        self.client.login(username='@bob', password='Password123')
+        response = self.client.get(self.url, {'q': '@al'})
+        self.assertEqual(response.status_code, 403)
@@ -5,40 +5,67 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ImproperlyConfigured
 from django.shortcuts import redirect, render, get_object_or_404
+from django.template.loader import render_to_string
 from django.views import View
 from django.views.generic import TemplateView
 from django.views.generic.edit import FormView, UpdateView
 from django.urls import reverse
-from tutorials.forms import LogInForm, PasswordForm, UserForm, TuteeSignUpForm, TutorSignUpForm, NewBookingRequestForm, ChangeCancelBookingRequestForm, BookingForm, InquiryForm
-from tutorials.helpers import login_prohibited
-from .models import User, Booking, Tutor, Tutee, Request, NewBookingRequest, ChangeCancelBookingRequest, Inquiry, Notification
-from django.http import HttpResponse
-from django.utils.timezone import now
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from tutorials.forms import LogInForm, PasswordForm, UserForm, TuteeSignUpForm, TutorSignUpForm, NewBookingRequestForm, ChangeCancelBookingRequestForm, BookingForm, InquiryForm, ApproveBookingRequestForm, ReconcilePaymentsForm
+from .models import User, Booking, Tutor, Tutee, Request, NewBookingRequest, ChangeCancelBookingRequest, Inquiry, Notification, CalendarFeed, Ledger, RevenueRollup, Term, ROLLUP_TOTALS, request_summary
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
+from django.utils import timezone
+from django.db.models import Sum
+from django.utils.dateparse import parse_date, parse_duration
+from tutorials.pagination import KeysetPaginator
+from tutorials.scheduling import find_free_slots
+from tutorials.ical import render_feed
+from tutorials.exports import RENDERERS, export_rows
+from tutorials.reconciliation import reconcile
+from tutorials.matching import Proposal, accept_proposals, check_proposals, propose_matches
+from tutorials.notifications import mark_all_read, notify, notify_each, notify_staff
+from tutorials.live import event_stream
+from django.db import transaction
+import csv
+import io
 from urllib.parse import urlencode
 from django.core.exceptions import PermissionDenied
 
+# Longest date range, in days, the free slot search accepts (roughly a term)
+AVAILABLE_SLOTS_MAX_DAYS = 120
+# Most bookings the invoices page marks as paid or unpaid in one request
+INVOICE_BATCH_MAX = 1000
+# Most requests approved or rejected in one POST
+REQUEST_BATCH_MAX = 1000
+# Most proposals the matching page lists; the rest can still be accepted all at once
+MATCH_DISPLAY_LIMIT = 200
+# Most tutees the request queue's filter suggests at once
+TUTEE_LOOKUP_LIMIT = 10
+# Inquiries or notifications per inbox page; further pages are fetched as the list is scrolled
+INBOX_PAGE_SIZE = 20
+
+
 @login_required
 def tutors(request):
     """Display a list of tutors."""
     if not request.user.is_staff:
         return redirect('dashboard')
 
-    tutors_list = Tutor.objects.all()  # Retrieve all tutors from the database
+    tutors_list = Tutor.objects.select_related('user')  # Retrieve all tutors from the database
     sort_order = request.GET.get('sort', 'A-Z')  # Default to A-Z
 
 
     if sort_order == 'Z-A':
-        tutors_list = tutors_list.order_by('-user__first_name')
+        ordering = ['-user__first_name']
     else:
-        tutors_list = tutors_list.order_by('user__first_name')
+        ordering = ['user__first_name']
 
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(tutors_list, 10) 
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(tutors_list, 10, ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
     query_params = request.GET.copy()
-    query_params.pop('page', None)
+    query_params.pop('cursor', None)
     query_string = urlencode(query_params)
 
     return render(request, 'tutors.html', {
@@ -52,22 +79,21 @@ def tutees(request):
     if not request.user.is_staff:
         return redirect('dashboard')
 
-    tutees_list = Tutee.objects.all()  # Retrieve all Tutee objects
+    tutees_list = Tutee.objects.select_related('user')  # Retrieve all Tutee objects
     sort_order = request.GET.get('sort', 'A-Z')  # Default to A-Z
 
     # Apply sorting based on the sort parameter
     if sort_order == 'Z-A':
-        tutees_list = tutees_list.order_by('-user__first_name')  # Sort by first name, descending
+        ordering = ['-user__first_name']  # Sort by first name, descending
     else:  # Default to A-Z
-        tutees_list = tutees_list.order_by('user__first_name')  # Sort by first name, ascending
+        ordering = ['user__first_name']  # Sort by first name, ascending
 
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(tutees_list, 10) 
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(tutees_list, 10, ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
-    # Prepare query parameters excluding 'page'
+    # Prepare query parameters excluding 'cursor'
     query_params = request.GET.copy()
-    query_params.pop('page', None)
+    query_params.pop('cursor', None)
     query_string = urlencode(query_params)
 
     return render(request, 'tutees.html', {
@@ -82,24 +108,17 @@ class NewBookingView(LoginRequiredMixin, FormView):
     template_name = "new_booking.html"
 
     def form_valid(self, form):
-        # Save the booking instance
-        self.object = form.save()
-
-        # Create a notification for the tutor and tutee after the booking is created
-        tutor = self.object.tutor.user  # Access the tutor's user instance
-        tutee = self.object.tutee.user  # Access the tutee's user instance
-
-        # Send a notification to the tutor
-        Notification.objects.create(
-            user=tutor,
-            message=f"You have a new booking with {tutee.full_name()}.",
-        )
-
-        # Send a notification to the tutee
-        Notification.objects.create(
-            user=tutee,
-            message=f"You have a new booking with {tutor.full_name()}.",
-        )
+        with transaction.atomic():
+            # Save the booking instance
+            self.object = form.save()
+
+            # Notify the tutor and tutee of the new booking
+            tutor = self.object.tutor.user  # Access the tutor's user instance
+            tutee = self.object.tutee.user  # Access the tutee's user instance
+            notify_each([
+                (tutor, f"You have a new booking with {tutee.full_name()}."),
+                (tutee, f"You have a new booking with {tutor.full_name()}."),
+            ])
 
         messages.success(self.request, "Booking successfully created!")
         return redirect(self.get_success_url())
@@ -107,6 +126,97 @@ class NewBookingView(LoginRequiredMixin, FormView):
     def get_success_url(self):
         return reverse('dashboard')
 
+@login_required
+def request_summary_json(request):
+    """Return the cached request queue counts as JSON, for the navbar badge."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': "Only admins can see the request queue."}, status=403)
+    return JsonResponse(request_summary())
+
+@login_required
+def tutee_lookup(request):
+    """Return the tutees whose username starts with `q` as JSON, for the request queue's filter."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': "Only admins can search for tutees."}, status=403)
+
+    prefix = request.GET.get('q', '').strip()
+    if not prefix:
+        return JsonResponse({'tutees': []})
+    # A range on the unique username index, unlike LIKE which SQLite cannot serve from it
+    users = (
+        User.objects.filter(tutee_user__isnull=False, username__gte=prefix, username__lt=prefix + '\U0010ffff')
+        .order_by('username')
+        .values('username', 'first_name', 'last_name')[:TUTEE_LOOKUP_LIMIT]
+    )
+    return JsonResponse({'tutees': [
+        {'username': user['username'], 'name': f"{user['first_name']} {user['last_name']}"}
+        for user in users
+    ]})
+
+@login_required
+def available_slots(request):
+    """Return ranked free (tutor, start) pairs as JSON for the booking form."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': "Only admins can search for free slots."}, status=403)
+
+    language = request.GET.get('language')
+    duration = parse_duration(request.GET.get('duration') or '')
+    try:
+        first_day = parse_date(request.GET.get('start') or '')
+        last_day = parse_date(request.GET.get('end') or '')
+    except ValueError:
+        # Well formed but impossible, such as 2024-02-30
+        first_day = last_day = None
+    tutee_id = request.GET.get('tutee')
+
+    if language not in dict(settings.LANGUAGE_CHOICES):
+        return JsonResponse({'error': "Select a valid language."}, status=400)
+    if duration not in dict(settings.DURATION_CHOICES):
+        return JsonResponse({'error': "Select a valid duration."}, status=400)
+    if first_day is None or last_day is None or last_day < first_day:
+        return JsonResponse({'error': "Enter a valid date range."}, status=400)
+    if (last_day - first_day).days > AVAILABLE_SLOTS_MAX_DAYS:
+        return JsonResponse({'error': f"The date range cannot exceed {AVAILABLE_SLOTS_MAX_DAYS} days."}, status=400)
+    tutee = Tutee.objects.filter(pk=tutee_id).first() if tutee_id and tutee_id.isdigit() else None
+
+    slots = find_free_slots(language, duration, first_day, last_day, tutee=tutee)
+    return JsonResponse({'slots': [
+        {
+            'tutor': slot.tutor.pk,
+            'tutor_name': slot.tutor.user.full_name(),
+            'date_time': timezone.localtime(slot.date_time).strftime("%Y-%m-%dT%H:%M"),
+            'load': slot.load,
+        }
+        for slot in slots
+    ]})
+
+def _calendar_feed(request, token):
+    """Look the feed up once per request, as both conditional checks and the view need it."""
+    if not hasattr(request, '_calendar_feed'):
+        request._calendar_feed = CalendarFeed.objects.select_related('user').filter(token=token).first()
+    return request._calendar_feed
+
+
+def _calendar_feed_etag(request, token):
+    feed = _calendar_feed(request, token)
+    return f'{feed.token}-{feed.updated_at.timestamp()}' if feed else None
+
+
+def _calendar_feed_last_modified(request, token):
+    feed = _calendar_feed(request, token)
+    return feed.updated_at if feed else None
+
+
+@condition(etag_func=_calendar_feed_etag, last_modified_func=_calendar_feed_last_modified)
+def calendar_feed(request, token):
+    """Stream a user's bookings as an iCalendar feed; polls answered from the feed row alone get a 304."""
+    feed = _calendar_feed(request, token)
+    if feed is None:
+        raise Http404("Unknown calendar.")
+    response = StreamingHttpResponse(render_feed(feed, request.get_host()), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="bookings.ics"'
+    return response
+
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'dashboard.html'
 
@@ -119,7 +229,6 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         status_filter = self.request.GET.get('status')
         tutor_filter = self.request.GET.get('tutor')
         tutee_filter = self.request.GET.get('tutee')
-        page = self.request.GET.get('page', 1)
 
         # Retrieve bookings based on user type
         if current_user.is_staff:
@@ -131,15 +240,14 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             tutee = get_object_or_404(Tutee, user=current_user)
             bookings = Booking.objects.filter(tutee=tutee)
 
-        # Update bookings where date_time has passed and is not completed
-        bookings_to_update = bookings.filter(date_time__lte=now(), is_completed=False)
-        bookings_to_update.update(is_completed=True)
+        # Completion is derived from the end time, the complete_bookings command persists it
+        bookings = bookings.for_listing().with_completion()
 
         # Apply status filter
         if status_filter == 'Completed':
-            bookings = bookings.filter(is_completed=True)
+            bookings = bookings.filter(completed=True)
         elif status_filter == 'Booked':
-            bookings = bookings.filter(is_completed=False)
+            bookings = bookings.filter(completed=False)
 
         # Apply tutor name filter (case-insensitive search)
         if tutor_filter:
@@ -147,27 +255,30 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # Apply tutee name filter (case-insensitive search)
         if tutee_filter:
             bookings = bookings.filter(tutee__user__username=tutee_filter)
-            
-        page = self.request.GET.get('page', 1)
-        paginator = Paginator(bookings, 6)
-        try:
-            paginated_bookings = paginator.page(page)
-        except PageNotAnInteger:
-            paginated_bookings = paginator.page(1)
-        except EmptyPage:
-            paginated_bookings = paginator.page(paginator.num_pages)
+
+        # Skip the total count, the bookings table is the largest one we page through
+        paginator = KeysetPaginator(bookings, 6, ['date_time'], count=False)
+        paginated_bookings = paginator.get_page(self.request.GET.get('cursor'))
+
+        # Prepare query parameters without 'cursor'
+        query_params = self.request.GET.copy()
+        query_params.pop('cursor', None)
 
         # Add context variables
         context['user'] = current_user
         context['bookings'] = bookings
         # Add distinct lists of tutors and tutees for the dropdowns
-        context['tutors'] = Tutor.objects.all()
-        context['tutees'] = Tutee.objects.all()
+        context['tutors'] = Tutor.objects.select_related('user')
+        context['tutees'] = Tutee.objects.select_related('user')
         # Filters
         context['status_filter'] = status_filter
         context['tutor_filter'] = tutor_filter
         context['tutee_filter'] = tutee_filter
         context['bookings'] = paginated_bookings
+        context['query_params'] = query_params.urlencode()
+        # Tutors and tutees can subscribe to their bookings from a calendar app
+        if not current_user.is_staff:
+            context['calendar_feed'] = CalendarFeed.objects.filter(user=current_user).first()
 
         return context
 
@@ -227,6 +338,8 @@ class RequestsView(LoginRequiredMixin, TemplateView):
             tutee = get_object_or_404(Tutee, user=current_user)
             requests = Request.objects.filter(tutee=tutee)
 
+        requests = requests.for_listing()
+
         # Apply filters
         if status_filter:
             requests = requests.filter(status=status_filter)
@@ -237,76 +350,139 @@ class RequestsView(LoginRequiredMixin, TemplateView):
         elif is_late_filter == "On Time":
             requests = requests.filter(is_late=False)
 
-        paginator = Paginator(requests, 4)
-        page_number = self.request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPaginator(requests, 4, ['-created_at'])
+        page_obj = paginator.get_page(self.request.GET.get('cursor'))
 
-        # Prepare query parameters without 'page'
+        # Prepare query parameters without 'cursor'
         query_params = self.request.GET.copy()
-        if 'page' in query_params:
-            query_params.pop('page')
+        query_params.pop('cursor', None)
 
         # Add context variables
         context['user'] = current_user
         context['requests'] = requests
-        context['tutees'] = Tutee.objects.all()
         context['status_filter'] = status_filter
         context['tutee_filter'] = tutee_filter
         context['is_late_filter'] = is_late_filter
         context['page_obj'] = page_obj
         context['query_params'] = query_params.urlencode()  # Encode query params for URL
+        context['summary'] = request_summary() if current_user.is_staff else None
         return context
 
 
     def post(self, request, *args, **kwargs):
-        """Handle approve and delete requests."""
-        # Check if the request is to approve or delete
-        approve_request_id = request.POST.get("approve_request_id")
-        delete_request_id = request.POST.get("delete_request_id")
-
-        if approve_request_id:
-            return self.approve_request(request, approve_request_id)
-        elif delete_request_id:
-            return self.delete_request(request, delete_request_id)
+        """Approve or reject the selected requests in bulk, then go back to the same page of the queue."""
+        if not request.user.is_staff:
+            raise PermissionDenied
+
+        # The per-row buttons post a single id, the bulk actions a list of them
+        if request.POST.get("approve_request_id"):
+            action, request_ids = "approve", [request.POST["approve_request_id"]]
+        elif request.POST.get("delete_request_id"):
+            action, request_ids = "reject", [request.POST["delete_request_id"]]
         else:
+            action, request_ids = request.POST.get("action"), request.POST.getlist("request_ids")
+        request_ids = [request_id for request_id in request_ids if request_id.isdigit()]
+
+        if action not in ("approve", "reject") or not request_ids:
             messages.error(request, "Invalid action.")
-            return self.get(request, *args, **kwargs)
+        elif len(request_ids) > REQUEST_BATCH_MAX:
+            messages.error(request, f"At most {REQUEST_BATCH_MAX} requests can be handled at once.")
+        else:
+            requests = Request.objects.filter(pk__in=request_ids)
+            count = requests.approve() if action == "approve" else requests.reject()
+            done = "approved" if action == "approve" else "deleted"
+            if count == 0:
+                messages.error(request, "Request not found.")
+            elif count == 1:
+                messages.success(request, f"Request {done} successfully.")
+            else:
+                messages.success(request, f"{count} requests {done} successfully.")
 
-    def approve_request(self, request, request_id):
-        """Handle approving a request."""
-        try:
-            request_instance = Request.objects.get(id=request_id)
-            request_instance.status = "Approved"
-            request_instance.save()
-            messages.success(request, "Request approved successfully.")
-
-            # Notify the recipient of the status change
-            Notification.objects.create(
-                user=request_instance.tutee.user,
-                message=f"Admin approved your {request_instance.request_type} request submitted on {request_instance.created_at.strftime('%Y-%m-%d %H:%M')}.",
-            )
-        except Request.DoesNotExist:
-            messages.error(request, "Request not found.")
+        query_string = request.GET.urlencode()
+        return redirect(reverse('requests') + (f'?{query_string}' if query_string else ''))
 
-        return self.get(request)
+class ApproveBookingRequestView(LoginRequiredMixin, FormView):
+    """Let admins approve a new booking request by booking every session of its series."""
 
-    def delete_request(self, request, request_id):
-        """Handle deleting a request."""
-        try:
-            request_instance = Request.objects.get(id=request_id)
-            request_instance.delete()
-            messages.success(request, "Request deleted successfully.")
-
-            # Notify the recipient of the deletion
-            Notification.objects.create(
-                user=request_instance.tutee.user,
-                message=f"Admin rejected and deleted your {request_instance.request_type} request submitted on {request_instance.created_at.strftime('%Y-%m-%d %H:%M')}.",
+    form_class = ApproveBookingRequestForm
+    template_name = "approve_booking_request.html"
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        if not request.user.is_staff:
+            raise PermissionDenied
+        self.new_booking_request = get_object_or_404(
+            NewBookingRequest.objects.select_related('request__tutee__user'),
+            request_id=kwargs.get('request_id'),
+            request__status="Pending",
+        )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['new_booking_request'] = self.new_booking_request
+        return kwargs
+
+    def get_initial(self):
+        initial = super().get_initial()
+        initial['tutor'] = self.new_booking_request.assigned_tutor_id
+        return initial
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['new_booking_request'] = self.new_booking_request
+        return context
+
+    def form_valid(self, form):
+        bookings = form.save()
+        if not bookings:
+            return self.form_invalid(form)
+        messages.success(self.request, f"Request approved: {len(bookings)} bookings created.")
+        return redirect(self.get_success_url())
+
+    def get_success_url(self):
+        return reverse('requests')
+
+@login_required
+def match_requests(request):
+    """Propose tutors for the pending new booking requests and let staff accept them in bulk."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    if request.method == "POST":
+        if request.POST.get("action") == "accept_all":
+            proposals = propose_matches()
+        else:
+            # Selected proposals are posted as "<new booking request id>:<tutor id>"
+            proposals, rejected = check_proposals(
+                Proposal(int(request_id), int(tutor_id), None)
+                for request_id, _, tutor_id in (value.partition(':') for value in request.POST.getlist('proposals'))
+                if request_id.isdigit() and tutor_id.isdigit()
             )
-        except Request.DoesNotExist:
-            messages.error(request, "Request not found.")
+            if rejected:
+                pairs = ", ".join(f"request {proposal.new_booking_request_id} to tutor {proposal.tutor_id}" for proposal in rejected)
+                messages.error(request, f"Skipped proposals whose tutor no longer exists or does not teach the language: {pairs}.")
+        if proposals:
+            messages.success(request, f"Assigned tutors to {accept_proposals(proposals)} requests.")
+        else:
+            messages.error(request, "No proposals to accept.")
+        return redirect('match_requests')
+
+    proposals = propose_matches()
+    shown = proposals[:MATCH_DISPLAY_LIMIT]
+    new_booking_requests = NewBookingRequest.objects.select_related('request__tutee__user').in_bulk(
+        [proposal.new_booking_request_id for proposal in shown]
+    )
+    tutors = Tutor.objects.select_related('user').in_bulk([proposal.tutor_id for proposal in shown])
+    return render(request, 'match_requests.html', {
+        'proposals': [
+            (proposal, new_booking_requests[proposal.new_booking_request_id], tutors[proposal.tutor_id])
+            for proposal in shown
+        ],
+        'proposal_count': len(proposals),
+    })
 
-        return self.get(request)
-    
 class RequestInfoView(LoginRequiredMixin, TemplateView):
     template_name = 'request_info.html'
 
@@ -315,19 +491,19 @@ class RequestInfoView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
 
         request_id = kwargs.get('request_id')
-        request_instance = get_object_or_404(Request, id=request_id)
+        request_instance = get_object_or_404(Request.objects.with_details(), id=request_id)
 
         # Add the base request instance to the context
         context["request"] = request_instance
 
-        # Attempt to get related NewBookingRequest and ChangeCancelBookingRequest
+        # Both subtypes were joined in, so these read the cache rather than the database
         try:
-            context["new_booking_request"] = NewBookingRequest.objects.get(request=request_instance)
+            context["new_booking_request"] = request_instance.new_booking_request
         except NewBookingRequest.DoesNotExist:
             context["new_booking_request"] = None
 
         try:
-            context["change_cancel_request"] = ChangeCancelBookingRequest.objects.get(request=request_instance)
+            context["change_cancel_request"] = request_instance.change_cancel_booking_request
         except ChangeCancelBookingRequest.DoesNotExist:
             context["change_cancel_request"] = None
 
@@ -343,17 +519,12 @@ class NewBookingRequestView(LoginRequiredMixin, FormView):
         # Assign the tutee to the request before saving
         form.instance.tutee = self.request.user.tutee_user
 
-        # Save the booking instance
-        self.object = form.save()
+        with transaction.atomic():
+            # Save the booking instance
+            self.object = form.save()
 
-        admins = User.objects.filter(is_staff=True)  # Retrieve all admins
-        
-        # Send a notification to each admin
-        for admin in admins:
-            Notification.objects.create(
-                user=admin,
-                message=f"{self.object.request.request_type} request from {self.object.request.tutee}.",
-            )
+            # Notify every admin
+            notify_staff(f"{self.object.request.request_type} request from {self.object.request.tutee}.", kind='new_booking_request')
 
         messages.success(self.request, "New Booking Request successfully created!")
         return redirect(self.get_success_url())
@@ -377,17 +548,12 @@ class ChangeCancelBookingRequestView(LoginRequiredMixin, FormView):
         # Assign the tutee to the request before saving
         form.instance.tutee = self.request.user.tutee_user
 
-        # Save the booking instance
-        self.object = form.save()
+        with transaction.atomic():
+            # Save the booking instance
+            self.object = form.save()
 
-        admins = User.objects.filter(is_staff=True)  # Retrieve all admins
-        
-        # Send a notification to each admin
-        for admin in admins:
-            Notification.objects.create(
-                user=admin,
-                message=f"{self.object.change_or_cancel} request from {self.object.request.tutee}.",
-            )
+            # Notify every admin
+            notify_staff(f"{self.object.change_or_cancel} request from {self.object.request.tutee}.", kind='change_cancel_request')
 
         messages.success(self.request, "Change/Cancel Request successfully created!")
         return redirect(self.get_success_url())
@@ -395,48 +561,64 @@ class ChangeCancelBookingRequestView(LoginRequiredMixin, FormView):
     def get_success_url(self):
         return reverse('requests')
 
+def mark_invoices(request):
+    """Mark the selected bookings as paid or unpaid with a single UPDATE, then go back to the same invoices page."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    mark = request.POST.get('mark')
+    booking_ids = [booking_id for booking_id in request.POST.getlist('booking_ids') if booking_id.isdigit()]
+    if mark not in ('paid', 'unpaid') or not booking_ids:
+        messages.error(request, "Select the bookings to mark as paid or unpaid.")
+    elif len(booking_ids) > INVOICE_BATCH_MAX:
+        messages.error(request, f"At most {INVOICE_BATCH_MAX} bookings can be marked at once.")
+    else:
+        updated = Booking.objects.filter(pk__in=booking_ids).set_paid(mark == 'paid')
+        messages.success(request, f"Marked {updated} bookings as {mark}.")
+
+    query_string = request.GET.urlencode()
+    return redirect(reverse('invoices') + (f'?{query_string}' if query_string else ''))
+
 @login_required
 def invoices(request):
     current_user = request.user
     status_filter = request.GET.get('status')  # Get the status filter from the query parameters
 
+    if request.method == 'POST' and 'mark' in request.POST:
+        return mark_invoices(request)
+    if request.method == 'POST':
+        # The booking's save signal moves its price between the ledgers' paid and remaining totals
+        booking = Booking.objects.get(pk = request.POST.get("booking_id"))
+        booking.is_paid = not booking.is_paid
+        booking.save(update_fields=['is_paid'])
+        return redirect('invoices')
+
+    # Only tutors and tutees see the totals, read from their ledger instead of summing every booking
+    total = None
     if current_user.is_staff:
         bookings = Booking.objects.all()
     elif current_user.is_tutor:
         tutor = Tutor.objects.get(user = current_user)
         bookings = Booking.objects.filter(tutor = tutor)
+        total = Ledger.objects.for_user(current_user)
     else:
         tutee = Tutee.objects.get(user = current_user)
         bookings = Booking.objects.filter(tutee = tutee)
+        total = Ledger.objects.for_user(current_user)
 
-    total = {'remaining': 0, 'paid': 0}
-    for booking in bookings:
-        if booking.is_paid:
-            total['paid'] += booking.price  # Add the price to 'paid' if booking is paid
-        else:
-            total['remaining'] += booking.price  # Add the price to 'remaining' if booking is not paid
+    bookings = bookings.for_listing().with_completion()
 
     if status_filter == "Paid":  # If a status is provided, filter the bookings
         bookings = bookings.filter(is_paid=True)
     elif status_filter == "Pending":
         bookings = bookings.filter(is_paid=False)
 
-        
-    
-    paginator = Paginator(bookings, 6) 
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(bookings, 6, ['date_time'], count=False)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
-    if request.method == 'POST':
-        booking = Booking.objects.get(pk = request.POST.get("booking_id"))
-        booking.is_paid = not booking.is_paid
-        booking.save()
-        return redirect('invoices')
-
-    # Prepare query parameters without 'page'
+    # Prepare query parameters without 'cursor'
     query_params = request.GET.copy()
-    if 'page' in query_params:
-        query_params.pop('page')
+    query_params.pop('cursor', None)
     
     return render(request, 'invoices.html', {
         "page_obj": page_obj,
@@ -445,6 +627,77 @@ def invoices(request):
         "query_params": query_params.urlencode(),
     })
     
+@login_required
+def export_invoices(request, export_format):
+    """Stream every booking, filtered like the invoices page, as CSV or JSON Lines for finance."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    if export_format not in RENDERERS:
+        raise Http404("Unknown export format.")
+
+    render_rows, content_type = RENDERERS[export_format]
+    response = StreamingHttpResponse(render_rows(export_rows(request.GET.get('status'))), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="bookings.{export_format}"'
+    return response
+
+@login_required
+def reconcile_payments(request):
+    """Let staff upload a bank statement and mark the bookings it pays for as paid."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    report = None
+    form = ReconcilePaymentsForm(request.POST or None, request.FILES or None)
+    if request.method == "POST" and form.is_valid():
+        dry_run = form.cleaned_data["dry_run"]
+        # The upload is decoded as it is read, so large statements are never held in memory
+        statement = io.TextIOWrapper(form.cleaned_data["statement"].file, encoding="utf-8-sig", newline="")
+        try:
+            report = reconcile(statement, apply=not dry_run)
+        except UnicodeDecodeError:
+            form.add_error("statement", "The statement must be a UTF-8 encoded CSV file.")
+        except csv.Error as error:
+            form.add_error("statement", f"The statement is not a valid CSV file: {error}.")
+        else:
+            if not dry_run:
+                messages.success(request, f"{report.updated} bookings marked as paid.")
+
+    return render(request, 'reconcile_payments.html', {'form': form, 'report': report})
+
+@login_required
+def revenue_report(request):
+    """Show revenue and teaching hours per tutor and language for a term, read from the rollups only."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    terms = list(Term.objects.filter(pk__in=RevenueRollup.objects.values('term')).order_by('-start_date'))
+    term = next((option for option in terms if str(option.pk) == request.GET.get('term')), terms[0] if terms else None)
+
+    rollups = RevenueRollup.objects.filter(term=term)
+    languages = list(
+        rollups.order_by('language').values('language')
+        .annotate(**{field: Sum(field) for field in ROLLUP_TOTALS})
+    )
+    # The term's totals are the sum of its (few) language rows
+    total = dict(ROLLUP_TOTALS)
+    for row in languages:
+        for field in ROLLUP_TOTALS:
+            total[field] += row[field]
+    for row in languages + [total]:
+        row['hours'] = row['duration'].total_seconds() / 3600
+
+    paginator = KeysetPaginator(rollups.select_related('tutor__user'), 20, ['-revenue'], count=False)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+
+    return render(request, 'revenue_report.html', {
+        'terms': terms,
+        'term': term,
+        'page_obj': page_obj,
+        'languages': languages,
+        'total': total,
+        'query_params': urlencode({'term': term.pk}) if term else '',
+    })
+
 class LoginProhibitedMixin:
     """Mixin that redirects when a user is logged in."""
 
@@ -585,33 +838,59 @@ class TutorSignUpView(LoginProhibitedMixin, FormView):
     def get_success_url(self):
         return reverse(settings.REDIRECT_URL_WHEN_LOGGED_IN)
 
+def _inbox_paginator(user, tab):
+    """Return a paginator over one inbox tab, newest first, or None for an unknown tab."""
+    if tab == 'received':
+        queryset = Inquiry.objects.for_listing().filter(recipient=user)
+    elif tab == 'sent':
+        queryset = Inquiry.objects.for_listing().filter(sender=user)
+    elif tab == 'notifications':
+        queryset = Notification.objects.filter(user=user)
+    else:
+        return None
+    return KeysetPaginator(queryset, INBOX_PAGE_SIZE, ['-created_at'], count=False)
+
+def _inbox_item(request, tab, item):
+    """Describe an inquiry or notification for the inbox's JSON pages."""
+    if tab == 'notifications':
+        data = {'id': item.id, 'message': item.message, 'is_read': item.is_read}
+    else:
+        data = {
+            'id': item.id, 'sender': item.sender.username, 'recipient': item.recipient.username,
+            'message': item.message, 'status': item.status, 'response': item.response,
+        }
+    data['created_at'] = item.created_at.isoformat()
+    template = 'partials/notification_item.html' if tab == 'notifications' else 'partials/inquiry_item.html'
+    data['html'] = render_to_string(template, {'item': item, 'tab': tab}, request=request)
+    return data
+
 @login_required
 def inbox(request):
+    """Show the first page of the selected tab; the rest, and the notifications, are fetched as JSON."""
     tab = request.GET.get('tab', 'received')  # Default to 'received' tab
-
-    received_inquiries = Inquiry.objects.filter(recipient=request.user)
-    sent_inquiries = Inquiry.objects.filter(sender=request.user)
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
+    if tab not in ('received', 'sent'):
+        tab = 'received'
 
     # Mark notifications as read
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-
-    # Determine which tab to show based on the query parameter 'tab'
-    if tab == 'sent':
-        selected_inquiries = sent_inquiries
-    elif tab == 'notifications':
-        # You can add notification logic here if needed
-        selected_inquiries = []
-    else:
-        selected_inquiries = received_inquiries
+    mark_all_read(request.user)
 
+    page = _inbox_paginator(request.user, tab).get_page()
     return render(request, 'inbox.html', {
-        'received_inquiries': received_inquiries,
-        'sent_inquiries': sent_inquiries,
-        'notifications': notifications,  # Add notifications here if needed
-        'selected_inquiries': selected_inquiries,
+        'page': page,
         'tab': tab,  # The currently selected tab
     })
+
+@login_required
+def inbox_page(request, tab):
+    """Return a page of an inbox tab as JSON, with the cursor of the next page for infinite scroll."""
+    paginator = _inbox_paginator(request.user, tab)
+    if paginator is None:
+        return JsonResponse({'error': "Unknown inbox tab."}, status=404)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'items': [_inbox_item(request, tab, item) for item in page],
+        'next_cursor': page.next_cursor,
+    })
     
 @login_required
 def send_inquiry(request):
@@ -621,22 +900,21 @@ def send_inquiry(request):
             inquiry = form.save(commit=False)
             inquiry.sender = request.user
 
-            # If the user is not staff, send the inquiry to all admins (is_staff=True)
-            if not request.user.is_staff:
-                admins = User.objects.filter(is_staff=True)  # Retrieve all admins
-            
-                # Send a notification to each admin
-                for admin in admins:
-                    inquiry.recipient = admin
-                    inquiry.save()
-
-            # Create a notification for the recipient
-            Notification.objects.create(
-                user=inquiry.recipient,
-                message=f"You have a new inquiry from {inquiry.sender}.",
+            # If the user is not staff, the inquiry goes to the admins (is_staff=True)
+            admin_ids = [] if request.user.is_staff else list(
+                User.objects.filter(is_staff=True).order_by('pk').values_list('pk', flat=True)
             )
+            if not request.user.is_staff:
+                inquiry.recipient_id = admin_ids[0] if admin_ids else None
 
-            return redirect('inbox')
+            if inquiry.recipient_id is None:
+                form.add_error(None, "Choose who to send the inquiry to.")
+            else:
+                with transaction.atomic():
+                    inquiry.save()
+                    # Notify the recipient, or every admin for inquiries sent to the admins
+                    notify(admin_ids or [inquiry.recipient_id], f"You have a new inquiry from {inquiry.sender}.", kind='inquiry')
+                return redirect('inbox')
     else:
         form = InquiryForm()
     
@@ -663,13 +941,11 @@ def respond_to_inquiry(request, inquiry_id):
         if response:
             inquiry.response = response
             inquiry.status = "Responded"  # Update status
-            inquiry.save()
+            with transaction.atomic():
+                inquiry.save()
 
-            # Create a notification for the sender (inquiry creator)
-            Notification.objects.create(
-                user=inquiry.sender,
-                message=f"Your inquiry has been responded to by {request.user.username}.",
-            )
+                # Notify the sender (inquiry creator)
+                notify([inquiry.sender_id], f"Your inquiry has been responded to by {request.user.username}.")
 
             return redirect('inbox')
 
@@ -677,7 +953,7 @@ def respond_to_inquiry(request, inquiry_id):
 
 @login_required
 def mark_notifications_as_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    mark_all_read(request.user)
     return redirect('inbox')
 
 @login_required
@@ -691,8 +967,26 @@ def delete_notification(request):
             pass
     return redirect('inbox')  # Adjust the redirect to your actual inbox view
 
+@login_required
+async def notification_stream(request):
+    """
+    Stream the user's unread count and new notifications as server-sent events.
+
+    Under ASGI the response stays open, fed by the process's notification broker. A WSGI
+    server would have to hold a thread per stream, so there it answers 204 No Content, which
+    tells an EventSource not to reconnect; pages served by WSGI do not open the stream at all.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    response = StreamingHttpResponse(
+        event_stream(user.pk, user.unread_notification_count), content_type='text/event-stream'
+    )
+    response['X-Accel-Buffering'] = 'no'  # Let proxies pass events through as they are sent
+    response['Cache-Control'] = 'no-cache'
+    return response
+
 def unread_notifications_count(request):
     if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return {'unread_notifications_count': unread_count}
+        return {'unread_notifications_count': request.user.unread_notification_count}
     return {'unread_notifications_count': 0}
\ No newline at end of file